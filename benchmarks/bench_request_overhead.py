@@ -0,0 +1,69 @@
+"""Micro-benchmark of the client-side overhead of a single API call.
+
+The panel is replaced by a requests adapter that returns a canned response
+without touching the network, so the timings only cover what SARBAN itself
+does per call: building headers, URL and body, dispatching through
+``Base.request`` and decoding the response with ``verify_response``.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_request_overhead.py [iterations]
+"""
+import json
+import sys
+import time
+
+import requests
+from requests.adapters import BaseAdapter
+
+from sarban import SARBAN
+
+
+USER = json.dumps({
+    "username": "user1",
+    "status": "active",
+    "used_traffic": 0,
+    "data_limit": 0,
+    "expire": 0,
+    "proxies": {"vless": {"id": "00000000-0000-0000-0000-000000000000"}},
+    "inbounds": {"vless": ["VLESS TCP REALITY"]},
+}).encode()
+
+
+class CannedAdapter(BaseAdapter):
+    def send(self, request, **kwargs):
+        response = requests.Response()
+        response.status_code = 200
+        response.headers["Content-Type"] = "application/json"
+        response._content = USER
+        response.request = request
+        response.url = request.url
+        return response
+
+    def close(self):
+        pass
+
+
+def bench(name, func, iterations):
+    for _ in range(min(iterations, 1000)):
+        func()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    elapsed = time.perf_counter() - start
+    print(f"{name:<28} {elapsed / iterations * 1e6:8.2f} us/call")
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+
+    sb = SARBAN("panel.example.com:2087")
+    sb.session.mount("https://", CannedAdapter())
+    sb.token = "token"
+
+    bench("get_client", lambda: sb.get_client("user1"), iterations)
+    bench("edit_client", lambda: sb.edit_client("user1", ["VLESS TCP REALITY"], total_gb=10), iterations)
+    bench("get_users(limit=10)", lambda: sb.get_users(offset=0, limit=10), iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Compare rendering subscriptions locally with downloading them from the panel.
+
+Without arguments the panel is a local HTTP server that answers every
+subscription request with the stored v2ray body of fixtures/, so the round
+trip only covers the client, the loopback network stack and a minimal server.
+Pass a panel address and a subscription token to compare against a real
+panel, whose render cost comes on top.
+
+Before timing anything, the local v2ray rendering is checked against the body
+the panel served (the fixture, or the real panel's answer for the user's
+links), so a renderer that drifts from the panel's format is reported.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_subscription_render.py [iterations] [address token]
+"""
+import base64
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from sarban import SARBAN
+from sarban.sub_gen import render_subscription
+
+
+def make_links(count):
+    links = []
+    for i in range(count):
+        vmess = {
+            "add": f"node{i}.example.com", "aid": "0", "host": "", "id": "00000000-0000-0000-0000-000000000000",
+            "net": "ws", "path": "/ws", "port": 443, "ps": f"VMess {i}", "tls": "tls", "type": "none", "v": "2",
+        }
+        links.append("vmess://" + base64.b64encode(json.dumps(vmess, sort_keys=True).encode()).decode())
+        links.append(
+            f"vless://00000000-0000-0000-0000-000000000000@node{i}.example.com:443"
+            f"?security=reality&type=tcp&flow=xtls-rprx-vision&sni=example.com&fp=chrome&pbk=key&sid=ab#VLESS%20{i}"
+        )
+    return links
+
+
+USER = {
+    "username": "user1",
+    "used_traffic": 0,
+    "data_limit": 0,
+    "expire": 0,
+    "links": make_links(5),
+}
+# v2ray body of USER's links as the panel encodes them, stored rather than rendered
+with open(os.path.join(os.path.dirname(__file__), "fixtures", "subscription_v2ray.txt"), "rb") as f:
+    BODY = f.read()
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+
+def bench(name, func, iterations):
+    for _ in range(min(iterations, 100)):
+        func()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    elapsed = time.perf_counter() - start
+    print(f"{name:<28} {elapsed / iterations * 1e6:10.2f} us/call {iterations / elapsed:10.0f} calls/s")
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    server = None
+    if len(sys.argv) > 3:
+        address, token = sys.argv[2], sys.argv[3]
+    else:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        address, token = f"http://127.0.0.1:{server.server_port}", "token"
+
+    with SARBAN(address) as sb:
+        user = USER if server is not None else sb.user_subscription_info(token)
+        served = sb.user_subscription_with_client_type(token, "v2ray")
+        matches = render_subscription(user, "v2ray") == served
+        print(f"local v2ray rendering {'matches' if matches else 'DIFFERS FROM'} the panel's body")
+
+        bench("panel v2ray", lambda: sb.user_subscription(token), iterations)
+        bench("panel clash-meta", lambda: sb.user_subscription_with_client_type(token, "clash-meta"), iterations)
+
+    for client_type in ("v2ray", "clash-meta", "sing-box"):
+        bench(f"local {client_type}", lambda: render_subscription(USER, client_type), iterations)
+
+    if server is not None:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""End-to-end benchmarks of the client against an in-memory panel.
+
+Every scenario runs against `sarban.testing.FakePanel` through the normal
+transports, so the numbers cover SARBAN itself (request building, dispatch,
+decoding, pagination, thread pools) plus a near-zero cost panel. Each scenario
+runs in its own subprocess so that its peak RSS is not inflated by the
+previous ones.
+
+Results are printed as a table and saved as JSON; pass an earlier JSON file
+with ``--compare`` to see the change of every scenario between two releases.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_suite.py [--scale 0.1] [--latency MS]
+        [--only NAME ...] [--output results.json] [--compare baseline.json]
+"""
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from sarban.testing import FakePanel
+
+
+SCENARIOS = {}
+
+
+def scenario(name):
+    def register(func):
+        SCENARIOS[name] = func
+        return func
+
+    return register
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def summarize(latencies, elapsed, ops):
+    result = {"ops": ops, "seconds": round(elapsed, 4), "ops_per_sec": round(ops / elapsed, 1)}
+    if latencies:
+        latencies = sorted(latencies)
+        result["p50_us"] = round(latencies[len(latencies) // 2] * 1e6, 1)
+        result["p99_us"] = round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1e6, 1)
+    return result
+
+
+def run_calls(func, count):
+    """Call ``func`` ``count`` times after a short warm-up and time every call."""
+    for _ in range(min(count, 200)):
+        func()
+    latencies = []
+    clock = time.perf_counter
+    start = clock()
+    for _ in range(count):
+        t = clock()
+        func()
+        latencies.append(clock() - t)
+    return summarize(latencies, clock() - start, count)
+
+
+def make_panel(options, users=0):
+    panel = FakePanel(latency=options.latency / 1000)
+    if users:
+        panel.seed_users(users)
+    return panel
+
+
+@scenario("get_client")
+def bench_get_client(options):
+    panel = make_panel(options, users=100)
+    sb = panel.client()
+    return run_calls(lambda: sb.get_client("user000042"), int(20000 * options.scale))
+
+
+@scenario("add_client")
+def bench_add_client(options):
+    panel = make_panel(options)
+    sb = panel.client()
+    names = iter(range(10 ** 9))
+    return run_calls(
+        lambda: sb.add_client(f"add{next(names)}", ["VLESS TCP REALITY"], total_gb=10),
+        int(10000 * options.scale)
+    )
+
+
+@scenario("add_clients_bulk")
+def bench_add_clients_bulk(options):
+    panel = make_panel(options)
+    sb = panel.client(pool_maxsize=16)
+    count = int(10000 * options.scale)
+    specs = (
+        {"username": f"bulk{i}", "inboundTag": ["VLESS TCP REALITY"], "total_gb": 10}
+        for i in range(count)
+    )
+    start = time.perf_counter()
+    failed = sum(not result.ok for result in sb.add_clients_bulk(specs, concurrency=8))
+    result = summarize(None, time.perf_counter() - start, count)
+    result["failed"] = failed
+    return result
+
+
+def bench_listing(options, users, paged):
+    users = max(int(users * options.scale), 1000)
+    panel = make_panel(options, users=users)
+    sb = panel.client()
+    if paged:
+        listing = lambda: sum(1 for _ in sb.iter_users(page_size=1000))
+    else:
+        listing = lambda: len(sb.get_users()["users"])
+
+    rounds = 3
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(rounds):
+        t = time.perf_counter()
+        assert listing() == users
+        latencies.append(time.perf_counter() - t)
+    result = summarize(latencies, time.perf_counter() - start, users * rounds)
+    result["users"] = users
+    return result
+
+
+@scenario("iter_users_10k")
+def bench_iter_users_10k(options):
+    return bench_listing(options, 10000, paged=True)
+
+
+@scenario("iter_users_100k")
+def bench_iter_users_100k(options):
+    return bench_listing(options, 100000, paged=True)
+
+
+@scenario("get_users_10k")
+def bench_get_users_10k(options):
+    return bench_listing(options, 10000, paged=False)
+
+
+@scenario("get_users_100k")
+def bench_get_users_100k(options):
+    return bench_listing(options, 100000, paged=False)
+
+
+@scenario("get_inbounds_uncached")
+def bench_get_inbounds_uncached(options):
+    sb = make_panel(options).client()
+    return run_calls(sb.get_inbounds, int(20000 * options.scale))
+
+
+@scenario("get_inbounds_cached")
+def bench_get_inbounds_cached(options):
+    sb = make_panel(options).client(cache=True)
+    return run_calls(sb.get_inbounds, int(20000 * options.scale))
+
+
+@scenario("get_client_async")
+def bench_get_client_async(options):
+    panel = make_panel(options, users=100)
+    count = int(20000 * options.scale)
+    concurrency = 50
+
+    async def main():
+        sb = await panel.async_client()
+        latencies = []
+
+        async def call():
+            t = time.perf_counter()
+            await sb.get_client("user000042")
+            latencies.append(time.perf_counter() - t)
+
+        start = time.perf_counter()
+        for offset in range(0, count, concurrency):
+            await asyncio.gather(*(call() for _ in range(min(concurrency, count - offset))))
+        elapsed = time.perf_counter() - start
+        await sb.aclose()
+        return summarize(latencies, elapsed, count)
+
+    result = asyncio.run(main())
+    result["concurrency"] = concurrency
+    return result
+
+
+def run_scenario(name, options):
+    """Run one scenario in a fresh interpreter and return its result."""
+    command = [
+        sys.executable, __file__, "--run", name,
+        "--scale", str(options.scale), "--latency", str(options.latency)
+    ]
+    completed = subprocess.run(command, capture_output=True, text=True)
+    if completed.returncode != 0:
+        return {"error": completed.stderr.strip().splitlines()[-1] if completed.stderr else "failed"}
+    return json.loads(completed.stdout)
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, baseline=None):
+    print(f"{'scenario':<24} {'ops/s':>12} {'p50 us':>10} {'p99 us':>10} {'rss MB':>8}" + ("  vs baseline" if baseline else ""))
+    for name, result in results.items():
+        if "error" in result:
+            print(f"{name:<24} error: {result['error']}")
+            continue
+        line = f"{name:<24} {result['ops_per_sec']:>12.0f}" + "".join(
+            f" {result[key]:>{width}.1f}" if result.get(key) is not None else f" {'-':>{width}}"
+            for key, width in (("p50_us", 10), ("p99_us", 10), ("peak_rss_mb", 8))
+        )
+        previous = (baseline or {}).get(name)
+        if previous and "ops_per_sec" in previous:
+            line += f"  {result['ops_per_sec'] / previous['ops_per_sec'] - 1:+.1%} ops/s"
+            if previous.get("p99_us") and result.get("p99_us"):
+                line += f", {result['p99_us'] / previous['p99_us'] - 1:+.1%} p99"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplier of call and user counts")
+    parser.add_argument("--latency", type=float, default=0.0, help="panel latency in milliseconds")
+    parser.add_argument("--only", nargs="+", choices=sorted(SCENARIOS), help="scenarios to run")
+    parser.add_argument("--output", help="JSON file to write, defaults to bench-<time>.json")
+    parser.add_argument("--compare", help="JSON file of an earlier run to compare with")
+    parser.add_argument("--run", help=argparse.SUPPRESS)
+    options = parser.parse_args()
+
+    if options.run:
+        result = SCENARIOS[options.run](options)
+        result["peak_rss_mb"] = peak_rss_mb()
+        print(json.dumps(result))
+        return
+
+    results = {}
+    for name in options.only or SCENARIOS:
+        print(f"running {name}...", file=sys.stderr)
+        results[name] = run_scenario(name, options)
+
+    baseline = None
+    if options.compare:
+        with open(options.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+    print_results(results, baseline)
+
+    now = datetime.now(timezone.utc)
+    report = {
+        "time": now.isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "options": {"scale": options.scale, "latency_ms": options.latency},
+        "results": results,
+    }
+    output = options.output or f"bench-{now:%Y%m%d-%H%M%S}.json"
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"saved {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
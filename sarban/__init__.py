@@ -1 +1,3 @@
 from sarban.sarban import SARBAN
+from sarban.async_sarban import AsyncSARBAN
+from sarban.fleet import SARBANFleet
@@ -0,0 +1,247 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import sarban
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# Node id used for the master node, which the panel reports with a null id
+MASTER_NODE_ID = 0
+
+
+def _require_numpy() -> None:
+    if numpy is None:
+        raise RuntimeError("Usage analytics require numpy: pip install sarban[analytics]")
+
+
+def split_range(start: datetime, end: datetime, step: timedelta) -> List[Tuple[str, str]]:
+    """Split [start, end) into consecutive ``step`` long ranges of ISO strings."""
+    if step <= timedelta(0):
+        raise ValueError("step must be positive")
+    ranges = []
+    while start < end:
+        stop = min(start + step, end)
+        ranges.append((start.isoformat(), stop.isoformat()))
+        start = stop
+    return ranges
+
+
+def node_coefficients(nodes: Iterable[Any]) -> Dict[int, float]:
+    """Map node ids to their usage coefficient, from the result of `get_nodes`.
+
+    The master node always counts with a coefficient of 1.
+    """
+    coefficients = {MASTER_NODE_ID: 1.0}
+    for node in nodes:
+        coefficients[node["id"]] = float(node["usage_coefficient"] or 1.0)
+    return coefficients
+
+
+class UserStats:
+    """Per user counters loaded into NumPy arrays for fast aggregation.
+
+    Parameters:
+        users (``Iterable[Dict]``):
+            User dicts or models, e.g. from `SARBAN.iter_users`
+
+    Example:
+        ```python
+        stats = UserStats.fetch(sb)
+        print(stats.top(10))
+        print(stats.totals_by_admin())
+        ```
+    """
+
+    def __init__(self, users: Iterable[Any]) -> None:
+        _require_numpy()
+        usernames, admins, used, lifetime, limits = [], [], [], [], []
+        for user in users:
+            admin = user.get("admin")
+            usernames.append(user["username"])
+            admins.append(admin["username"] if admin else None)
+            used.append(user.get("used_traffic") or 0)
+            lifetime.append(user.get("lifetime_used_traffic") or 0)
+            limits.append(user.get("data_limit") or 0)
+
+        self.usernames = numpy.array(usernames, dtype=object)
+        self.admins = numpy.array(admins, dtype=object)
+        self.used_traffic = numpy.array(used, dtype=numpy.int64)
+        self.lifetime_used_traffic = numpy.array(lifetime, dtype=numpy.int64)
+        self.data_limit = numpy.array(limits, dtype=numpy.int64)
+
+    @classmethod
+    def fetch(cls, client: "sarban.SARBAN", page_size: int = 1000, **filters) -> "UserStats":
+        """Load every user of the panel, page by page, with `get_users` filters."""
+        return cls(client.iter_users(page_size=page_size, prefetch=True, **filters))
+
+    def __len__(self) -> int:
+        return len(self.usernames)
+
+    def _column(self, by: str) -> "numpy.ndarray":
+        if by not in ("used_traffic", "lifetime_used_traffic", "data_limit"):
+            raise ValueError(f"Unsupported column: {by}")
+        return getattr(self, by)
+
+    def top(self, n: int = 10, by: str = "used_traffic") -> List[Tuple[str, int]]:
+        """Return the ``n`` users with the highest ``by`` value, highest first."""
+        values = self._column(by)
+        if n <= 0 or not len(values):
+            return []
+        if n < len(values):
+            index = numpy.argpartition(values, -n)[-n:]
+        else:
+            index = numpy.arange(len(values))
+        index = index[numpy.argsort(values[index])[::-1]]
+        return [(self.usernames[i], int(values[i])) for i in index]
+
+    def totals_by_admin(self, by: str = "used_traffic") -> Dict[Optional[str], int]:
+        """Sum ``by`` per owner admin (None for users without one)."""
+        values = self._column(by)
+        keys = numpy.array(["" if a is None else a for a in self.admins], dtype=object)
+        admins, inverse = numpy.unique(keys, return_inverse=True)
+        # bincount sums weights as float64, which is inexact above 2**53 bytes
+        totals = numpy.zeros(len(admins), dtype=numpy.int64)
+        numpy.add.at(totals, inverse, values)
+        return {(a or None): int(t) for a, t in zip(admins, totals)}
+
+
+class UsageSeries:
+    """Traffic per node over consecutive periods, as a periods x nodes matrix.
+
+    Build it with `fetch`, which splits a long time range into ``step`` sized
+    chunks and requests them in parallel.
+
+    Attributes:
+        periods (``List[Tuple[str, str]]``):
+            Start and end of each row
+        node_ids (``numpy.ndarray``):
+            Node id of each column, `MASTER_NODE_ID` for the master node
+        node_names (``List[str]``):
+            Node name of each column
+        traffic (``numpy.ndarray``):
+            Bytes per period and node
+    """
+
+    def __init__(
+        self,
+        periods: List[Tuple[str, str]],
+        node_ids: "numpy.ndarray",
+        node_names: List[str],
+        traffic: "numpy.ndarray"
+    ) -> None:
+        self.periods = periods
+        self.node_ids = node_ids
+        self.node_names = node_names
+        self.traffic = traffic
+
+    @classmethod
+    def from_responses(cls, periods: List[Tuple[str, str]], responses: List[dict]) -> "UsageSeries":
+        """Build a series from one usage response per period.
+
+        Responses of `get_usage` (uplink + downlink) and of `get_users_usage`
+        or `get_user_usage` (used_traffic) are accepted.
+        """
+        _require_numpy()
+        rows, ids, values, names = [], [], [], {}
+        for row, response in enumerate(responses):
+            for usage in response.get("usages", ()):
+                node_id = usage.get("node_id")
+                node_id = MASTER_NODE_ID if node_id is None else node_id
+                names[node_id] = usage.get("node_name")
+                rows.append(row)
+                ids.append(node_id)
+                if "used_traffic" in usage:
+                    values.append(usage["used_traffic"] or 0)
+                else:
+                    values.append((usage.get("uplink") or 0) + (usage.get("downlink") or 0))
+
+        node_ids, columns = numpy.unique(numpy.array(ids, dtype=numpy.int64), return_inverse=True)
+        traffic = numpy.zeros((len(periods), len(node_ids)), dtype=numpy.int64)
+        numpy.add.at(traffic, (numpy.array(rows, dtype=numpy.intp), columns), values)
+        return cls(periods, node_ids, [names[i] for i in node_ids.tolist()], traffic)
+
+    @classmethod
+    def fetch(
+        cls,
+        client: "sarban.SARBAN",
+        start: datetime,
+        end: datetime,
+        step: timedelta = timedelta(days=1),
+        username: Optional[str] = None,
+        admin: Optional[list] = None,
+        users: bool = False,
+        workers: int = 4
+    ) -> "UsageSeries":
+        """Fetch usage for [start, end) in ``step`` chunks, ``workers`` at a time.
+
+        Parameters:
+            client (`~sarban.SARBAN`):
+                Logged in client
+
+            start (``datetime``):
+                Start of the range
+
+            end (``datetime``):
+                End of the range
+
+            step (``timedelta``, optional):
+                Length of each period. Defaults to one day.
+
+            username (``str``, optional):
+                Read the usage of this user (`get_user_usage`)
+
+            admin (``list``, optional):
+                Read the usage of the users of these admins (`get_users_usage`)
+
+            users (``bool``, optional):
+                Read the usage of all users (`get_users_usage`) instead of the
+                nodes' own traffic (`get_usage`). Defaults to False.
+
+            workers (``int``, optional):
+                Number of periods requested concurrently. Defaults to 4.
+        """
+        periods = split_range(start, end, step)
+
+        def get(period: Tuple[str, str]) -> dict:
+            if username is not None:
+                return client.get_user_usage(username, start=period[0], end=period[1])
+            if users or admin is not None:
+                return client.get_users_usage(start=period[0], end=period[1], admin=admin)
+            return client.get_usage(start=period[0], end=period[1])
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            responses = list(executor.map(get, periods))
+        return cls.from_responses(periods, responses)
+
+    def totals(self) -> Dict[int, int]:
+        """Total traffic per node id over all periods.
+
+        Keyed by id like the columns, since node names need not be unique;
+        `node_names` holds the name of each id.
+        """
+        return {i: int(t) for i, t in zip(self.node_ids.tolist(), self.traffic.sum(axis=0))}
+
+    def per_period(self) -> "numpy.ndarray":
+        """Total traffic of all nodes in each period."""
+        return self.traffic.sum(axis=1)
+
+    def deltas(self) -> "numpy.ndarray":
+        """Change of traffic per node from one period to the next (one row fewer)."""
+        return numpy.diff(self.traffic, axis=0)
+
+    def adjusted(self, coefficients: Dict[int, float]) -> "UsageSeries":
+        """Return a copy with every node's traffic multiplied by its coefficient.
+
+        Parameters:
+            coefficients (``Dict[int, float]``):
+                Usage coefficient per node id, see `node_coefficients`. Nodes
+                missing from it keep a coefficient of 1.
+        """
+        factors = numpy.array([coefficients.get(i, 1.0) for i in self.node_ids.tolist()])
+        traffic = numpy.rint(self.traffic * factors).astype(numpy.int64)
+        return UsageSeries(self.periods, self.node_ids, self.node_names, traffic)
@@ -0,0 +1,506 @@
+import asyncio
+import functools
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Generator, Iterable, Optional, Union
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+from sarban import errors
+from sarban.methods import (
+    Methods,
+    Base,
+    Login,
+    Inbounds,
+    Clients,
+    Admin,
+    Core,
+    Node,
+    System,
+    UserTemplate,
+    Subscription,
+    BulkResult
+)
+from sarban.cache import ResponseCache, SubscriptionCache
+from sarban.metrics import Metrics
+from sarban.methods.base import _body_size
+from sarban.middleware import PanelRequest
+from sarban.ratelimit import Governor, RateLimiter
+from sarban.retry import RetryPolicy
+
+
+class AsyncSARBAN(Base, Login):
+    """Asyncio client for the Marzban API.
+
+    It exposes async equivalents of every `SARBAN` method and sends them over a
+    single pooled ``httpx.AsyncClient``, so one event loop can keep many panel
+    requests in flight. Requires the optional ``httpx`` dependency
+    (``pip install sarban[async]``).
+
+    Example:
+        ```python
+        from sarban import AsyncSARBAN
+
+        async with AsyncSARBAN("https://panel.example.com:2087") as sb:
+            await sb.login("admin", "password")
+            stats = await sb.get_system_stats()
+        ```
+    """
+
+    _ASYNC = True
+
+    def __init__(
+        self,
+        full_address: str,
+        https: bool = True,
+        timeout: float = 30,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        cache: Union[bool, ResponseCache] = False,
+        retry: Optional[Union[bool, RetryPolicy]] = None,
+        governor: Optional[Governor] = None,
+        subscription_cache: Union[bool, SubscriptionCache] = False,
+        metrics: Union[bool, Metrics] = False,
+        middleware: Iterable[Any] = (),
+    ) -> None:
+        """Initialize AsyncSARBAN client.
+
+        Parameters:
+            full_address (``str``):
+                Full address of Marzban panel (e.g., "panel.example.com:2087")
+
+            https (``bool``, optional):
+                Whether to use HTTPS. Defaults to True.
+
+            timeout (``float``, optional):
+                Timeout of each request in seconds. Defaults to 30.
+
+            max_connections (``int``, optional):
+                Maximum number of concurrent connections. Defaults to 100.
+
+            max_keepalive_connections (``int``, optional):
+                Maximum number of idle connections kept alive. Defaults to 20.
+
+            cache (``bool | ResponseCache``, optional):
+                Response cache of read-only endpoints, see `SARBAN`. Defaults to False.
+
+            retry (``bool | RetryPolicy``, optional):
+                Retry policy, see `SARBAN`. Defaults to None.
+
+            governor (`~sarban.ratelimit.Governor`, optional):
+                Rate limits and in-flight caps, see `SARBAN`. Defaults to none.
+
+            subscription_cache (``bool | SubscriptionCache``, optional):
+                Cache of subscription contents, see `SARBAN`. Defaults to False.
+
+            metrics (``bool | Metrics``, optional):
+                Request instrumentation, see `SARBAN`. Defaults to False.
+
+            middleware (``Iterable[Middleware]``, optional):
+                Request middleware, see `SARBAN`. Their ``handle_async`` is
+                used. Defaults to none.
+        """
+        if httpx is None:
+            raise ImportError(
+                "AsyncSARBAN requires httpx, install it with `pip install sarban[async]`"
+            )
+
+        self.full_address = full_address.rstrip('/')
+        if not self.full_address.startswith(('http://', 'https://')):
+            self.full_address = f"{'https' if https else 'http'}://{self.full_address}"
+
+        self.https = https
+        self.timeout = timeout
+        self.token = None
+        self.token_expires_at = None
+        self.token_refresh_at = None
+        self._credentials = None
+        self._headers = None
+        self._base_urls = {
+            "api": f"{self.full_address}/api/",
+            "sub": f"{self.full_address}/sub/"
+        }
+        self._token_lock = None
+        self.cache = ResponseCache() if cache is True else (cache or None)
+        self.retry = RetryPolicy() if retry is True else (retry or None)
+        self.governor = governor
+        self.subscription_cache = (
+            SubscriptionCache() if subscription_cache is True else (subscription_cache or None)
+        )
+        self.metrics = Metrics() if metrics is True else (metrics or None)
+        self.middleware = []
+        self._chain = None
+        if middleware:
+            self.use(*middleware)
+        self._background = set()
+
+        self.session = httpx.AsyncClient(
+            verify=https,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections
+            )
+        )
+
+    async def _send(
+        self,
+        path: str,
+        method: str,
+        headers: dict,
+        data: Optional[Union[dict, str]] = None,
+        params: Optional[dict] = None,
+        prefix: str = "api"
+    ) -> "httpx.Response":
+        """Async counterpart of `Base._send`."""
+        url, kwargs = self._build_request(path, method, headers, data, params, prefix)
+        if isinstance(kwargs.get("data"), str):
+            kwargs["content"] = kwargs.pop("data")
+
+        session = self.session
+        metrics = self.metrics
+        request = None
+        slot = await self.governor.acquire_async(path, prefix) if self.governor is not None else None
+        start = time.perf_counter() if metrics is not None else 0.0
+        try:
+            request = session.build_request(method, url, **kwargs)
+            response = await session.send(request)
+        except httpx.HTTPError as e:
+            if metrics is not None:
+                metrics.observe_error(
+                    method, path, prefix, e, time.perf_counter() - start,
+                    _body_size(request.content) if request is not None else 0
+                )
+            raise errors.HTTPException(0, f"Request failed: {str(e)}")
+        finally:
+            if slot is not None:
+                self.governor.release(slot)
+
+        if metrics is not None:
+            metrics.observe(
+                method, path, prefix, response.status_code, time.perf_counter() - start,
+                _body_size(request.content), len(response.content)
+            )
+        return response
+
+    async def _send_retrying(
+        self,
+        path: str,
+        method: str,
+        headers: dict,
+        data: Optional[Union[dict, str]],
+        params: Optional[dict],
+        prefix: str,
+        idempotent: Optional[bool],
+        conflict_check: Optional[str]
+    ) -> "httpx.Response":
+        """Async counterpart of `Base._send_retrying`."""
+        policy = self.retry
+        if policy is None or not (
+            conflict_check or policy.is_idempotent(method, path, idempotent)
+        ):
+            return await self._send(path, method, headers, data, params, prefix)
+
+        attempt = 0
+        unknown = False
+        while True:
+            try:
+                response = await self._send(path, method, headers, data, params, prefix)
+            except errors.HTTPException as e:
+                if e.status_code != 0 or attempt >= policy.retries:
+                    raise
+                response = None
+            else:
+                if unknown and conflict_check and response.status_code == 409:
+                    return await self._send(conflict_check, "GET", headers, prefix=prefix)
+                if attempt >= policy.retries or not policy.is_retryable(response):
+                    return response
+
+            unknown = unknown or policy.is_outcome_unknown(response)
+            attempt += 1
+            if self.metrics is not None:
+                self.metrics.observe_retry(method, path, prefix)
+            await asyncio.sleep(policy.delay(attempt, response))
+
+    async def _refresh_token(self, used_token: Optional[str]) -> None:
+        """Async counterpart of `Login._refresh_token`, serialized by an asyncio lock."""
+        if self._token_lock is None:
+            self._token_lock = asyncio.Lock()
+        async with self._token_lock:
+            if self.token != used_token:
+                return
+            await self._run_steps(Login._request_token.steps(self, *self._credentials))
+
+    async def request(
+        self,
+        path: str,
+        method: str,
+        headers: dict,
+        data: Optional[Union[dict, str]] = None,
+        params: Optional[dict] = None,
+        prefix: str = "api",
+        idempotent: Optional[bool] = None,
+        conflict_check: Optional[str] = None
+    ) -> "httpx.Response":
+        """Request to the Marzban API.
+
+        Async counterpart of `Base.request`, see it for the parameters.
+        Middleware added with `use` is awaited through ``handle_async``.
+
+        Returns:
+            `~httpx.Response`: The HTTP response object.
+        """
+        chain = self._chain
+        if chain is not None:
+            return await chain(PanelRequest(method, path, headers, data, params, prefix, idempotent, conflict_check))
+        return await self._request(path, method, headers, data, params, prefix, idempotent, conflict_check)
+
+    async def _request(
+        self,
+        path: str,
+        method: str,
+        headers: dict,
+        data: Optional[Union[dict, str]],
+        params: Optional[dict],
+        prefix: str,
+        idempotent: Optional[bool],
+        conflict_check: Optional[str]
+    ) -> "httpx.Response":
+        """Async counterpart of `Base._request`."""
+        if prefix == "sub" and self.subscription_cache is not None and \
+                self.subscription_cache.cacheable(method, path):
+            return await self._subscription_request(path, headers, params)
+
+        cache = self.cache if prefix == "api" else None
+        if cache is not None:
+            cached = cache.get(method, path, params)
+            if cached is not None:
+                if self.metrics is not None:
+                    self.metrics.observe_cache_hit(method, path, prefix)
+                return cached
+            generation = cache.generation
+
+        refresh = self._credentials is not None and prefix == "api" and path != "admin/token"
+        if refresh and self._token_expiring():
+            await self._refresh_token(self.token)
+
+        token = self.token
+        response = await self._send_retrying(
+            path, method, self._with_token(headers), data, params, prefix, idempotent, conflict_check
+        )
+        if refresh and response.status_code == 401:
+            await self._refresh_token(token)
+            response = await self._send_retrying(
+                path, method, self._with_token(headers), data, params, prefix, idempotent, conflict_check
+            )
+
+        if cache is not None:
+            cache.update(method, path, params, response, generation)
+        return response
+
+    async def _subscription_request(
+        self,
+        path: str,
+        headers: dict,
+        params: Optional[dict]
+    ) -> "httpx.Response":
+        """Async counterpart of `Base._subscription_request`."""
+        cache = self.subscription_cache
+        key = cache.key(path, params, headers)
+        entry, fresh = cache.get(key)
+        if self.metrics is not None and (fresh or (entry is not None and cache.stale_while_revalidate)):
+            self.metrics.observe_cache_hit("GET", path, "sub")
+        if fresh:
+            return entry.response
+        if entry is not None and cache.stale_while_revalidate:
+            if cache.begin_revalidation(key):
+                task = asyncio.ensure_future(
+                    self._revalidate_subscription(key, entry, path, headers, params, True)
+                )
+                self._background.add(task)
+                task.add_done_callback(self._background.discard)
+            return entry.response
+        return await self._revalidate_subscription(key, entry, path, headers, params)
+
+    async def _revalidate_subscription(
+        self,
+        key: tuple,
+        entry: Any,
+        path: str,
+        headers: dict,
+        params: Optional[dict],
+        background: bool = False
+    ) -> Optional["httpx.Response"]:
+        """Async counterpart of `Base._revalidate_subscription`."""
+        cache = self.subscription_cache
+        try:
+            response = await self._send_retrying(
+                path, "GET", cache.conditional(headers, entry), None, params, "sub", None, None
+            )
+            return cache.update(key, response, entry)
+        except errors.HTTPException:
+            if not background:
+                raise
+            return None
+        finally:
+            if background:
+                cache.end_revalidation(key)
+
+    async def _run_steps(self, steps: Generator[PanelRequest, Any, Any]) -> Any:
+        """Async counterpart of `Base._run_steps`, awaiting every request."""
+        response = error = None
+        while True:
+            try:
+                request = steps.send(response) if error is None else steps.throw(error)
+            except StopIteration as stop:
+                return stop.value
+            try:
+                chain = self._chain
+                response = await (chain(request) if chain is not None else self._request_from(request))
+                error = None
+            except Exception as e:
+                response, error = None, e
+
+    async def iter_users(
+        self,
+        page_size: int = 500,
+        prefetch: bool = False,
+        **filters
+    ) -> AsyncIterator[dict]:
+        """Async counterpart of `SARBAN.iter_users`, used with ``async for``."""
+        if page_size < 1:
+            raise ValueError("page_size must be at least 1")
+
+        def fetch(offset: int) -> Any:
+            return self.get_users(offset=offset, limit=page_size, **filters)
+
+        offset = 0
+        task = asyncio.ensure_future(fetch(offset)) if prefetch else None
+        try:
+            while True:
+                page = await (task if task is not None else fetch(offset))
+                task = None
+                users = page["users"]
+                offset += len(users)
+                more = len(users) == page_size and offset < page["total"]
+                if more and prefetch:
+                    task = asyncio.ensure_future(fetch(offset))
+                for user in users:
+                    yield user
+                del page, users
+                if not more:
+                    return
+        finally:
+            if task is not None:
+                task.cancel()
+
+    async def _run_bulk(
+        self,
+        call: Callable[[Any], Any],
+        items: Iterable[Any],
+        concurrency: int,
+        rate_limit: Optional[float]
+    ) -> AsyncIterator[BulkResult]:
+        """Async counterpart of `Bulk._run_bulk`, running items as tasks."""
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+
+        limiter = RateLimiter(rate_limit, concurrency) if rate_limit else None
+
+        async def run(item: Any) -> BulkResult:
+            if limiter:
+                await limiter.acquire_async()
+            try:
+                return BulkResult(item, result=await call(item))
+            except errors.Exceptions as e:
+                return BulkResult(item, error=e)
+
+        pending = set()
+        try:
+            for item in items:
+                if len(pending) >= concurrency:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        yield task.result()
+                pending.add(asyncio.ensure_future(run(item)))
+
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def add_clients_bulk(
+        self,
+        specs: Iterable[Dict[str, Any]],
+        concurrency: int = 8,
+        rate_limit: Optional[float] = None
+    ) -> AsyncIterator[BulkResult]:
+        """Async counterpart of `SARBAN.add_clients_bulk`, used with ``async for``."""
+        return self._run_bulk(lambda spec: self.add_client(**spec), specs, concurrency, rate_limit)
+
+    def edit_clients_bulk(
+        self,
+        specs: Iterable[Dict[str, Any]],
+        concurrency: int = 8,
+        rate_limit: Optional[float] = None
+    ) -> AsyncIterator[BulkResult]:
+        """Async counterpart of `SARBAN.edit_clients_bulk`, used with ``async for``."""
+        return self._run_bulk(lambda spec: self.edit_client(**spec), specs, concurrency, rate_limit)
+
+    def delete_clients_bulk(
+        self,
+        usernames: Iterable[str],
+        concurrency: int = 8,
+        rate_limit: Optional[float] = None
+    ) -> AsyncIterator[BulkResult]:
+        """Async counterpart of `SARBAN.delete_clients_bulk`, used with ``async for``."""
+        return self._run_bulk(self.delete_client, usernames, concurrency, rate_limit)
+
+    def reset_user_data_usage_bulk(
+        self,
+        usernames: Iterable[str],
+        concurrency: int = 8,
+        rate_limit: Optional[float] = None
+    ) -> AsyncIterator[BulkResult]:
+        """Async counterpart of `SARBAN.reset_user_data_usage_bulk`, used with ``async for``."""
+        return self._run_bulk(self.reset_user_data_usage, usernames, concurrency, rate_limit)
+
+    async def aclose(self) -> None:
+        """Close the pooled client and release all kept-alive connections."""
+        await self.session.aclose()
+
+    async def __aenter__(self) -> "AsyncSARBAN":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.aclose()
+
+
+def _async_method(func: Callable) -> Callable:
+    steps = func.steps
+
+    @functools.wraps(func)
+    async def method(self: AsyncSARBAN, *args, **kwargs) -> Any:
+        return await self._run_steps(steps(self, *args, **kwargs))
+
+    return method
+
+
+# Every public method of the request mixins gets an async twin running the same
+# request steps. Names are resolved through ``Methods`` so both clients pick the
+# same implementation.
+for _mixin in (Login, Inbounds, Clients, Admin, Core, Node, System, UserTemplate, Subscription):
+    for _name in vars(_mixin):
+        if _name.startswith("_") or _name in vars(AsyncSARBAN):
+            continue
+        _method = getattr(Methods, _name)
+        if not hasattr(_method, "steps"):
+            raise TypeError(f"{_name} needs an AsyncSARBAN counterpart")
+        setattr(AsyncSARBAN, _name, _async_method(_method))
+
+del _mixin, _name, _method
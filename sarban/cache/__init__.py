@@ -0,0 +1,280 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+# Read-only endpoints cached by default and for how long, in seconds
+DEFAULT_TTLS = {
+    "system": 10,
+    "inbounds": 300,
+    "hosts": 300,
+    "nodes": 60,
+    "node/settings": 300,
+    "core": 30,
+    "core/config": 300,
+    "user_template": 300,
+}
+
+# Cached resources dropped after a successful write to a resource, keyed by
+# the first segment of the written path. "system" is dropped on every write.
+INVALIDATES = {
+    "hosts": ("hosts",),
+    "core": ("core", "inbounds", "hosts", "nodes"),
+    "node": ("node", "nodes", "hosts"),
+    "user_template": ("user_template",),
+}
+
+
+def _root(path: str) -> str:
+    return path.split("/", 1)[0]
+
+
+class ResponseCache:
+    """Thread-safe TTL + LRU cache of successful GET responses.
+
+    Only endpoints with a TTL are cached. Successful POST/PUT/DELETE requests
+    drop the matching entries automatically (see ``INVALIDATES``). A GET
+    response is not stored when entries were invalidated while it was in
+    flight, so a read racing a write cannot put the old state back.
+
+    Parameters:
+        maxsize (``int``, optional):
+            Maximum number of cached responses. Defaults to 256.
+
+        ttls (``Dict[str, float]``, optional):
+            TTL in seconds per endpoint path (e.g. ``{"hosts": 600}``), merged
+            over ``DEFAULT_TTLS``. A TTL of 0 disables caching of that endpoint.
+    """
+
+    def __init__(self, maxsize: int = 256, ttls: Optional[Dict[str, float]] = None) -> None:
+        self.maxsize = maxsize
+        self.ttls = dict(DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _ttl(self, path: str) -> float:
+        ttl = self.ttls.get(path)
+        if ttl is None:
+            ttl = self.ttls.get(_root(path), 0)
+        return ttl
+
+    @staticmethod
+    def _key(path: str, params: Optional[dict]) -> Tuple:
+        if not params:
+            return (path,)
+        return (path,) + tuple(sorted(
+            (k, tuple(v) if isinstance(v, list) else v) for k, v in params.items()
+        ))
+
+    def get(self, method: str, path: str, params: Optional[dict] = None) -> Any:
+        """Return the cached response of a request, None if there is none."""
+        if method != "GET" or not self._ttl(path):
+            return None
+
+        key = self._key(path, params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+        return None
+
+    def update(
+        self,
+        method: str,
+        path: str,
+        params: Optional[dict],
+        response: Any,
+        generation: Optional[int] = None
+    ) -> None:
+        """Store a GET response or invalidate entries affected by a write.
+
+        Parameters:
+            generation (``int``, optional):
+                Value of `generation` read before the GET was sent. The
+                response is dropped if entries were invalidated since.
+        """
+        if method == "GET":
+            ttl = self._ttl(path)
+            if not ttl or response.status_code != 200:
+                return
+            key = self._key(path, params)
+            with self._lock:
+                if generation is not None and generation != self.generation:
+                    return
+                self._entries[key] = (time.monotonic() + ttl, response)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        elif response.status_code < 400:
+            self.invalidate("system", *INVALIDATES.get(_root(path), ()))
+
+    def invalidate(self, *paths: str) -> None:
+        """Drop cached responses.
+
+        Parameters:
+            *paths (``str``):
+                Endpoint paths or resource roots (e.g. "hosts", "node") to drop.
+                Everything is dropped when none is given.
+        """
+        with self._lock:
+            self.generation += 1
+            if not paths:
+                self._entries.clear()
+                return
+            for key in list(self._entries):
+                if key[0] in paths or _root(key[0]) in paths:
+                    del self._entries[key]
+
+    def stats(self) -> Dict[str, int]:
+        """Return the hit/miss counters and the current number of entries."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+class _Subscription:
+    __slots__ = ("response", "etag", "last_modified", "expires")
+
+    def __init__(self, response: Any, expires: float) -> None:
+        self.response = response
+        self.etag = response.headers.get("ETag")
+        self.last_modified = response.headers.get("Last-Modified")
+        self.expires = expires
+
+
+class SubscriptionCache:
+    """Bounded LRU cache of subscription contents with conditional revalidation.
+
+    Contents are kept per subscription path (token and client type) and User-Agent.
+    Within ``max_age`` a cached content is returned without contacting the
+    panel; after that it is revalidated with ``If-None-Match`` /
+    ``If-Modified-Since`` when the panel sent an ``ETag`` / ``Last-Modified``,
+    so an unchanged subscription costs a 304 instead of a full body, and is
+    downloaded again otherwise. Subscription info and usage are never cached.
+
+    Parameters:
+        maxsize (``int``, optional):
+            Maximum number of cached contents. Defaults to 10000.
+
+        max_age (``float``, optional):
+            Seconds a content is served without revalidation. Defaults to 60.
+
+        stale_while_revalidate (``bool``, optional):
+            Whether to return an expired content at once and revalidate it in
+            the background, so a slow panel never delays the caller. Defaults
+            to False.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 10000,
+        max_age: float = 60,
+        stale_while_revalidate: bool = False
+    ) -> None:
+        self.maxsize = maxsize
+        self.max_age = max_age
+        self.stale_while_revalidate = stale_while_revalidate
+
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.stale = 0
+        self._entries = OrderedDict()
+        self._revalidating = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def cacheable(method: str, path: str) -> bool:
+        """Whether a request to /sub/``path`` returns subscription content."""
+        return method == "GET" and path.rstrip("/").rsplit("/", 1)[-1] not in ("info", "usage")
+
+    @staticmethod
+    def key(path: str, params: Optional[dict], headers: dict) -> Tuple:
+        return ResponseCache._key(path, params) + (headers.get("User-Agent"),)
+
+    def get(self, key: Tuple) -> Tuple[Optional[_Subscription], bool]:
+        """Return the entry of ``key`` (or None) and whether it is still fresh."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, False
+            self._entries.move_to_end(key)
+            if entry.expires > time.monotonic():
+                self.hits += 1
+                return entry, True
+            return entry, False
+
+    def begin_revalidation(self, key: Tuple) -> bool:
+        """Claim the background revalidation of ``key``; False if one is running."""
+        with self._lock:
+            if key in self._revalidating:
+                return False
+            self._revalidating.add(key)
+            self.stale += 1
+            return True
+
+    def end_revalidation(self, key: Tuple) -> None:
+        with self._lock:
+            self._revalidating.discard(key)
+
+    @staticmethod
+    def conditional(headers: dict, entry: Optional[_Subscription]) -> dict:
+        """Return ``headers`` with the validators of ``entry`` added."""
+        if entry is None or not (entry.etag or entry.last_modified):
+            return headers
+        headers = dict(headers)
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def update(self, key: Tuple, response: Any, entry: Optional[_Subscription]) -> Any:
+        """Store a fresh response, or renew ``entry`` on 304, and return the response to use."""
+        with self._lock:
+            if response.status_code == 304 and entry is not None:
+                self.revalidated += 1
+                entry.expires = time.monotonic() + self.max_age
+                return entry.response
+            if response.status_code == 200:
+                self._entries[key] = _Subscription(response, time.monotonic() + self.max_age)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+            elif response.status_code == 404:
+                self._entries.pop(key, None)
+        return response
+
+    def invalidate(self, token: Optional[str] = None) -> None:
+        """Drop the cached contents of one subscription token, or all of them."""
+        with self._lock:
+            if token is None:
+                self._entries.clear()
+                return
+            for key in list(self._entries):
+                if key[0].split("/", 1)[0] == token:
+                    del self._entries[key]
+
+    def stats(self) -> Dict[str, int]:
+        """Return the hit, miss and 304 counters, the number of background
+        revalidations of stale contents and the current number of entries."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "revalidated": self.revalidated,
+                "stale": self.stale,
+                "size": len(self._entries)
+            }
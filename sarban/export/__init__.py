@@ -0,0 +1,231 @@
+import abc
+import csv
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import sarban
+from sarban.models import parse_datetime
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+def _admin(user: dict) -> Optional[str]:
+    admin = user.get("admin")
+    return admin.get("username") if admin else None
+
+
+# Exported user columns: how each is read from a user dict and its Arrow type
+USER_COLUMNS = {
+    "username": (lambda u: u.get("username"), "string"),
+    "status": (lambda u: u.get("status"), "string"),
+    "used_traffic": (lambda u: u.get("used_traffic"), "int64"),
+    "lifetime_used_traffic": (lambda u: u.get("lifetime_used_traffic"), "int64"),
+    "data_limit": (lambda u: u.get("data_limit"), "int64"),
+    "data_limit_reset_strategy": (lambda u: u.get("data_limit_reset_strategy"), "string"),
+    "expire": (lambda u: u.get("expire"), "int64"),
+    "admin": (_admin, "string"),
+    "online_at": (lambda u: u.get("online_at"), "timestamp"),
+    "created_at": (lambda u: u.get("created_at"), "timestamp"),
+    "sub_updated_at": (lambda u: u.get("sub_updated_at"), "timestamp"),
+    "note": (lambda u: u.get("note"), "string"),
+}
+
+DEFAULT_USER_COLUMNS = (
+    "username", "status", "used_traffic", "data_limit", "expire", "admin", "online_at",
+)
+
+# Columns of the per node usage returned by /api/users/usage
+USAGE_COLUMNS = {
+    "node_id": (lambda u: u.get("node_id"), "int64"),
+    "node_name": (lambda u: u.get("node_name"), "string"),
+    "used_traffic": (lambda u: u.get("used_traffic"), "int64"),
+}
+
+
+def _require_pyarrow() -> None:
+    if pyarrow is None:
+        raise RuntimeError("Arrow and Parquet export require pyarrow: pip install sarban[arrow]")
+
+
+class _Exporter(abc.ABC):
+    """Writes batches of rows as CSV, Arrow IPC or Parquet, one batch at a time."""
+
+    def __init__(self, columns: Dict[str, tuple], names: Sequence[str]) -> None:
+        unknown = [name for name in names if name not in columns]
+        if unknown:
+            raise ValueError(f"Unsupported columns: {', '.join(unknown)}")
+        self.columns = tuple(names)
+        self._getters = [columns[name][0] for name in names]
+        self._types = [columns[name][1] for name in names]
+
+    @abc.abstractmethod
+    def _rows(self) -> Iterator[List[dict]]:
+        """Yield the rows to export, one list per batch."""
+
+    def iter_batches(self) -> Iterator[Dict[str, List[Any]]]:
+        """Yield each batch as a dict of column name to list of values."""
+        for rows in self._rows():
+            yield {
+                name: [get(row) for row in rows]
+                for name, get in zip(self.columns, self._getters)
+            }
+
+    def _schema(self) -> "pyarrow.Schema":
+        types = {
+            "string": pyarrow.string(),
+            "int64": pyarrow.int64(),
+            "timestamp": pyarrow.timestamp("us"),
+        }
+        return pyarrow.schema([(name, types[t]) for name, t in zip(self.columns, self._types)])
+
+    def iter_record_batches(self) -> Iterator["pyarrow.RecordBatch"]:
+        """Yield each batch as a ``pyarrow.RecordBatch``. Requires pyarrow."""
+        _require_pyarrow()
+        schema = self._schema()
+        for batch in self.iter_batches():
+            arrays = []
+            for (name, values), kind in zip(batch.items(), self._types):
+                if kind == "timestamp":
+                    values = [parse_datetime(v) for v in values]
+                arrays.append(pyarrow.array(values, schema.field(name).type))
+            yield pyarrow.RecordBatch.from_arrays(arrays, schema=schema)
+
+    def to_csv(self, path: str) -> int:
+        """Write the rows to a CSV file with a header line.
+
+        Returns:
+            `~int`: Number of rows written.
+        """
+        count = 0
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(self.columns)
+            for batch in self.iter_batches():
+                rows = list(zip(*batch.values()))
+                writer.writerows(rows)
+                count += len(rows)
+        return count
+
+    def _write(self, writer: Any) -> int:
+        count = 0
+        try:
+            for batch in self.iter_record_batches():
+                writer.write_batch(batch)
+                count += batch.num_rows
+        finally:
+            writer.close()
+        return count
+
+    def to_arrow(self, path: str) -> int:
+        """Write the rows to an Arrow IPC (Feather v2) file. Requires pyarrow.
+
+        Returns:
+            `~int`: Number of rows written.
+        """
+        _require_pyarrow()
+        return self._write(pyarrow.ipc.new_file(path, self._schema()))
+
+    def to_parquet(self, path: str, compression: str = "snappy") -> int:
+        """Write the rows to a Parquet file, one row group per batch. Requires pyarrow.
+
+        Returns:
+            `~int`: Number of rows written.
+        """
+        _require_pyarrow()
+        return self._write(pyarrow.parquet.ParquetWriter(path, self._schema(), compression=compression))
+
+
+class UserExporter(_Exporter):
+    """Streams the panel's users into columnar files.
+
+    Users are read page by page through `SARBAN.iter_users`, turned into one
+    column batch per page and written before the next page is requested, so
+    memory stays bounded by ``page_size`` users whatever the size of the panel.
+    CSV export needs nothing beyond the standard library; Arrow and Parquet
+    need ``pyarrow`` (``pip install sarban[arrow]``).
+
+    Parameters:
+        client (`~sarban.SARBAN`):
+            Logged in client used to fetch users
+
+        columns (``Sequence[str]``, optional):
+            Columns to export, see ``USER_COLUMNS``. Defaults to username,
+            status, used_traffic, data_limit, expire, admin and online_at.
+
+        page_size (``int``, optional):
+            Number of users per page and per batch. Defaults to 1000.
+
+        **filters:
+            Filters of `get_users` (username, search, admin, status, sort)
+
+    Example:
+        ```python
+        exporter = UserExporter(sb, status="active")
+        exporter.to_parquet("users.parquet")
+        ```
+    """
+
+    def __init__(
+        self,
+        client: "sarban.SARBAN",
+        columns: Sequence[str] = DEFAULT_USER_COLUMNS,
+        page_size: int = 1000,
+        **filters
+    ) -> None:
+        super().__init__(USER_COLUMNS, columns)
+        self.client = client
+        self.page_size = page_size
+        self.filters = filters
+
+    def _rows(self) -> Iterator[List[dict]]:
+        users = self.client.iter_users(page_size=self.page_size, prefetch=True, **self.filters)
+        while True:
+            page = list(islice(users, self.page_size))
+            if not page:
+                return
+            yield page
+
+
+class UsageExporter(_Exporter):
+    """Exports the per node usage of `SARBAN.get_users_usage` as a table.
+
+    Unlike `UserExporter` this is a single request written as a single batch:
+    the panel's ``/api/users/usage`` takes no offset or limit and answers with
+    the usage already summed per node, so the response holds one row per node
+    and stays small whatever the number of users.
+
+    Parameters:
+        client (`~sarban.SARBAN`):
+            Logged in client used to fetch usage
+
+        start (``str``, optional):
+            Start date (ISO format)
+
+        end (``str``, optional):
+            End date (ISO format)
+
+        admin (``list``, optional):
+            Filter by admin usernames
+    """
+
+    def __init__(
+        self,
+        client: "sarban.SARBAN",
+        start: str = "",
+        end: str = "",
+        admin: list = None
+    ) -> None:
+        super().__init__(USAGE_COLUMNS, tuple(USAGE_COLUMNS))
+        self.client = client
+        self.start = start
+        self.end = end
+        self.admin = admin
+
+    def _rows(self) -> Iterator[List[dict]]:
+        usage = self.client.get_users_usage(start=self.start, end=self.end, admin=self.admin)
+        yield usage.get("usages", [])
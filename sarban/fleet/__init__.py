@@ -0,0 +1,281 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple, Union
+
+import sarban
+
+
+class PanelResult:
+    """Outcome of a fleet call on one panel.
+
+    Attributes:
+        panel (``str``):
+            Name of the panel
+
+        result (``Any``):
+            Value returned by the method, None on failure
+
+        error (``Exception``):
+            Error raised by the method, or ``TimeoutError`` if the panel did
+            not answer in time; None on success
+
+        elapsed (``float``):
+            Seconds the call took, or the timeout if it timed out
+    """
+
+    __slots__ = ("panel", "result", "error", "elapsed")
+
+    def __init__(
+        self,
+        panel: str,
+        result: Any = None,
+        error: Optional[Exception] = None,
+        elapsed: float = 0.0
+    ) -> None:
+        self.panel = panel
+        self.result = result
+        self.error = error
+        self.elapsed = elapsed
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def __repr__(self) -> str:
+        if self.ok:
+            return f"PanelResult(panel={self.panel!r}, result={self.result!r}, elapsed={self.elapsed:.3f})"
+        return f"PanelResult(panel={self.panel!r}, error={self.error!r}, elapsed={self.elapsed:.3f})"
+
+
+_DONE = object()
+
+
+class SARBANFleet:
+    """Runs the same call on many panels at once.
+
+    Any `SARBAN` method can be called on the fleet; it runs on every panel (or
+    the selected ones) concurrently and returns a `PanelResult` per panel, so
+    one slow or failing panel never hides the others' results.
+
+    Parameters:
+        panels (``Dict[str, SARBAN]``):
+            Logged in clients by panel name
+
+        max_workers (``int``, optional):
+            Number of panels called concurrently. Defaults to one per panel.
+
+        timeout (``float | Dict[str, float]``, optional):
+            Seconds to wait for each panel, for all panels or per panel name.
+            Defaults to no limit beyond the clients' own timeouts.
+
+    Example:
+        ```python
+        fleet = SARBANFleet({"eu": eu_client, "us": us_client}, timeout=10)
+        for name, result in fleet.get_system_stats().items():
+            print(name, result.result if result.ok else result.error)
+        ```
+    """
+
+    # Seconds between checks for queued calls that have started
+    POLL_INTERVAL = 0.05
+
+    def __init__(
+        self,
+        panels: Dict[str, "sarban.SARBAN"],
+        max_workers: Optional[int] = None,
+        timeout: Optional[Union[float, Dict[str, float]]] = None
+    ) -> None:
+        self.panels = dict(panels)
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or max(len(self.panels), 1))
+
+    def __getattr__(self, name: str) -> Callable[..., Dict[str, PanelResult]]:
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        def call(*args, **kwargs) -> Dict[str, PanelResult]:
+            return self.call(name, *args, **kwargs)
+
+        call.__name__ = name
+        return call
+
+    def _timeout(self, panel: str, timeout: Optional[Union[float, Dict[str, float]]]) -> Optional[float]:
+        timeout = self.timeout if timeout is None else timeout
+        if isinstance(timeout, dict):
+            return timeout.get(panel)
+        return timeout
+
+    def call(
+        self,
+        method: str,
+        *args,
+        panels: Optional[Iterable[str]] = None,
+        timeout: Optional[Union[float, Dict[str, float]]] = None,
+        **kwargs
+    ) -> Dict[str, PanelResult]:
+        """Call ``method`` with the given arguments on every panel concurrently.
+
+        Parameters:
+            method (``str``):
+                Name of the `SARBAN` method, e.g. "get_nodes"
+
+            panels (``Iterable[str]``, optional):
+                Names of the panels to call. Defaults to all of them.
+
+            timeout (``float | Dict[str, float]``, optional):
+                Overrides the fleet timeout for this call
+
+        Returns:
+            `~Dict[str, PanelResult]`: Result per panel name, in fleet order.
+
+        A panel that times out is reported with a ``TimeoutError``; its request
+        keeps running in the background until the client's own timeout. The
+        timeout of a panel counts from the moment its call starts on a worker.
+        """
+        names = list(self.panels) if panels is None else list(panels)
+        started = {}
+
+        def run(name: str) -> PanelResult:
+            started[name] = time.monotonic()
+            began = time.perf_counter()
+            try:
+                result = getattr(self.panels[name], method)(*args, **kwargs)
+                return PanelResult(name, result=result, elapsed=time.perf_counter() - began)
+            except Exception as e:
+                return PanelResult(name, error=e, elapsed=time.perf_counter() - began)
+
+        futures, limits = {}, {}
+        for name in names:
+            future = self._executor.submit(run, name)
+            futures[future] = name
+            limit = self._timeout(name, timeout)
+            if limit is not None:
+                limits[future] = limit
+
+        results = {}
+        pending = set(futures)
+        while pending:
+            # A deadline runs from the moment the call starts on a worker, not
+            # from submission, so calls queued behind workers still busy with
+            # timed out panels (of this or an earlier call) get their full time.
+            deadlines, queued = [], False
+            for future in pending:
+                if future in limits:
+                    start = started.get(futures[future])
+                    if start is None:
+                        queued = True
+                    else:
+                        deadlines.append(start + limits[future])
+            wait_for = max(min(deadlines) - time.monotonic(), 0) if deadlines else None
+            if queued:
+                wait_for = min(wait_for, self.POLL_INTERVAL) if wait_for is not None else self.POLL_INTERVAL
+            done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[futures[future]] = future.result()
+
+            now = time.monotonic()
+            for future in [f for f in pending if f in limits]:
+                name = futures[future]
+                start = started.get(name)
+                if start is None or start + limits[future] > now:
+                    continue
+                pending.discard(future)
+                results[name] = PanelResult(
+                    name, error=TimeoutError(f"{name} did not answer within {limits[future]}s"),
+                    elapsed=limits[future]
+                )
+
+        return {name: results[name] for name in names}
+
+    def iter_users(
+        self,
+        page_size: int = 500,
+        panels: Optional[Iterable[str]] = None,
+        on_error: Optional[Callable[[str, Exception], None]] = None,
+        **filters
+    ) -> Iterator[Tuple[str, Any]]:
+        """Iterate over the users of all panels, read concurrently.
+
+        Each panel is paged through `SARBAN.iter_users` on its own thread and
+        users are yielded as their pages arrive, interleaved across panels.
+        Only a few pages per panel are buffered, so memory stays bounded.
+
+        Parameters:
+            page_size (``int``, optional):
+                Number of users requested per page. Defaults to 500.
+
+            panels (``Iterable[str]``, optional):
+                Names of the panels to read. Defaults to all of them.
+
+            on_error (``Callable[[str, Exception], None]``, optional):
+                Called with the panel name and error when a panel fails; the
+                other panels are still read. Without it the error is raised.
+
+            **filters:
+                Filters and options of `get_users`
+
+        Returns:
+            `~Iterator[Tuple[str, Dict]]`: Pairs of panel name and user.
+        """
+        names = list(self.panels) if panels is None else list(panels)
+        pages = queue.Queue(maxsize=2 * max(len(names), 1))
+        stop = threading.Event()
+
+        def put(item: tuple) -> bool:
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def produce(name: str) -> None:
+            page = []
+            try:
+                for user in self.panels[name].iter_users(page_size=page_size, **filters):
+                    page.append(user)
+                    if len(page) == page_size:
+                        if not put((name, page, None)):
+                            return
+                        page = []
+                if page:
+                    put((name, page, None))
+            except Exception as e:
+                put((name, None, e))
+            finally:
+                put((name, _DONE, None))
+
+        threads = [threading.Thread(target=produce, args=(name,), daemon=True) for name in names]
+        for thread in threads:
+            thread.start()
+
+        try:
+            remaining = len(names)
+            while remaining:
+                name, page, error = pages.get()
+                if page is _DONE:
+                    remaining -= 1
+                elif error is not None:
+                    if on_error is None:
+                        raise error
+                    on_error(name, error)
+                else:
+                    for user in page:
+                        yield name, user
+        finally:
+            stop.set()
+
+    def close(self) -> None:
+        """Stop the worker threads and close every panel client."""
+        self._executor.shutdown(wait=False)
+        for client in self.panels.values():
+            client.close()
+
+    def __enter__(self) -> "SARBANFleet":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
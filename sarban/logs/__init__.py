@@ -0,0 +1,469 @@
+import asyncio
+import logging
+import re
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, AsyncIterator, Iterable, Iterator, List, Optional, Pattern, Union
+from urllib.parse import urlencode
+
+import sarban
+from sarban import errors
+from sarban.retry import RetryPolicy
+
+try:
+    import websockets
+    import websockets.exceptions
+except ImportError:
+    websockets = None
+
+
+logger = logging.getLogger(__name__)
+
+LEVELS = {"debug": 0, "info": 1, "warning": 2, "error": 3}
+
+# 2024/01/01 12:00:00[.123456] [Warning] message  (error log)
+# 2024/01/01 12:00:00 from 1.2.3.4:5678 accepted tcp:host:443 [in >> out] email: 1.alice  (access log)
+_LINE = re.compile(
+    r"(?P<time>\d{4}/\d\d/\d\d \d\d:\d\d:\d\d(?:\.\d+)?) (?:\[(?P<level>[A-Za-z]+)\] )?(?P<message>.*)",
+    re.DOTALL
+)
+# Marzban names Xray clients "<user id>.<username>"
+_EMAIL = re.compile(r"email: (?:\d+\.)?(\S+)")
+
+
+class LogLine:
+    """One line of the Xray core log.
+
+    Attributes:
+        raw (``str``):
+            The line as sent by the panel
+
+        time (``str``):
+            Timestamp as printed by Xray, e.g. "2024/01/01 12:00:00", None
+            for lines without one
+
+        level (``str``):
+            "debug", "info", "warning" or "error"; access log lines are "info"
+
+        kind (``str``):
+            "access" for access log lines, "error" for the rest of the core log
+
+        message (``str``):
+            The line without its timestamp and level
+
+        username (``str``):
+            User of an access log line, None otherwise
+    """
+
+    __slots__ = ("raw", "time", "level", "kind", "message", "username")
+
+    def __init__(
+        self,
+        raw: str,
+        time: Optional[str],
+        level: str,
+        kind: str,
+        message: str,
+        username: Optional[str] = None
+    ) -> None:
+        self.raw = raw
+        self.time = time
+        self.level = level
+        self.kind = kind
+        self.message = message
+        self.username = username
+
+    @property
+    def datetime(self) -> Optional[datetime]:
+        """`time` parsed, in the core's local time."""
+        if self.time is None:
+            return None
+        fmt = "%Y/%m/%d %H:%M:%S.%f" if "." in self.time else "%Y/%m/%d %H:%M:%S"
+        return datetime.strptime(self.time, fmt)
+
+    def __repr__(self) -> str:
+        return f"LogLine({self.level}, {self.raw!r})"
+
+
+def parse_line(raw: str) -> LogLine:
+    """Parse one line of the Xray core log into a `LogLine`.
+
+    Lines Xray prints without a timestamp (startup banner, panics) are kept
+    as "error" kind, "info" level lines.
+    """
+    match = _LINE.match(raw)
+    if match is None:
+        return LogLine(raw, None, "info", "error", raw)
+    time, level, message = match.group("time", "level", "message")
+    if level is not None:
+        return LogLine(raw, time, level.lower(), "error", message)
+    username = None
+    if "email: " in message:
+        email = _EMAIL.search(message)
+        if email is not None:
+            username = email.group(1)
+    return LogLine(raw, time, "info", "access", message, username)
+
+
+class _LineBuffer:
+    """Bounded FIFO between the websocket receiver and the consumer.
+
+    When full, ``put`` waits for the consumer ("block"), which stops reading
+    from the websocket and lets TCP flow control slow the panel down, or
+    discards the oldest line ("drop_oldest"). Must be created and used on
+    the event loop running the receiver.
+    """
+
+    def __init__(self, size: int, drop_oldest: bool) -> None:
+        self.size = size
+        self.drop_oldest = drop_oldest
+        self.dropped = 0
+        self.done = False
+        self.error = None
+        self._lines = deque()
+        self._readable = asyncio.Event()
+        self._writable = asyncio.Event()
+
+    async def put(self, line: LogLine) -> None:
+        while len(self._lines) >= self.size:
+            if self.drop_oldest:
+                self._lines.popleft()
+                self.dropped += 1
+                break
+            self._writable.clear()
+            await self._writable.wait()
+        self._lines.append(line)
+        self._readable.set()
+
+    async def get_many(self, limit: int) -> List[LogLine]:
+        """Wait for lines and return up to ``limit`` of them, none once finished."""
+        while not self._lines:
+            if self.done:
+                return []
+            self._readable.clear()
+            await self._readable.wait()
+        lines = self._lines
+        batch = [lines.popleft() for _ in range(min(limit, len(lines)))]
+        self._writable.set()
+        return batch
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        self.done = True
+        self.error = error
+        self._readable.set()
+
+
+class CoreLogs:
+    """Streams the Xray core log of a panel, or of one of its nodes.
+
+    Lines arrive over the panel's logs websocket (see ``logs_websocket`` in
+    `get_core_stats`) and are filtered while streaming: the ``pattern`` is
+    searched in the raw line before it is parsed, so lines it rejects cost
+    next to nothing. Matching lines wait in a buffer of ``buffer_size``
+    lines; when the consumer falls behind, ``overflow="block"`` stops reading
+    from the websocket until it catches up, while ``overflow="drop_oldest"``
+    keeps only the newest lines and counts the rest in `stats`. Either way
+    memory stays bounded whatever the core's line rate.
+
+    Dropped connections are reopened with ``backoff``; an expired token is
+    renewed first when the client remembers its credentials.
+
+    Iterate with ``async for`` from a coroutine, or with a plain ``for`` loop,
+    which receives on a background thread. Only one iteration may run at a
+    time. Requires the optional ``websockets`` dependency (``pip install
+    sarban[logs]``).
+
+    Parameters:
+        client (``SARBAN | AsyncSARBAN``):
+            Client logged in as a sudo admin
+
+        node_id (``int``, optional):
+            Stream the log of this node instead of the panel's core. Defaults to None.
+
+        interval (``float``, optional):
+            Seconds the panel gathers lines before sending them, None for the
+            panel's default. Defaults to None.
+
+        level (``str``, optional):
+            Lowest level to keep: "debug", "info", "warning" or "error". Defaults to all.
+
+        pattern (``str | Pattern``, optional):
+            Regular expression searched in the raw line. Defaults to None.
+
+        usernames (``Iterable[str]``, optional):
+            Keep only access log lines of these users. Defaults to None.
+
+        buffer_size (``int``, optional):
+            Maximum number of lines waiting for the consumer. Defaults to 10000.
+
+        overflow (``str``, optional):
+            "block" or "drop_oldest", what to do when the buffer is full. Defaults to "block".
+
+        reconnect (``bool``, optional):
+            Whether to reopen lost connections. Defaults to True.
+
+        backoff (`~sarban.retry.RetryPolicy`, optional):
+            Delays between reconnects, from its ``backoff``, ``max_backoff``
+            and ``jitter``. Defaults to 1 s doubling up to 30 s.
+
+        max_reconnects (``int``, optional):
+            Consecutive failed connections after which the stream fails,
+            None to keep trying. Defaults to None.
+
+        ssl (``ssl.SSLContext``, optional):
+            SSL context for wss:// connections. Defaults to the system's.
+
+    Example:
+        ```python
+        logs = CoreLogs(sb, level="warning", overflow="drop_oldest")
+        async for line in logs:
+            print(line.time, line.message)
+        ```
+    """
+
+    BATCH = 256
+
+    def __init__(
+        self,
+        client: Union["sarban.SARBAN", "sarban.AsyncSARBAN"],
+        node_id: Optional[int] = None,
+        interval: Optional[float] = None,
+        level: Optional[str] = None,
+        pattern: Optional[Union[str, Pattern]] = None,
+        usernames: Optional[Iterable[str]] = None,
+        buffer_size: int = 10000,
+        overflow: str = "block",
+        reconnect: bool = True,
+        backoff: Optional[RetryPolicy] = None,
+        max_reconnects: Optional[int] = None,
+        ssl: Any = None
+    ) -> None:
+        if websockets is None:
+            raise ImportError(
+                "CoreLogs requires websockets, install it with `pip install sarban[logs]`"
+            )
+        if level is not None and level.lower() not in LEVELS:
+            raise ValueError(f"level must be one of {', '.join(LEVELS)}")
+        if overflow not in ("block", "drop_oldest"):
+            raise ValueError('overflow must be "block" or "drop_oldest"')
+        if buffer_size < 1:
+            raise ValueError("buffer_size must be positive")
+
+        self.client = client
+        self.node_id = node_id
+        self.interval = interval
+        self.level = level.lower() if level is not None else None
+        self.pattern = re.compile(pattern) if isinstance(pattern, str) else pattern
+        self.usernames = frozenset(usernames) if usernames is not None else None
+        self.buffer_size = buffer_size
+        self.overflow = overflow
+        self.reconnect = reconnect
+        self.backoff = backoff or RetryPolicy(backoff=1, max_backoff=30)
+        self.max_reconnects = max_reconnects
+        self.ssl = ssl
+
+        self.received = 0
+        self.matched = 0
+        self.reconnects = 0
+        self.connected = False
+        self._buffer = None
+        self._loop = None
+        self._task = None
+        self._closed = False
+
+    @property
+    def path(self) -> str:
+        if self.node_id is not None:
+            return f"/api/node/{self.node_id}/logs"
+        return "/api/core/logs"
+
+    def url(self, token: str) -> str:
+        """Websocket URL of the log with ``token``."""
+        scheme, address = self.client.full_address.split("://", 1)
+        query = {"token": token}
+        if self.interval is not None:
+            query["interval"] = self.interval
+        return f"{'wss' if scheme == 'https' else 'ws'}://{address}{self.path}?{urlencode(query)}"
+
+    def stats(self) -> dict:
+        """Counters of the stream: lines received, matched and dropped, and reconnects."""
+        return {
+            "received": self.received,
+            "matched": self.matched,
+            "dropped": self._buffer.dropped if self._buffer is not None else 0,
+            "buffered": len(self._buffer._lines) if self._buffer is not None else 0,
+            "reconnects": self.reconnects,
+            "connected": self.connected,
+        }
+
+    def _accept(self, raw: str) -> Optional[LogLine]:
+        if self.pattern is not None and self.pattern.search(raw) is None:
+            return None
+        if self.usernames is not None and "email: " not in raw:
+            return None
+        line = parse_line(raw)
+        if self.level is not None and LEVELS.get(line.level, 1) < LEVELS[self.level]:
+            return None
+        if self.usernames is not None and line.username not in self.usernames:
+            return None
+        return line
+
+    async def _renew_token(self, used_token: Optional[str]) -> None:
+        client = self.client
+        if client._credentials is None:
+            raise errors.Unauthorized("Logs websocket rejected the token")
+        if asyncio.iscoroutinefunction(client._refresh_token):
+            await client._refresh_token(used_token)
+        else:
+            await asyncio.get_event_loop().run_in_executor(None, client._refresh_token, used_token)
+
+    @staticmethod
+    def _rejection(error: Exception) -> Optional[int]:
+        """Status or close code of a refused connection, None for other failures."""
+        if isinstance(error, websockets.exceptions.ConnectionClosed):
+            code = error.rcvd.code if getattr(error, "rcvd", None) is not None else getattr(error, "code", None)
+            return code if code in (4401, 4403) else None
+        response = getattr(error, "response", None)
+        status = getattr(response, "status_code", None) or getattr(error, "status_code", None)
+        return status if status in (401, 403) else None
+
+    async def _receive(self, buffer: _LineBuffer) -> None:
+        attempt = 0
+        renewed = False
+        while not self._closed:
+            token = self.client.token
+            if token is None:
+                raise errors.Unauthorized("Log in before streaming logs")
+
+            options = {"open_timeout": self.client.timeout, "max_queue": 64}
+            if self.ssl is not None:
+                options["ssl"] = self.ssl
+            error = None
+            try:
+                if self.client._credentials is not None and self.client._token_expiring():
+                    await self._renew_token(token)
+                    token = self.client.token
+                async with websockets.connect(self.url(token), **options) as ws:
+                    self.connected = True
+                    attempt = 0
+                    async for message in ws:
+                        if isinstance(message, bytes):
+                            message = message.decode("utf-8", "replace")
+                        for raw in message.split("\n"):
+                            if not raw:
+                                continue
+                            self.received += 1
+                            line = self._accept(raw)
+                            if line is not None:
+                                self.matched += 1
+                                await buffer.put(line)
+                renewed = False
+            except (OSError, asyncio.TimeoutError, websockets.exceptions.WebSocketException) as e:
+                error = e
+            except errors.HTTPException as e:
+                if e.status_code != 0:
+                    raise
+                error = e
+            finally:
+                self.connected = False
+
+            if self._closed:
+                return
+            if error is not None:
+                rejection = self._rejection(error)
+                if rejection is not None:
+                    if renewed or self.client._credentials is None:
+                        if rejection in (403, 4403) and renewed:
+                            raise errors.Forbidden("Streaming logs requires a sudo admin")
+                        raise errors.Unauthorized("Logs websocket rejected the token")
+                    await self._renew_token(token)
+                    renewed = True
+                    continue
+                logger.warning("Logs websocket of %s failed: %s", self.client.full_address, error)
+
+            if not self.reconnect:
+                if error is not None:
+                    raise errors.HTTPException(0, f"Logs websocket failed: {error}")
+                return
+            attempt += 1
+            if self.max_reconnects is not None and attempt > self.max_reconnects:
+                raise errors.HTTPException(0, f"Logs websocket failed {attempt} times: {error}")
+            self.reconnects += 1
+            await asyncio.sleep(self.backoff.delay(attempt))
+
+    async def _run(self, buffer: _LineBuffer) -> None:
+        error = None
+        try:
+            await self._receive(buffer)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            error = e
+        finally:
+            buffer.finish(error)
+
+    def _start(self) -> _LineBuffer:
+        if self._task is not None and not self._task.done():
+            raise RuntimeError("CoreLogs is already being iterated")
+        self._closed = False
+        self._loop = asyncio.get_event_loop()
+        self._buffer = _LineBuffer(self.buffer_size, self.overflow == "drop_oldest")
+        self._task = self._loop.create_task(self._run(self._buffer))
+        return self._buffer
+
+    async def stream(self) -> AsyncIterator[LogLine]:
+        """Yield matching lines until `close` is called or the stream fails."""
+        buffer = self._start()
+        task = self._task
+        try:
+            while True:
+                batch = await buffer.get_many(self.BATCH)
+                if not batch:
+                    break
+                for line in batch:
+                    yield line
+            if buffer.error is not None:
+                raise buffer.error
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    def __aiter__(self) -> AsyncIterator[LogLine]:
+        return self.stream()
+
+    def __iter__(self) -> Iterator[LogLine]:
+        """Receive on a background thread and yield matching lines in this one."""
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, name="sarban-core-logs", daemon=True)
+        thread.start()
+
+        async def start() -> _LineBuffer:
+            return self._start()
+
+        async def stop() -> None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+        buffer = asyncio.run_coroutine_threadsafe(start(), loop).result()
+        task = self._task
+        try:
+            while True:
+                # Lines cross threads in batches, one hand-off per batch
+                batch = asyncio.run_coroutine_threadsafe(buffer.get_many(self.BATCH), loop).result()
+                if not batch:
+                    break
+                yield from batch
+            if buffer.error is not None:
+                raise buffer.error
+        finally:
+            asyncio.run_coroutine_threadsafe(stop(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+
+    def close(self) -> None:
+        """Stop the stream; the iteration ends once the buffered lines are consumed."""
+        self._closed = True
+        if self._task is not None and self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._task.cancel)
@@ -8,18 +8,20 @@ from sarban.methods.node import Node
 from sarban.methods.system import System
 from sarban.methods.user_template import UserTemplate
 from sarban.methods.subscription import Subscription
+from sarban.methods.bulk import Bulk, BulkResult
 
 
 class Methods(
     Base,
     Login,
-    Inbounds,
     Clients,
+    Inbounds,
     Admin,
     Core,
     Node,
     System,
     UserTemplate,
-    Subscription
+    Subscription,
+    Bulk
 ):
     pass
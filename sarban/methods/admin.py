@@ -1,9 +1,13 @@
 from typing import Any, Optional, List, Dict, Union
 import sarban
 from sarban import errors
+from sarban import models
+from sarban.methods.base import sends
+from sarban.middleware import PanelRequest
 
 
 class Admin:
+    @sends
     def get_current_admin(
         self: "sarban.SARBAN"
     ) -> Dict[str, Any]:
@@ -12,12 +16,9 @@ class Admin:
         Returns:
             `~Dict`: Admin information including username, is_sudo, telegram_id, etc.
         """
-        headers = {
-            'accept': 'application/json',
-            'Authorization': f'Bearer {self.token}'
-        }
+        headers = self._auth_headers()
 
-        response = self.request(
+        response = yield PanelRequest(
             path="admin",
             method="GET",
             headers=headers
@@ -25,6 +26,7 @@ class Admin:
 
         return self.verify_response(response)
 
+    @sends
     def create_admin(
         self: "sarban.SARBAN",
         username: str,
@@ -71,13 +73,9 @@ class Admin:
         if users_usage is not None:
             data["users_usage"] = users_usage
 
-        headers = {
-            'accept': 'application/json',
-            'Authorization': f'Bearer {self.token}',
-            'Content-Type': 'application/json'
-        }
+        headers = self._auth_headers(json_body=True)
 
-        response = self.request(
+        response = yield PanelRequest(
             path="admin",
             method="POST",
             headers=headers,
@@ -86,6 +84,7 @@ class Admin:
 
         return self.verify_response(response)
 
+    @sends
     def modify_admin(
         self: "sarban.SARBAN",
         username: str,
@@ -126,13 +125,9 @@ class Admin:
         if discord_webhook is not None:
             data["discord_webhook"] = discord_webhook
 
-        headers = {
-            'accept': 'application/json',
-            'Authorization': f'Bearer {self.token}',
-            'Content-Type': 'application/json'
-        }
+        headers = self._auth_headers(json_body=True)
 
-        response = self.request(
+        response = yield PanelRequest(
             path=f"admin/{username}",
             method="PUT",
             headers=headers,
@@ -141,6 +136,7 @@ class Admin:
 
         return self.verify_response(response)
 
+    @sends
     def remove_admin(
         self: "sarban.SARBAN",
         username: str
@@ -154,12 +150,9 @@ class Admin:
         Returns:
             `~bool`: True on success.
         """
-        headers = {
-            'accept': 'application/json',
-            'Authorization': f'Bearer {self.token}'
-        }
+        headers = self._auth_headers()
 
-        response = self.request(
+        response = yield PanelRequest(
             path=f"admin/{username}",
             method="DELETE",
             headers=headers
@@ -168,11 +161,13 @@ class Admin:
         self.verify_response(response)
         return True
 
+    @sends
     def get_admins(
         self: "sarban.SARBAN",
         offset: Optional[int] = None,
         limit: Optional[int] = None,
-        username: Optional[str] = None
+        username: Optional[str] = None,
+        typed: bool = False
     ) -> List[Dict[str, Any]]:
         """Fetch a list of admins with optional filters.
 
@@ -186,6 +181,10 @@ class Admin:
             username (``str``, optional):
                 Filter by username
 
+            typed (``bool``, optional):
+                Whether to return `~sarban.models.Admin` objects instead of
+                dicts. Defaults to False.
+
         Returns:
             `~List[Dict]`: List of admin information.
         """
@@ -197,20 +196,19 @@ class Admin:
         if username is not None:
             params["username"] = username
 
-        headers = {
-            'accept': 'application/json',
-            'Authorization': f'Bearer {self.token}'
-        }
+        headers = self._auth_headers()
 
-        response = self.request(
+        response = yield PanelRequest(
             path="admins",
             method="GET",
             headers=headers,
             params=params if params else None
         )
 
-        return self.verify_response(response)
+        admins = self.verify_response(response)
+        return [models.Admin.from_dict(admin) for admin in admins] if typed else admins
 
+    @sends
     def disable_all_active_users(
         self: "sarban.SARBAN",
         username: str
@@ -224,12 +222,9 @@ class Admin:
         Returns:
             `~bool`: True on success.
         """
-        headers = {
-            'accept': 'application/json',
-            'Authorization': f'Bearer {self.token}'
-        }
+        headers = self._auth_headers()
 
-        response = self.request(
+        response = yield PanelRequest(
             path=f"admin/{username}/users/disable",
             method="POST",
             headers=headers
@@ -238,6 +233,7 @@ class Admin:
         self.verify_response(response)
         return True
 
+    @sends
     def activate_all_disabled_users(
         self: "sarban.SARBAN",
         username: str
@@ -251,12 +247,9 @@ class Admin:
         Returns:
             `~bool`: True on success.
         """
-        headers = {
-            'accept': 'application/json',
-            'Authorization': f'Bearer {self.token}'
-        }
+        headers = self._auth_headers()
 
-        response = self.request(
+        response = yield PanelRequest(
             path=f"admin/{username}/users/activate",
             method="POST",
             headers=headers
@@ -265,6 +258,7 @@ class Admin:
         self.verify_response(response)
         return True
 
+    @sends
     def reset_admin_usage(
         self: "sarban.SARBAN",
         username: str
@@ -278,12 +272,9 @@ class Admin:
         Returns:
             `~Dict`: Updated admin information.
         """
-        headers = {
-            'accept': 'application/json',
-            'Authorization': f'Bearer {self.token}'
-        }
+        headers = self._auth_headers()
 
-        response = self.request(
+        response = yield PanelRequest(
             path=f"admin/usage/reset/{username}",
             method="POST",
             headers=headers
@@ -291,6 +282,7 @@ class Admin:
 
         return self.verify_response(response)
 
+    @sends
     def get_admin_usage(
         self: "sarban.SARBAN",
         username: str
@@ -304,12 +296,9 @@ class Admin:
         Returns:
             `~int`: Admin usage in bytes.
         """
-        headers = {
-            'accept': 'application/json',
-            'Authorization': f'Bearer {self.token}'
-        }
+        headers = self._auth_headers()
 
-        response = self.request(
+        response = yield PanelRequest(
             path=f"admin/usage/{username}",
             method="GET",
             headers=headers
@@ -1,25 +1,351 @@
+import functools
 import requests
-import json
-from typing import Any, Optional, Dict, Union
+import threading
+import time
+from typing import Any, Callable, Generator, Optional, Dict, Tuple, Union
+
+try:
+    from orjson import loads as _loads
+except ImportError:
+    from json import loads as _loads
 
 import sarban
 from sarban import errors
+from sarban.middleware import PanelRequest, compose
+
+
+# Exception raised for each error status code, built with the response detail
+ERRORS = {
+    400: errors.BadRequest,
+    401: errors.Unauthorized,
+    403: errors.Forbidden,
+    404: errors.NotFound,
+    409: errors.Conflict,
+    422: errors.ValidationError,
+}
+
+
+def _error_detail(data: Any) -> Optional[str]:
+    """Extract a readable message from a FastAPI error body."""
+    if not isinstance(data, dict) or 'detail' not in data:
+        return None
+    detail = data['detail']
+    if isinstance(detail, list):
+        if detail and isinstance(detail[0], dict) and 'msg' in detail[0]:
+            return detail[0]['msg']
+        return str(detail) if detail else None
+    return detail if isinstance(detail, str) else str(detail)
+
+
+def _body_size(body: Optional[Union[bytes, str]]) -> int:
+    if not body:
+        return 0
+    return len(body.encode()) if isinstance(body, str) else len(body)
+
+
+def sends(func: Callable[..., Generator[PanelRequest, Any, Any]]) -> Callable[..., Any]:
+    """Make a client method out of request steps.
+
+    ``func`` is a generator: it yields each `PanelRequest` it needs, receives
+    the response and returns the method's result. The decorated method runs
+    it with blocking requests on `SARBAN`; `AsyncSARBAN` runs the same steps,
+    kept as ``method.steps``, with awaited ones. Building requests and reading
+    responses is therefore written once for both clients and runs once per call.
+    """
+    @functools.wraps(func)
+    def method(self, *args, **kwargs) -> Any:
+        return self._run_steps(func(self, *args, **kwargs))
+
+    method.steps = func
+    return method
 
 
 class Base:
+    # Whether middleware is awaited (AsyncSARBAN) or called
+    _ASYNC = False
+
+    def _auth_headers(
+        self: "sarban.SARBAN",
+        json_body: bool = False
+    ) -> dict:
+        """Return the precomputed headers of an authenticated request.
+
+        The dicts are shared between calls and rebuilt only when the token
+        changes, so callers must copy them before adding headers.
+
+        Parameters:
+            json_body (``bool``, optional):
+                Whether to include the JSON Content-Type header. Defaults to False.
+        """
+        cached = self._headers
+        if cached is None or cached[0] != self.token:
+            plain = {
+                'accept': 'application/json',
+                'Authorization': f'Bearer {self.token}'
+            }
+            cached = self._headers = (
+                self.token,
+                plain,
+                {**plain, 'Content-Type': 'application/json'}
+            )
+        return cached[2] if json_body else cached[1]
+
+    def _build_request(
+        self: "sarban.SARBAN",
+        path: str,
+        method: str,
+        headers: dict,
+        data: Optional[Union[dict, str]] = None,
+        params: Optional[dict] = None,
+        prefix: str = "api"
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Build the URL and keyword arguments of a request.
+
+        Shared by the sync and async clients so both send exactly the same
+        requests; only the transport differs.
+
+        Returns:
+            `~Tuple[str, Dict]`: The URL and the ``headers``/``params``/``json``/``data``
+            keyword arguments for the HTTP client.
+        """
+        if method not in ("GET", "POST", "PUT", "DELETE"):
+            raise ValueError(f"Unsupported HTTP method: {method}")
+
+        base_url = self._base_urls.get(prefix)
+        if base_url is None:
+            base_url = f"{self.full_address}/{prefix}/"
+        url = base_url + path
+        kwargs = {
+            "headers": headers,
+            "params": params
+        }
+        if method == "POST" and (
+            isinstance(data, str) or (isinstance(data, dict) and "admin/token" in path)
+        ):
+            kwargs["data"] = data
+        elif method in ("POST", "PUT"):
+            kwargs["json"] = data
+
+        return url, kwargs
+
+    def _transport_settings(self: "sarban.SARBAN") -> Dict[str, Any]:
+        """Proxy, CA bundle, client certificate and streaming settings of the session.
+
+        Resolving them from the environment dominates the cost of a call, and
+        they only depend on the panel host and the session, so they are cached
+        and resolved again whenever ``session.verify``, ``proxies``, ``cert``,
+        ``stream`` or ``trust_env`` change. Proxy and CA bundle environment
+        variables are read when the settings are resolved.
+        """
+        session = self.session
+        key = (
+            self.https,
+            session.trust_env,
+            session.verify,
+            session.cert,
+            session.stream,
+            tuple(sorted(session.proxies.items()))
+        )
+        if key != self._send_settings_key:
+            self._send_settings = session.merge_environment_settings(
+                self.full_address, {}, None, None if self.https else False, None
+            )
+            self._send_settings_key = key
+        return self._send_settings
+
+    def _send(
+        self: "sarban.SARBAN",
+        path: str,
+        method: str,
+        headers: dict,
+        data: Optional[Union[dict, str]] = None,
+        params: Optional[dict] = None,
+        prefix: str = "api"
+    ) -> requests.Response:
+        """Send one request over the pooled session.
+
+        Apart from waiting for the client's `Governor` and recording the
+        attempt in its `Metrics`, if any, no client-side logic (cache, retries,
+        token refresh) is applied here.
+        """
+        url, kwargs = self._build_request(path, method, headers, data, params, prefix)
+
+        session = self.session
+        metrics = self.metrics
+        prepared = None
+        slot = self.governor.acquire(path, prefix) if self.governor is not None else None
+        start = time.perf_counter() if metrics is not None else 0.0
+        try:
+            prepared = session.prepare_request(requests.Request(method, url, **kwargs))
+            response = session.send(prepared, timeout=self.timeout, **self._transport_settings())
+        except requests.exceptions.RequestException as e:
+            if metrics is not None:
+                metrics.observe_error(
+                    method, path, prefix, e, time.perf_counter() - start,
+                    _body_size(prepared.body) if prepared is not None else 0
+                )
+            raise errors.HTTPException(0, f"Request failed: {str(e)}")
+        finally:
+            if slot is not None:
+                self.governor.release(slot)
+
+        if metrics is not None:
+            metrics.observe(
+                method, path, prefix, response.status_code, time.perf_counter() - start,
+                _body_size(prepared.body), len(response.content)
+            )
+        return response
+
+    def _send_retrying(
+        self: "sarban.SARBAN",
+        path: str,
+        method: str,
+        headers: dict,
+        data: Optional[Union[dict, str]],
+        params: Optional[dict],
+        prefix: str,
+        idempotent: Optional[bool],
+        conflict_check: Optional[str]
+    ) -> requests.Response:
+        """Send a request, retrying transient failures as allowed by the retry policy."""
+        policy = self.retry
+        if policy is None or not (
+            conflict_check or policy.is_idempotent(method, path, idempotent)
+        ):
+            return self._send(path, method, headers, data, params, prefix)
+
+        attempt = 0
+        unknown = False
+        while True:
+            try:
+                response = self._send(path, method, headers, data, params, prefix)
+            except errors.HTTPException as e:
+                if e.status_code != 0 or attempt >= policy.retries:
+                    raise
+                response = None
+            else:
+                if unknown and conflict_check and response.status_code == 409:
+                    return self._send(conflict_check, "GET", headers, prefix=prefix)
+                if attempt >= policy.retries or not policy.is_retryable(response):
+                    return response
+
+            unknown = unknown or policy.is_outcome_unknown(response)
+            attempt += 1
+            if self.metrics is not None:
+                self.metrics.observe_retry(method, path, prefix)
+            time.sleep(policy.delay(attempt, response))
+
+    def _subscription_request(
+        self: "sarban.SARBAN",
+        path: str,
+        headers: dict,
+        params: Optional[dict]
+    ) -> requests.Response:
+        """Serve a subscription content from the subscription cache, revalidating it as needed."""
+        cache = self.subscription_cache
+        key = cache.key(path, params, headers)
+        entry, fresh = cache.get(key)
+        if self.metrics is not None and (fresh or (entry is not None and cache.stale_while_revalidate)):
+            self.metrics.observe_cache_hit("GET", path, "sub")
+        if fresh:
+            return entry.response
+        if entry is not None and cache.stale_while_revalidate:
+            if cache.begin_revalidation(key):
+                threading.Thread(
+                    target=self._revalidate_subscription,
+                    args=(key, entry, path, headers, params, True),
+                    daemon=True
+                ).start()
+            return entry.response
+        return self._revalidate_subscription(key, entry, path, headers, params)
+
+    def _revalidate_subscription(
+        self: "sarban.SARBAN",
+        key: Tuple,
+        entry: Any,
+        path: str,
+        headers: dict,
+        params: Optional[dict],
+        background: bool = False
+    ) -> Optional[requests.Response]:
+        cache = self.subscription_cache
+        try:
+            response = self._send_retrying(
+                path, "GET", cache.conditional(headers, entry), None, params, "sub", None, None
+            )
+            return cache.update(key, response, entry)
+        except errors.HTTPException:
+            if not background:
+                raise
+            # The stale content keeps being served; the next call tries again.
+            return None
+        finally:
+            if background:
+                cache.end_revalidation(key)
+
+    def use(self: "sarban.SARBAN", *middleware: Any) -> None:
+        """Append middleware to the client's request chain.
+
+        The first middleware added is the outermost one. See
+        `~sarban.middleware.Middleware`.
+
+        Parameters:
+            *middleware (`~sarban.middleware.Middleware` | ``Callable``):
+                Middleware objects or functions ``(request, call_next) -> response``
+        """
+        self.middleware.extend(middleware)
+        self._chain = compose(self.middleware, self._request_from, self._ASYNC)
+
+    def _request_from(self: "sarban.SARBAN", request: PanelRequest) -> requests.Response:
+        """Innermost link of the middleware chain."""
+        return self._request(
+            request.path, request.method, request.headers, request.data, request.params,
+            request.prefix, request.idempotent, request.conflict_check
+        )
+
+    def _run_steps(self: "sarban.SARBAN", steps: Generator[PanelRequest, Any, Any]) -> Any:
+        """Send the requests yielded by the steps of a `sends` method and return its result."""
+        response = error = None
+        while True:
+            try:
+                request = steps.send(response) if error is None else steps.throw(error)
+            except StopIteration as stop:
+                return stop.value
+            try:
+                chain = self._chain
+                response = chain(request) if chain is not None else self._request_from(request)
+                error = None
+            except Exception as e:
+                response, error = None, e
+
     def request(
         self: "sarban.SARBAN",
         path: str,
         method: str,
         headers: dict,
         data: Optional[Union[dict, str]] = None,
-        params: Optional[dict] = None
+        params: Optional[dict] = None,
+        prefix: str = "api",
+        idempotent: Optional[bool] = None,
+        conflict_check: Optional[str] = None
     ) -> requests.Response:
         """Request to the Marzban API.
 
+        Requests go through the client's pooled session, so connections to the
+        panel are kept alive and reused between calls. When the client has a
+        response cache, cacheable GET requests are answered from it and writes
+        invalidate the entries they affect. When the login credentials are
+        remembered, the token is refreshed shortly before it expires and a
+        request rejected with 401 is replayed once with a fresh token.
+        Transient failures are retried according to the client's `RetryPolicy`.
+        Subscription contents are served through the client's
+        `SubscriptionCache`, if any, with conditional revalidation. When the
+        client has `Metrics`, every attempt, retry and cache hit is recorded.
+        Middleware added with `use` wraps all of the above.
+
         Parameters:
             path (``str``):
-                The request path relative to /api/
+                The request path relative to /{prefix}/
                 
             method (``str``):
                 The HTTP method (GET, POST, PUT, DELETE)
@@ -33,71 +359,94 @@ class Base:
             params (``dict``, optional):
                 Query parameters for GET requests
 
+            prefix (``str``, optional):
+                Root segment of the URL, "api" for the REST API and "sub"
+                for subscription endpoints. Defaults to "api".
+
+            idempotent (``bool``, optional):
+                Whether the request may safely be sent more than once. Defaults
+                to the retry policy's choice for the method and path.
+
+            conflict_check (``str``, optional):
+                Path of the entity a POST creates. It makes the POST retryable:
+                when a retried attempt answers 409 after an earlier attempt
+                whose outcome is unknown (the connection dropped or timed out),
+                that attempt may have succeeded already, so the entity is
+                fetched from this path and that response is returned instead.
+                A 409 after definite error responses is returned as is.
+
         Returns:
             `~requests.Response`: The HTTP response object.
         """
-        url = f"{self.full_address}/api/{path}"
+        chain = self._chain
+        if chain is not None:
+            return chain(PanelRequest(method, path, headers, data, params, prefix, idempotent, conflict_check))
+        return self._request(path, method, headers, data, params, prefix, idempotent, conflict_check)
 
-        try:
-            if method == "GET":
-                response = requests.get(
-                    url, 
-                    headers=headers, 
-                    params=params,
-                    verify=self.https,
-                    timeout=30
-                )
-            elif method == "POST":
-                if isinstance(data, str) or (isinstance(data, dict) and "admin/token" in path):
-                    response = requests.post(
-                        url, 
-                        headers=headers, 
-                        data=data, 
-                        verify=self.https,
-                        timeout=30
-                    )
-                else:
-                    response = requests.post(
-                        url, 
-                        headers=headers, 
-                        json=data, 
-                        verify=self.https,
-                        timeout=30
-                    )
-            elif method == "PUT":
-                response = requests.put(
-                    url, 
-                    headers=headers, 
-                    json=data, 
-                    verify=self.https,
-                    timeout=30
-                )
-            elif method == "DELETE":
-                response = requests.delete(
-                    url, 
-                    headers=headers, 
-                    verify=self.https,
-                    timeout=30
-                )
-            else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
+    def _request(
+        self: "sarban.SARBAN",
+        path: str,
+        method: str,
+        headers: dict,
+        data: Optional[Union[dict, str]],
+        params: Optional[dict],
+        prefix: str,
+        idempotent: Optional[bool],
+        conflict_check: Optional[str]
+    ) -> requests.Response:
+        """`request` without the middleware chain."""
+        if prefix == "sub" and self.subscription_cache is not None and \
+                self.subscription_cache.cacheable(method, path):
+            return self._subscription_request(path, headers, params)
 
-            return response
-        except requests.exceptions.RequestException as e:
-            raise errors.HTTPException(0, f"Request failed: {str(e)}")
+        cache = self.cache if prefix == "api" else None
+        if cache is not None:
+            cached = cache.get(method, path, params)
+            if cached is not None:
+                if self.metrics is not None:
+                    self.metrics.observe_cache_hit(method, path, prefix)
+                return cached
+            generation = cache.generation
+
+        refresh = self._credentials is not None and prefix == "api" and path != "admin/token"
+        if refresh and self._token_expiring():
+            self._refresh_token(self.token)
+
+        token = self.token
+        response = self._send_retrying(
+            path, method, self._with_token(headers), data, params, prefix, idempotent, conflict_check
+        )
+        if refresh and response.status_code == 401:
+            self._refresh_token(token)
+            response = self._send_retrying(
+                path, method, self._with_token(headers), data, params, prefix, idempotent, conflict_check
+            )
+
+        if cache is not None:
+            cache.update(method, path, params, response, generation)
+        return response
 
     def verify_response(
         self: "sarban.SARBAN",
-        response: requests.Response
+        response: requests.Response,
+        decode: bool = True
     ) -> Any:
         """Verify and parse API response.
 
+        The body is decoded at most once, with orjson when it is installed.
+
         Parameters:
             response (``requests.Response``):
                 The HTTP response object
 
+            decode (``bool``, optional):
+                Whether to decode a successful body. When False the raw bytes
+                are returned so the caller can decode (or forward) them itself.
+                Defaults to True.
+
         Returns:
-            `~Any`: Parsed JSON response on success.
+            `~Any`: Parsed JSON response on success, the text of non-JSON
+            responses, {} for an empty body, or the raw bytes if ``decode`` is False.
 
         Raises:
             `~errors.Unauthorized`: If status code is 401
@@ -106,84 +455,34 @@ class Base:
             `~errors.Conflict`: If status code is 409
             `~errors.BadRequest`: If status code is 400
             `~errors.ValidationError`: If status code is 422
-            `~errors.HTTPException`: For other HTTP errors
+            `~errors.HTTPException`: For other HTTP errors or an undecodable JSON body
         """
-        content_type = response.headers.get('Content-Type', '')
-        
-        if response.status_code == 200:
-            if 'application/json' in content_type:
-                try:
-                    return response.json()
-                except json.JSONDecodeError:
-                    return {}
-            return {}
-        
-        if response.status_code == 401:
-            error_detail = "Not authenticated"
-            if 'application/json' in content_type:
-                try:
-                    error_data = response.json()
-                    error_detail = error_data.get('detail', error_detail)
-                except json.JSONDecodeError:
-                    pass
-            raise errors.Unauthorized(error_detail)
-        
-        if response.status_code == 403:
-            error_detail = "You are not allowed to perform this action"
-            if 'application/json' in content_type:
-                try:
-                    error_data = response.json()
-                    error_detail = error_data.get('detail', error_detail)
-                except json.JSONDecodeError:
-                    pass
-            raise errors.Forbidden(error_detail)
-        
-        if response.status_code == 404:
-            error_detail = "Entity not found"
-            if 'application/json' in content_type:
-                try:
-                    error_data = response.json()
-                    error_detail = error_data.get('detail', error_detail)
-                except json.JSONDecodeError:
-                    pass
-            raise errors.NotFound(error_detail)
-        
-        if response.status_code == 409:
-            error_detail = "Entity already exists"
-            if 'application/json' in content_type:
-                try:
-                    error_data = response.json()
-                    error_detail = error_data.get('detail', error_detail)
-                except json.JSONDecodeError:
-                    pass
-            raise errors.Conflict(error_detail)
-        
-        if response.status_code == 400:
-            error_detail = "Bad request"
-            if 'application/json' in content_type:
-                try:
-                    error_data = response.json()
-                    error_detail = error_data.get('detail', error_detail)
-                except json.JSONDecodeError:
-                    pass
-            raise errors.BadRequest(error_detail)
-        
-        if response.status_code == 422:
-            error_detail = "Validation error"
-            if 'application/json' in content_type:
-                try:
-                    error_data = response.json()
-                    if 'detail' in error_data:
-                        detail = error_data['detail']
-                        if isinstance(detail, list) and len(detail) > 0:
-                            error_detail = detail[0].get('msg', error_detail)
-                        else:
-                            error_detail = str(detail)
-                except (json.JSONDecodeError, (KeyError, IndexError)):
-                    pass
-            raise errors.ValidationError(error_detail)
-        
-        raise errors.HTTPException(
-            response.status_code,
-            f"HTTP {response.status_code} error occurred"
-        )
\ No newline at end of file
+        status_code = response.status_code
+
+        if 200 <= status_code < 300:
+            content = response.content
+            if not decode:
+                return content
+            if not content:
+                return {}
+            if 'application/json' not in response.headers.get('Content-Type', ''):
+                return response.text
+            try:
+                return _loads(content)
+            except ValueError:
+                raise errors.HTTPException(status_code, "Invalid JSON in response body")
+
+        exception = ERRORS.get(status_code)
+        if exception is None:
+            raise errors.HTTPException(
+                status_code,
+                f"HTTP {status_code} error occurred"
+            )
+
+        detail = None
+        if 'application/json' in response.headers.get('Content-Type', ''):
+            try:
+                detail = _error_detail(_loads(response.content))
+            except ValueError:
+                pass
+        raise exception(detail)
@@ -0,0 +1,174 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+import sarban
+from sarban import errors
+from sarban.ratelimit import RateLimiter
+
+
+class BulkResult:
+    """Outcome of one item of a bulk operation.
+
+    Attributes:
+        item (``Any``):
+            The spec or username the operation was run for
+
+        result (``Any``):
+            Value returned by the underlying method, None on failure
+
+        error (`~errors.Exceptions`):
+            Error raised by the underlying method, None on success
+    """
+
+    __slots__ = ("item", "result", "error")
+
+    def __init__(self, item: Any, result: Any = None, error: Optional[errors.Exceptions] = None) -> None:
+        self.item = item
+        self.result = result
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def __repr__(self) -> str:
+        if self.ok:
+            return f"BulkResult(item={self.item!r}, result={self.result!r})"
+        return f"BulkResult(item={self.item!r}, error={self.error!r})"
+
+
+class Bulk:
+    def _run_bulk(
+        self: "sarban.SARBAN",
+        call: Callable[[Any], Any],
+        items: Iterable[Any],
+        concurrency: int,
+        rate_limit: Optional[float]
+    ) -> Iterator[BulkResult]:
+        """Run ``call`` for every item on a thread pool and yield results as they complete.
+
+        At most ``concurrency`` items are in flight at once and ``items`` is
+        consumed lazily, so arbitrarily large generators can be passed in.
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+
+        limiter = RateLimiter(rate_limit, concurrency) if rate_limit else None
+
+        def run(item: Any) -> BulkResult:
+            if limiter:
+                limiter.acquire()
+            try:
+                return BulkResult(item, result=call(item))
+            except errors.Exceptions as e:
+                return BulkResult(item, error=e)
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            pending = set()
+            for item in items:
+                if len(pending) >= concurrency:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+                pending.add(executor.submit(run, item))
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+    def add_clients_bulk(
+        self: "sarban.SARBAN",
+        specs: Iterable[Dict[str, Any]],
+        concurrency: int = 8,
+        rate_limit: Optional[float] = None
+    ) -> Iterator[BulkResult]:
+        """Create many clients concurrently.
+
+        Results are yielded as each client is created; a failing item (e.g. an
+        `~errors.Conflict`) is reported in its result and does not stop the others.
+
+        Parameters:
+            specs (``Iterable[Dict]``):
+                Keyword arguments of `add_client` for every client
+
+            concurrency (``int``, optional):
+                Maximum number of requests in flight. Keep it at or below the
+                client's ``pool_maxsize``. Defaults to 8.
+
+            rate_limit (``float``, optional):
+                Maximum number of requests per second. Defaults to no limit.
+
+        Returns:
+            `~Iterator[BulkResult]`: One result per spec, in completion order.
+        """
+        return self._run_bulk(lambda spec: self.add_client(**spec), specs, concurrency, rate_limit)
+
+    def edit_clients_bulk(
+        self: "sarban.SARBAN",
+        specs: Iterable[Dict[str, Any]],
+        concurrency: int = 8,
+        rate_limit: Optional[float] = None
+    ) -> Iterator[BulkResult]:
+        """Edit many clients concurrently.
+
+        Parameters:
+            specs (``Iterable[Dict]``):
+                Keyword arguments of `edit_client` for every client
+
+            concurrency (``int``, optional):
+                Maximum number of requests in flight. Defaults to 8.
+
+            rate_limit (``float``, optional):
+                Maximum number of requests per second. Defaults to no limit.
+
+        Returns:
+            `~Iterator[BulkResult]`: One result per spec, in completion order.
+        """
+        return self._run_bulk(lambda spec: self.edit_client(**spec), specs, concurrency, rate_limit)
+
+    def delete_clients_bulk(
+        self: "sarban.SARBAN",
+        usernames: Iterable[str],
+        concurrency: int = 8,
+        rate_limit: Optional[float] = None
+    ) -> Iterator[BulkResult]:
+        """Delete many clients concurrently.
+
+        Parameters:
+            usernames (``Iterable[str]``):
+                Usernames of the clients
+
+            concurrency (``int``, optional):
+                Maximum number of requests in flight. Defaults to 8.
+
+            rate_limit (``float``, optional):
+                Maximum number of requests per second. Defaults to no limit.
+
+        Returns:
+            `~Iterator[BulkResult]`: One result per username, in completion order.
+        """
+        return self._run_bulk(self.delete_client, usernames, concurrency, rate_limit)
+
+    def reset_user_data_usage_bulk(
+        self: "sarban.SARBAN",
+        usernames: Iterable[str],
+        concurrency: int = 8,
+        rate_limit: Optional[float] = None
+    ) -> Iterator[BulkResult]:
+        """Reset data usage of many clients concurrently.
+
+        Parameters:
+            usernames (``Iterable[str]``):
+                Usernames of the clients
+
+            concurrency (``int``, optional):
+                Maximum number of requests in flight. Defaults to 8.
+
+            rate_limit (``float``, optional):
+                Maximum number of requests per second. Defaults to no limit.
+
+        Returns:
+            `~Iterator[BulkResult]`: One result per username, in completion order.
+        """
+        return self._run_bulk(self.reset_user_data_usage, usernames, concurrency, rate_limit)
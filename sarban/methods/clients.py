@@ -1,10 +1,20 @@
 import json
-from typing import Union
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional, Union
 import time, uuid
 
 
 import sarban
 from sarban import errors
+from sarban.models import UserResponse, UsersResponse
+from sarban.methods.base import sends
+from sarban.middleware import PanelRequest
+
+
+USER_STATUSES = ("active", "disabled", "limited", "expired", "on_hold")
+USER_SORT_FIELDS = ("username", "used_traffic", "data_limit", "expire", "created_at")
+
 
 class Clients:
     def __UUIDgen() -> str:
@@ -13,17 +23,22 @@ class Clients:
 
         return generated_uuid
 
+    @sends
     def get_client(
         self: "sarban.SARBAN",
         username: str,
-    ) -> Union[dict, errors.NotFound]:
+        typed: bool = False
+    ) -> Union[dict, UserResponse, errors.NotFound]:
         """Get client from the existing inbound.
 
         Parameters:
             username (``str``):
                username of the client
 
-            
+            typed (``bool``, optional):
+                Whether to return a `~sarban.models.UserResponse` instead of
+                a dict. Defaults to False.
+
         Returns:
             `~Dict`: On success, a dict is returned or else 404 an error will be raised
         """
@@ -39,19 +54,18 @@ class Clients:
         #=======================================
 
 
-        headers = {
-            'accept': 'application/json',
-            'Authorization': f'Bearer {self.token}'
-        }
+        headers = self._auth_headers()
 
-        response = self.request(
+        response = yield PanelRequest(
             path=f"user/{username}",
             method="GET",
             headers=headers
         )
 
-        return self.verify_response(response)
+        user = self.verify_response(response)
+        return UserResponse.from_dict(user) if typed else user
 
+    @sends
     def get_client_by_subLink(
         self: "sarban.SARBAN",
         token: str,
@@ -66,19 +80,15 @@ class Clients:
         Returns:
             `~Dict`: On success, a dict is returned or else 404 an error will be raised
         """
-        import requests
-        
         headers = {
             'accept': 'application/json',
         }
 
-        url = f"{self.full_address}/sub/{token}/info"
-        
-        response = requests.get(
-            url,
+        response = yield PanelRequest(
+            path=f"{token}/info",
+            method="GET",
             headers=headers,
-            verify=self.https,
-            timeout=30
+            prefix="sub"
         )
         
         if response.status_code == 200:
@@ -86,6 +96,7 @@ class Clients:
         else:
             raise errors.NotFound()
 
+    @sends
     def add_client(
         self: "sarban.SARBAN",
         username: str,
@@ -142,22 +153,20 @@ class Clients:
         "note": note
         }
 
-        headers = {
-            'accept': 'application/json',
-            'Authorization': f'Bearer {self.token}',
-            'Content-Type': 'application/json'
-        }
+        headers = self._auth_headers(json_body=True)
 
 
-        response = self.request(
+        response = yield PanelRequest(
             path="user",
             method="POST",
             data=data,
-            headers= headers
+            headers= headers,
+            conflict_check=f"user/{username}"
         )
 
         return self.verify_response(response)
 
+    @sends
     def delete_client(
         self: "sarban.SARBAN",
         username: str,
@@ -172,13 +181,10 @@ class Clients:
             `~Dict`: On success, a dict is returned else 404 error will be raised
         """
 
-        headers = {
-            'accept': 'application/json',
-            'Authorization': f'Bearer {self.token}'
-        }
+        headers = self._auth_headers()
         
 
-        response = self.request(
+        response = yield PanelRequest(
             path=f"user/{username}",
             method="DELETE",
             headers=headers
@@ -186,6 +192,7 @@ class Clients:
 
         return self.verify_response(response)
 
+    @sends
     def edit_client(
         self: "sarban.SARBAN",
         username: str,
@@ -225,11 +232,7 @@ class Clients:
         """
 
 
-        headers = {
-            'accept': 'application/json',
-            'Authorization': f'Bearer {self.token}',
-            'Content-Type': 'application/json'
-        }
+        headers = self._auth_headers(json_body=True)
         data = {}
 
 
@@ -274,7 +277,7 @@ class Clients:
             data.update(new)
 
 
-        response = self.request(
+        response = yield PanelRequest(
             path=f"user/{username}",
             method="PUT",
             headers=headers,
@@ -283,6 +286,7 @@ class Clients:
 
         return self.verify_response(response)
 
+    @sends
     def reset_user_data_usage(
         self: "sarban.SARBAN",
         username: str
@@ -296,12 +300,9 @@ class Clients:
         Returns:
             `~Dict`: Updated user information.
         """
-        headers = {
-            'accept': 'application/json',
-            'Authorization': f'Bearer {self.token}'
-        }
+        headers = self._auth_headers()
 
-        response = self.request(
+        response = yield PanelRequest(
             path=f"user/{username}/reset",
             method="POST",
             headers=headers
@@ -309,6 +310,7 @@ class Clients:
 
         return self.verify_response(response)
 
+    @sends
     def revoke_user_subscription(
         self: "sarban.SARBAN",
         username: str
@@ -322,12 +324,9 @@ class Clients:
         Returns:
             `~Dict`: Updated user information.
         """
-        headers = {
-            'accept': 'application/json',
-            'Authorization': f'Bearer {self.token}'
-        }
+        headers = self._auth_headers()
 
-        response = self.request(
+        response = yield PanelRequest(
             path=f"user/{username}/revoke_sub",
             method="POST",
             headers=headers
@@ -335,6 +334,7 @@ class Clients:
 
         return self.verify_response(response)
 
+    @sends
     def get_user_usage(
         self: "sarban.SARBAN",
         username: str,
@@ -362,12 +362,9 @@ class Clients:
         if end:
             params["end"] = end
 
-        headers = {
-            'accept': 'application/json',
-            'Authorization': f'Bearer {self.token}'
-        }
+        headers = self._auth_headers()
 
-        response = self.request(
+        response = yield PanelRequest(
             path=f"user/{username}/usage",
             method="GET",
             headers=headers,
@@ -376,6 +373,7 @@ class Clients:
 
         return self.verify_response(response)
 
+    @sends
     def active_next_plan(
         self: "sarban.SARBAN",
         username: str
@@ -389,12 +387,9 @@ class Clients:
         Returns:
             `~Dict`: Updated user information.
         """
-        headers = {
-            'accept': 'application/json',
-            'Authorization': f'Bearer {self.token}'
-        }
+        headers = self._auth_headers()
 
-        response = self.request(
+        response = yield PanelRequest(
             path=f"user/{username}/active-next",
             method="POST",
             headers=headers
@@ -402,6 +397,7 @@ class Clients:
 
         return self.verify_response(response)
 
+    @sends
     def set_owner(
         self: "sarban.SARBAN",
         username: str,
@@ -421,12 +417,9 @@ class Clients:
         """
         params = {"admin_username": admin_username}
 
-        headers = {
-            'accept': 'application/json',
-            'Authorization': f'Bearer {self.token}'
-        }
+        headers = self._auth_headers()
 
-        response = self.request(
+        response = yield PanelRequest(
             path=f"user/{username}/set-owner",
             method="PUT",
             headers=headers,
@@ -435,73 +428,156 @@ class Clients:
 
         return self.verify_response(response)
 
+    @sends
     def get_users(
         self: "sarban.SARBAN",
-        offset: int = None,
-        limit: int = None,
-        username: list = None,
-        search: str = None,
-        admin: list = None,
-        status: str = None,
-        sort: str = None
-    ) -> Union[dict, errors.NotFound]:
-        """Get all users with optional filters.
+        offset: Optional[int] = None,
+        limit: Optional[int] = None,
+        username: Optional[Union[str, List[str]]] = None,
+        search: Optional[str] = None,
+        admin: Optional[Union[str, List[str]]] = None,
+        status: Optional[str] = None,
+        sort: Optional[str] = None,
+        typed: bool = False
+    ) -> Union[dict, UsersResponse, errors.NotFound]:
+        """Get users with optional server-side filters and pagination.
 
         Parameters:
             offset (``int``, optional):
                 Pagination offset
                 
             limit (``int``, optional):
-                Maximum number of results
+                Maximum number of results. Without it the panel returns every
+                matching user in one response; prefer `iter_users` for large panels.
+                Calling `get_users` without any argument is deprecated.
                 
-            username (``list``, optional):
+            username (``str | list``, optional):
                 Filter by usernames
                 
             search (``str``, optional):
                 Search query
                 
-            admin (``list``, optional):
+            admin (``str | list``, optional):
                 Filter by admin usernames
                 
             status (``str``, optional):
                 Filter by status (active, disabled, limited, expired, on_hold)
                 
             sort (``str``, optional):
-                Sort field
+                Comma separated sort fields (username, used_traffic, data_limit,
+                expire, created_at), prefixed with "-" for descending order
+
+            typed (``bool``, optional):
+                Whether to return a `~sarban.models.UsersResponse` holding
+                `~sarban.models.UserResponse` objects instead of dicts, which
+                takes much less memory on large lists. Defaults to False.
 
         Returns:
             `~Dict`: Users response with users list and total count.
+
+        Raises:
+            `~ValueError`: If status or sort is not supported by the panel
         """
+        if status is not None and status not in USER_STATUSES:
+            raise ValueError(f"Unsupported user status: {status}")
+        if sort is not None:
+            for field in sort.split(","):
+                if field.strip().lstrip("-") not in USER_SORT_FIELDS:
+                    raise ValueError(f"Unsupported sort field: {field}")
+
         params = {}
         if offset is not None:
             params["offset"] = offset
         if limit is not None:
             params["limit"] = limit
         if username is not None:
-            params["username"] = username
+            params["username"] = [username] if isinstance(username, str) else username
         if search is not None:
             params["search"] = search
         if admin is not None:
-            params["admin"] = admin
+            params["admin"] = [admin] if isinstance(admin, str) else admin
         if status is not None:
             params["status"] = status
         if sort is not None:
             params["sort"] = sort
-
-        headers = {
-            'accept': 'application/json',
-            'Authorization': f'Bearer {self.token}'
-        }
-
-        response = self.request(
+        if not params:
+            # The legacy call shape: an unfiltered dump of the whole panel
+            warnings.warn(
+                "get_users() without arguments is deprecated, pass limit/offset "
+                "or filters, or use iter_users() to page through every user",
+                DeprecationWarning,
+                stacklevel=4
+            )
+
+        headers = self._auth_headers()
+
+        response = yield PanelRequest(
             path="users",
             method="GET",
             headers=headers,
             params=params if params else None
         )
 
-        return self.verify_response(response)
+        users = self.verify_response(response)
+        return UsersResponse.from_dict(users) if typed else users
 
+    def iter_users(
+        self: "sarban.SARBAN",
+        page_size: int = 500,
+        prefetch: bool = False,
+        **filters
+    ) -> Iterator[dict]:
+        """Iterate over all users page by page.
+
+        Users are requested ``page_size`` at a time with ``offset``/``limit`` and
+        yielded one by one, so memory stays bounded by a single page (two with
+        ``prefetch``) however many users the panel has.
+
+        Parameters:
+            page_size (``int``, optional):
+                Number of users requested per page. Defaults to 500.
+
+            prefetch (``bool``, optional):
+                Whether to fetch the next page in the background while the
+                current one is consumed. Defaults to False.
+
+            **filters:
+                Filters and options of `get_users` (username, search, admin,
+                status, sort, typed)
+
+        Returns:
+            `~Iterator[Dict]`: User dicts (or models with ``typed=True``), in
+            the order returned by the panel.
+        """
+        if page_size < 1:
+            raise ValueError("page_size must be at least 1")
+
+        def fetch(offset: int) -> dict:
+            return self.get_users(offset=offset, limit=page_size, **filters)
+
+        offset = 0
+        if not prefetch:
+            while True:
+                page = fetch(offset)
+                users = page["users"]
+                yield from users
+                offset += len(users)
+                if len(users) < page_size or offset >= page["total"]:
+                    return
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(fetch, offset)
+            while future is not None:
+                page = future.result()
+                users = page["users"]
+                offset += len(users)
+                future = None
+                if len(users) == page_size and offset < page["total"]:
+                    future = executor.submit(fetch, offset)
+                yield from users
+                del page, users
+
+    @sends
     def reset_users_data_usage(
         self: "sarban.SARBAN"
     ) -> bool:
@@ -510,12 +586,9 @@ class Clients:
         Returns:
             `~bool`: True on success.
         """
-        headers = {
-            'accept': 'application/json',
-            'Authorization': f'Bearer {self.token}'
-        }
+        headers = self._auth_headers()
 
-        response = self.request(
+        response = yield PanelRequest(
             path="users/reset",
             method="POST",
             headers=headers
@@ -524,6 +597,7 @@ class Clients:
         self.verify_response(response)
         return True
 
+    @sends
     def get_users_usage(
         self: "sarban.SARBAN",
         start: str = "",
@@ -553,12 +627,9 @@ class Clients:
         if admin is not None:
             params["admin"] = admin
 
-        headers = {
-            'accept': 'application/json',
-            'Authorization': f'Bearer {self.token}'
-        }
+        headers = self._auth_headers()
 
-        response = self.request(
+        response = yield PanelRequest(
             path="users/usage",
             method="GET",
             headers=headers,
@@ -567,6 +638,7 @@ class Clients:
 
         return self.verify_response(response)
 
+    @sends
     def get_expired_users(
         self: "sarban.SARBAN",
         expired_after: str = None,
@@ -590,12 +662,9 @@ class Clients:
         if expired_before is not None:
             params["expired_before"] = expired_before
 
-        headers = {
-            'accept': 'application/json',
-            'Authorization': f'Bearer {self.token}'
-        }
+        headers = self._auth_headers()
 
-        response = self.request(
+        response = yield PanelRequest(
             path="users/expired",
             method="GET",
             headers=headers,
@@ -604,6 +673,7 @@ class Clients:
 
         return self.verify_response(response)
 
+    @sends
     def delete_expired_users(
         self: "sarban.SARBAN",
         expired_after: str = None,
@@ -627,12 +697,9 @@ class Clients:
         if expired_before is not None:
             params["expired_before"] = expired_before
 
-        headers = {
-            'accept': 'application/json',
-            'Authorization': f'Bearer {self.token}'
-        }
+        headers = self._auth_headers()
 
-        response = self.request(
+        response = yield PanelRequest(
             path="users/expired",
             method="DELETE",
             headers=headers,
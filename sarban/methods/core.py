@@ -1,8 +1,11 @@
 from typing import Any, Dict
 import sarban
+from sarban.methods.base import sends
+from sarban.middleware import PanelRequest
 
 
 class Core:
+    @sends
     def get_core_stats(
         self: "sarban.SARBAN"
     ) -> Dict[str, Any]:
@@ -11,12 +14,9 @@ class Core:
         Returns:
             `~Dict`: Core statistics including version, started status, and logs_websocket.
         """
-        headers = {
-            'accept': 'application/json',
-            'Authorization': f'Bearer {self.token}'
-        }
+        headers = self._auth_headers()
 
-        response = self.request(
+        response = yield PanelRequest(
             path="core",
             method="GET",
             headers=headers
@@ -24,6 +24,7 @@ class Core:
 
         return self.verify_response(response)
 
+    @sends
     def restart_core(
         self: "sarban.SARBAN"
     ) -> bool:
@@ -32,12 +33,9 @@ class Core:
         Returns:
             `~bool`: True on success.
         """
-        headers = {
-            'accept': 'application/json',
-            'Authorization': f'Bearer {self.token}'
-        }
+        headers = self._auth_headers()
 
-        response = self.request(
+        response = yield PanelRequest(
             path="core/restart",
             method="POST",
             headers=headers
@@ -46,6 +44,7 @@ class Core:
         self.verify_response(response)
         return True
 
+    @sends
     def get_core_config(
         self: "sarban.SARBAN"
     ) -> Dict[str, Any]:
@@ -54,12 +53,9 @@ class Core:
         Returns:
             `~Dict`: Core configuration object.
         """
-        headers = {
-            'accept': 'application/json',
-            'Authorization': f'Bearer {self.token}'
-        }
+        headers = self._auth_headers()
 
-        response = self.request(
+        response = yield PanelRequest(
             path="core/config",
             method="GET",
             headers=headers
@@ -67,6 +63,7 @@ class Core:
 
         return self.verify_response(response)
 
+    @sends
     def modify_core_config(
         self: "sarban.SARBAN",
         config: Dict[str, Any]
@@ -80,13 +77,9 @@ class Core:
         Returns:
             `~Dict`: Updated core configuration.
         """
-        headers = {
-            'accept': 'application/json',
-            'Authorization': f'Bearer {self.token}',
-            'Content-Type': 'application/json'
-        }
+        headers = self._auth_headers(json_body=True)
 
-        response = self.request(
+        response = yield PanelRequest(
             path="core/config",
             method="PUT",
             headers=headers,
@@ -1,23 +1,55 @@
-from typing import Any
+import base64
+import json
+import time
+from typing import Optional, Tuple
 import sarban
 from sarban import errors
+from sarban.methods.base import sends
+from sarban.middleware import PanelRequest
+
+
+# Seconds before the token expiry at which a remembered login is renewed,
+# capped to a quarter of the token lifetime for short-lived tokens
+TOKEN_REFRESH_MARGIN = 60
+
+
+def _token_claims(token: str) -> Tuple[Optional[float], Optional[float]]:
+    """Read the ``iat`` and ``exp`` claims of a JWT without verifying it, None when missing."""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+        iat, exp = claims.get("iat"), claims.get("exp")
+        return (
+            float(iat) if iat is not None else None,
+            float(exp) if exp is not None else None
+        )
+    except (IndexError, ValueError, TypeError, AttributeError):
+        return None, None
 
 
 class Login:
+    @sends
     def login(
         self: "sarban.SARBAN",
         username: str,
-        password: str
+        password: str,
+        remember: bool = False
     ) -> bool:
         """Login into Marzban panel.
 
         Parameters:
             username (``str``):
                 Username of panel
-                
+
             password (``str``):
                 Password of panel
 
+            remember (``bool``, optional):
+                Whether to keep the credentials in memory so the token is
+                renewed automatically before it expires or when the panel
+                answers 401. Defaults to False.
+
         Returns:
             `~bool`: True on successful login.
 
@@ -28,6 +60,17 @@ class Login:
         if self.token:
             raise errors.AlreadyLogin()
 
+        yield from Login._request_token.steps(self, username, password)
+        self._credentials = (username, password) if remember else None
+        return True
+
+    @sends
+    def _request_token(
+        self: "sarban.SARBAN",
+        username: str,
+        password: str
+    ) -> None:
+        """Request a new access token and store it with its expiry time."""
         headers = {
             'accept': 'application/json',
             'Content-Type': 'application/x-www-form-urlencoded'
@@ -42,7 +85,7 @@ class Login:
             'client_secret': ''
         }
 
-        response = self.request(
+        response = yield PanelRequest(
             path="admin/token",
             method="POST",
             data=data,
@@ -52,13 +95,47 @@ class Login:
         if response.status_code == 200:
             try:
                 result = response.json()
-                self.token = result.get("access_token")
-                if not self.token:
+                token = result.get("access_token")
+                if not token:
                     raise errors.BadLogin()
-                return True
             except (ValueError, KeyError):
                 raise errors.BadLogin()
+            self.token = token
+            issued_at, self.token_expires_at = _token_claims(token)
+            self.token_refresh_at = None
+            if self.token_expires_at is not None:
+                lifetime = self.token_expires_at - (issued_at or time.time())
+                self.token_refresh_at = self.token_expires_at - min(TOKEN_REFRESH_MARGIN, lifetime / 4)
+            if self.cache is not None:
+                self.cache.invalidate()
         elif response.status_code == 401:
             raise errors.BadLogin()
         else:
             raise errors.HTTPException(response.status_code, "Login failed")
+
+    def _refresh_token(
+        self: "sarban.SARBAN",
+        used_token: Optional[str]
+    ) -> None:
+        """Log in again with the remembered credentials.
+
+        Only the first caller that saw ``used_token`` fail renews it; threads
+        waiting on the lock meanwhile find a newer token and return at once.
+        """
+        with self._token_lock:
+            if self.token != used_token:
+                return
+            self._request_token(*self._credentials)
+
+    def _token_expiring(self: "sarban.SARBAN") -> bool:
+        return self.token_refresh_at is not None and time.time() >= self.token_refresh_at
+
+    def _with_token(self: "sarban.SARBAN", headers: dict) -> dict:
+        """Return ``headers`` with the Authorization header set to the current token."""
+        authorization = headers.get('Authorization')
+        if authorization is None or self.token is None:
+            return headers
+        current = f'Bearer {self.token}'
+        if authorization == current:
+            return headers
+        return {**headers, 'Authorization': current}
@@ -1,8 +1,12 @@
 from typing import Any, Dict, List, Optional
 import sarban
+from sarban.models import NodeResponse
+from sarban.methods.base import sends
+from sarban.middleware import PanelRequest
 
 
 class Node:
+    @sends
     def get_node_settings(
         self: "sarban.SARBAN"
     ) -> Dict[str, Any]:
@@ -11,12 +15,9 @@ class Node:
         Returns:
             `~Dict`: Node settings including min_node_version and certificate.
         """
-        headers = {
-            'accept': 'application/json',
-            'Authorization': f'Bearer {self.token}'
-        }
+        headers = self._auth_headers()
 
-        response = self.request(
+        response = yield PanelRequest(
             path="node/settings",
             method="GET",
             headers=headers
@@ -24,6 +25,7 @@ class Node:
 
         return self.verify_response(response)
 
+    @sends
     def add_node(
         self: "sarban.SARBAN",
         name: str,
@@ -66,13 +68,9 @@ class Node:
             "add_as_new_host": add_as_new_host
         }
 
-        headers = {
-            'accept': 'application/json',
-            'Authorization': f'Bearer {self.token}',
-            'Content-Type': 'application/json'
-        }
+        headers = self._auth_headers(json_body=True)
 
-        response = self.request(
+        response = yield PanelRequest(
             path="node",
             method="POST",
             headers=headers,
@@ -81,6 +79,7 @@ class Node:
 
         return self.verify_response(response)
 
+    @sends
     def get_node(
         self: "sarban.SARBAN",
         node_id: int
@@ -94,12 +93,9 @@ class Node:
         Returns:
             `~Dict`: Node information.
         """
-        headers = {
-            'accept': 'application/json',
-            'Authorization': f'Bearer {self.token}'
-        }
+        headers = self._auth_headers()
 
-        response = self.request(
+        response = yield PanelRequest(
             path=f"node/{node_id}",
             method="GET",
             headers=headers
@@ -107,6 +103,7 @@ class Node:
 
         return self.verify_response(response)
 
+    @sends
     def modify_node(
         self: "sarban.SARBAN",
         node_id: int,
@@ -159,13 +156,9 @@ class Node:
         if status is not None:
             data["status"] = status
 
-        headers = {
-            'accept': 'application/json',
-            'Authorization': f'Bearer {self.token}',
-            'Content-Type': 'application/json'
-        }
+        headers = self._auth_headers(json_body=True)
 
-        response = self.request(
+        response = yield PanelRequest(
             path=f"node/{node_id}",
             method="PUT",
             headers=headers,
@@ -174,6 +167,7 @@ class Node:
 
         return self.verify_response(response)
 
+    @sends
     def remove_node(
         self: "sarban.SARBAN",
         node_id: int
@@ -187,12 +181,9 @@ class Node:
         Returns:
             `~bool`: True on success.
         """
-        headers = {
-            'accept': 'application/json',
-            'Authorization': f'Bearer {self.token}'
-        }
+        headers = self._auth_headers()
 
-        response = self.request(
+        response = yield PanelRequest(
             path=f"node/{node_id}",
             method="DELETE",
             headers=headers
@@ -201,27 +192,33 @@ class Node:
         self.verify_response(response)
         return True
 
+    @sends
     def get_nodes(
-        self: "sarban.SARBAN"
+        self: "sarban.SARBAN",
+        typed: bool = False
     ) -> List[Dict[str, Any]]:
         """Retrieve a list of all nodes. Accessible only to sudo admins.
 
+        Parameters:
+            typed (``bool``, optional):
+                Whether to return `~sarban.models.NodeResponse` objects instead
+                of dicts. Defaults to False.
+
         Returns:
             `~List[Dict]`: List of all nodes.
         """
-        headers = {
-            'accept': 'application/json',
-            'Authorization': f'Bearer {self.token}'
-        }
+        headers = self._auth_headers()
 
-        response = self.request(
+        response = yield PanelRequest(
             path="nodes",
             method="GET",
             headers=headers
         )
 
-        return self.verify_response(response)
+        nodes = self.verify_response(response)
+        return [NodeResponse.from_dict(node) for node in nodes] if typed else nodes
 
+    @sends
     def reconnect_node(
         self: "sarban.SARBAN",
         node_id: int
@@ -235,12 +232,9 @@ class Node:
         Returns:
             `~bool`: True on success.
         """
-        headers = {
-            'accept': 'application/json',
-            'Authorization': f'Bearer {self.token}'
-        }
+        headers = self._auth_headers()
 
-        response = self.request(
+        response = yield PanelRequest(
             path=f"node/{node_id}/reconnect",
             method="POST",
             headers=headers
@@ -249,6 +243,7 @@ class Node:
         self.verify_response(response)
         return True
 
+    @sends
     def get_usage(
         self: "sarban.SARBAN",
         start: Optional[str] = None,
@@ -272,12 +267,9 @@ class Node:
         if end:
             params["end"] = end
 
-        headers = {
-            'accept': 'application/json',
-            'Authorization': f'Bearer {self.token}'
-        }
+        headers = self._auth_headers()
 
-        response = self.request(
+        response = yield PanelRequest(
             path="nodes/usage",
             method="GET",
             headers=headers,
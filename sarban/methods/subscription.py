@@ -1,8 +1,12 @@
 from typing import Any, Dict, Optional
 import sarban
+from sarban import errors
+from sarban.methods.base import sends
+from sarban.middleware import PanelRequest
 
 
 class Subscription:
+    @sends
     def user_subscription(
         self: "sarban.SARBAN",
         token: str,
@@ -27,14 +31,11 @@ class Subscription:
         if user_agent:
             headers['User-Agent'] = user_agent
 
-        url = f"{self.full_address}/sub/{token}/"
-        
-        import requests
-        response = requests.get(
-            url,
+        response = yield PanelRequest(
+            path=f"{token}/",
+            method="GET",
             headers=headers,
-            verify=self.https,
-            timeout=30
+            prefix="sub"
         )
         
         if response.status_code == 200:
@@ -43,9 +44,9 @@ class Subscription:
                 return response.json()
             return response.text
         else:
-            from sarban import errors
             raise errors.HTTPException(response.status_code, "Failed to get subscription")
 
+    @sends
     def user_subscription_info(
         self: "sarban.SARBAN",
         token: str
@@ -63,22 +64,19 @@ class Subscription:
             'accept': 'application/json',
         }
 
-        url = f"{self.full_address}/sub/{token}/info"
-        
-        import requests
-        response = requests.get(
-            url,
+        response = yield PanelRequest(
+            path=f"{token}/info",
+            method="GET",
             headers=headers,
-            verify=self.https,
-            timeout=30
+            prefix="sub"
         )
         
         if response.status_code == 200:
             return response.json()
         else:
-            from sarban import errors
             raise errors.HTTPException(response.status_code, "Failed to get subscription info")
 
+    @sends
     def user_get_usage(
         self: "sarban.SARBAN",
         token: str,
@@ -110,15 +108,12 @@ class Subscription:
             'accept': 'application/json',
         }
 
-        url = f"{self.full_address}/sub/{token}/usage"
-        
-        import requests
-        response = requests.get(
-            url,
+        response = yield PanelRequest(
+            path=f"{token}/usage",
+            method="GET",
             headers=headers,
             params=params if params else None,
-            verify=self.https,
-            timeout=30
+            prefix="sub"
         )
         
         if response.status_code == 200:
@@ -127,9 +122,9 @@ class Subscription:
                 return response.json()
             return response.text
         else:
-            from sarban import errors
             raise errors.HTTPException(response.status_code, "Failed to get usage")
 
+    @sends
     def user_subscription_with_client_type(
         self: "sarban.SARBAN",
         token: str,
@@ -158,14 +153,11 @@ class Subscription:
         if user_agent:
             headers['User-Agent'] = user_agent
 
-        url = f"{self.full_address}/sub/{token}/{client_type}"
-        
-        import requests
-        response = requests.get(
-            url,
+        response = yield PanelRequest(
+            path=f"{token}/{client_type}",
+            method="GET",
             headers=headers,
-            verify=self.https,
-            timeout=30
+            prefix="sub"
         )
         
         if response.status_code == 200:
@@ -174,6 +166,5 @@ class Subscription:
                 return response.json()
             return response.text
         else:
-            from sarban import errors
             raise errors.HTTPException(response.status_code, "Failed to get subscription")
 
@@ -1,8 +1,11 @@
 from typing import Any, Dict, List, Optional
 import sarban
+from sarban.methods.base import sends
+from sarban.middleware import PanelRequest
 
 
 class System:
+    @sends
     def get_system_stats(
         self: "sarban.SARBAN"
     ) -> Dict[str, Any]:
@@ -11,12 +14,9 @@ class System:
         Returns:
             `~Dict`: System statistics including version, memory, CPU, users, and bandwidth.
         """
-        headers = {
-            'accept': 'application/json',
-            'Authorization': f'Bearer {self.token}'
-        }
+        headers = self._auth_headers()
 
-        response = self.request(
+        response = yield PanelRequest(
             path="system",
             method="GET",
             headers=headers
@@ -24,6 +24,7 @@ class System:
 
         return self.verify_response(response)
 
+    @sends
     def get_inbounds(
         self: "sarban.SARBAN"
     ) -> Dict[str, List[Dict[str, Any]]]:
@@ -32,12 +33,9 @@ class System:
         Returns:
             `~Dict`: Inbound configurations grouped by protocol type.
         """
-        headers = {
-            'accept': 'application/json',
-            'Authorization': f'Bearer {self.token}'
-        }
+        headers = self._auth_headers()
 
-        response = self.request(
+        response = yield PanelRequest(
             path="inbounds",
             method="GET",
             headers=headers
@@ -45,6 +43,7 @@ class System:
 
         return self.verify_response(response)
 
+    @sends
     def get_hosts(
         self: "sarban.SARBAN"
     ) -> Dict[str, List[Dict[str, Any]]]:
@@ -53,12 +52,9 @@ class System:
         Returns:
             `~Dict`: Proxy hosts grouped by inbound tag.
         """
-        headers = {
-            'accept': 'application/json',
-            'Authorization': f'Bearer {self.token}'
-        }
+        headers = self._auth_headers()
 
-        response = self.request(
+        response = yield PanelRequest(
             path="hosts",
             method="GET",
             headers=headers
@@ -66,6 +62,7 @@ class System:
 
         return self.verify_response(response)
 
+    @sends
     def modify_hosts(
         self: "sarban.SARBAN",
         hosts: Dict[str, List[Dict[str, Any]]]
@@ -79,13 +76,9 @@ class System:
         Returns:
             `~Dict`: Updated proxy hosts.
         """
-        headers = {
-            'accept': 'application/json',
-            'Authorization': f'Bearer {self.token}',
-            'Content-Type': 'application/json'
-        }
+        headers = self._auth_headers(json_body=True)
 
-        response = self.request(
+        response = yield PanelRequest(
             path="hosts",
             method="PUT",
             headers=headers,
@@ -1,8 +1,12 @@
 from typing import Any, Dict, List, Optional
 import sarban
+from sarban.models import UserTemplateResponse
+from sarban.methods.base import sends
+from sarban.middleware import PanelRequest
 
 
 class UserTemplate:
+    @sends
     def add_user_template(
         self: "sarban.SARBAN",
         name: Optional[str] = None,
@@ -51,13 +55,9 @@ class UserTemplate:
         if inbounds is not None:
             data["inbounds"] = inbounds
 
-        headers = {
-            'accept': 'application/json',
-            'Authorization': f'Bearer {self.token}',
-            'Content-Type': 'application/json'
-        }
+        headers = self._auth_headers(json_body=True)
 
-        response = self.request(
+        response = yield PanelRequest(
             path="user_template",
             method="POST",
             headers=headers,
@@ -66,10 +66,12 @@ class UserTemplate:
 
         return self.verify_response(response)
 
+    @sends
     def get_user_templates(
         self: "sarban.SARBAN",
         offset: Optional[int] = None,
-        limit: Optional[int] = None
+        limit: Optional[int] = None,
+        typed: bool = False
     ) -> List[Dict[str, Any]]:
         """Get a list of User Templates with optional pagination.
 
@@ -80,6 +82,10 @@ class UserTemplate:
             limit (``int``, optional):
                 Maximum number of results
 
+            typed (``bool``, optional):
+                Whether to return `~sarban.models.UserTemplateResponse` objects
+                instead of dicts. Defaults to False.
+
         Returns:
             `~List[Dict]`: List of user templates.
         """
@@ -89,20 +95,19 @@ class UserTemplate:
         if limit is not None:
             params["limit"] = limit
 
-        headers = {
-            'accept': 'application/json',
-            'Authorization': f'Bearer {self.token}'
-        }
+        headers = self._auth_headers()
 
-        response = self.request(
+        response = yield PanelRequest(
             path="user_template",
             method="GET",
             headers=headers,
             params=params if params else None
         )
 
-        return self.verify_response(response)
+        templates = self.verify_response(response)
+        return [UserTemplateResponse.from_dict(t) for t in templates] if typed else templates
 
+    @sends
     def get_user_template(
         self: "sarban.SARBAN",
         template_id: int
@@ -116,12 +121,9 @@ class UserTemplate:
         Returns:
             `~Dict`: User template information.
         """
-        headers = {
-            'accept': 'application/json',
-            'Authorization': f'Bearer {self.token}'
-        }
+        headers = self._auth_headers()
 
-        response = self.request(
+        response = yield PanelRequest(
             path=f"user_template/{template_id}",
             method="GET",
             headers=headers
@@ -129,6 +131,7 @@ class UserTemplate:
 
         return self.verify_response(response)
 
+    @sends
     def modify_user_template(
         self: "sarban.SARBAN",
         template_id: int,
@@ -181,13 +184,9 @@ class UserTemplate:
         if inbounds is not None:
             data["inbounds"] = inbounds
 
-        headers = {
-            'accept': 'application/json',
-            'Authorization': f'Bearer {self.token}',
-            'Content-Type': 'application/json'
-        }
+        headers = self._auth_headers(json_body=True)
 
-        response = self.request(
+        response = yield PanelRequest(
             path=f"user_template/{template_id}",
             method="PUT",
             headers=headers,
@@ -196,6 +195,7 @@ class UserTemplate:
 
         return self.verify_response(response)
 
+    @sends
     def remove_user_template(
         self: "sarban.SARBAN",
         template_id: int
@@ -209,12 +209,9 @@ class UserTemplate:
         Returns:
             `~bool`: True on success.
         """
-        headers = {
-            'accept': 'application/json',
-            'Authorization': f'Bearer {self.token}'
-        }
+        headers = self._auth_headers()
 
-        response = self.request(
+        response = yield PanelRequest(
             path=f"user_template/{template_id}",
             method="DELETE",
             headers=headers
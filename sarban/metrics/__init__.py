@@ -0,0 +1,445 @@
+import bisect
+import logging
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds, in seconds, of the latency histogram buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Path templates of the panel endpoints, relative to /{prefix}/
+ENDPOINTS = {
+    "api": (
+        "admin/token", "admin", "admin/{username}", "admins", "admin/{username}/users/disable",
+        "admin/{username}/users/activate", "admin/usage/reset/{username}", "admin/usage/{username}",
+        "core", "core/restart", "core/config",
+        "node/settings", "node", "node/{node_id}", "nodes", "node/{node_id}/reconnect", "nodes/usage",
+        "system", "inbounds", "hosts",
+        "user_template", "user_template/{template_id}",
+        "user", "user/{username}", "user/{username}/reset", "user/{username}/revoke_sub", "users",
+        "users/reset", "user/{username}/usage", "user/{username}/active-next", "users/usage",
+        "user/{username}/set-owner", "users/expired",
+    ),
+    "sub": ("{token}/", "{token}/info", "{token}/usage", "{token}/{client_type}"),
+}
+
+# Exception raised by `verify_response` for each error status
+_ERROR_NAMES = {
+    400: "BadRequest",
+    401: "Unauthorized",
+    403: "Forbidden",
+    404: "NotFound",
+    409: "Conflict",
+    422: "ValidationError",
+}
+
+
+def _compile_endpoints() -> Dict[str, Tuple[Dict[str, str], List[Tuple[Any, str]]]]:
+    compiled = {}
+    for prefix, templates in ENDPOINTS.items():
+        static = {}
+        patterns = []
+        for template in templates:
+            if "{" not in template:
+                static[template] = f"{prefix}/{template}"
+                continue
+            pattern = re.sub(r"\\\{\w+\\\}", "[^/]+", re.escape(template))
+            patterns.append((template.count("{"), -len(template), re.compile(pattern + "$").match, f"{prefix}/{template}"))
+        # Literal segments win over parameters, e.g. {token}/info over {token}/{client_type}
+        patterns.sort(key=lambda entry: entry[:2])
+        compiled[prefix] = (static, [entry[2:] for entry in patterns])
+    return compiled
+
+
+_COMPILED = _compile_endpoints()
+
+
+def endpoint(path: str, prefix: str = "api") -> str:
+    """Return the endpoint template of a request path, e.g. "api/user/{username}".
+
+    Paths that match no known endpoint are reported as "{prefix}/other" so the
+    number of label values stays bounded.
+    """
+    compiled = _COMPILED.get(prefix)
+    if compiled is None:
+        return f"{prefix}/other"
+    static, patterns = compiled
+    name = static.get(path)
+    if name is not None:
+        return name
+    for match, template in patterns:
+        if match(path):
+            return template
+    return f"{prefix}/other"
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram, as used by Prometheus.
+
+    Attributes:
+        bounds (``Tuple[float]``):
+            Upper bound of every bucket, +Inf excluded
+
+        counts (``List[int]``):
+            Number of observations per bucket (not cumulative), the last one
+            counting observations above every bound
+
+        sum (``float``):
+            Sum of all observations
+
+        count (``int``):
+            Number of observations
+    """
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate a quantile as the upper bound of the bucket it falls in.
+
+        Returns None without observations and +Inf when it falls above every bound.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def to_dict(self) -> Dict[str, Any]:
+        buckets = {}
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            buckets[bound] = seen
+        buckets[float("inf")] = self.count
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+            "buckets": buckets,
+        }
+
+
+class _Endpoint:
+    __slots__ = ("latency", "statuses", "errors", "bytes_in", "bytes_out", "retries", "cache_hits")
+
+    def __init__(self, bounds: Tuple[float, ...]) -> None:
+        self.latency = Histogram(bounds)
+        self.statuses = {}
+        self.errors = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.retries = 0
+        self.cache_hits = 0
+
+
+class Metrics:
+    """Thread-safe request instrumentation of a client.
+
+    Every request sent to the panel is recorded per method and endpoint
+    template (e.g. "GET api/user/{username}"): a latency histogram, the
+    status codes, bytes sent and received, retries and cache hits. Errors are
+    also counted by the exception class `verify_response` raises for the
+    status (``NotFound``, ``Conflict``...) or, for failed connections, by the
+    class of the transport error. A `Metrics` instance may be shared by
+    several clients to aggregate them.
+
+    Clients created without ``metrics`` skip all of this, at the cost of one
+    ``None`` check per request.
+
+    Parameters:
+        buckets (``Iterable[float]``, optional):
+            Upper bounds of the latency buckets in seconds. Defaults to
+            ``DEFAULT_BUCKETS`` (5 ms to 10 s).
+
+        slow_threshold (``float``, optional):
+            Requests slower than this many seconds are logged as warnings on the
+            ``sarban.metrics`` logger and kept in `slow_requests`. Defaults to none.
+
+        slow_log_size (``int``, optional):
+            Number of slow requests kept. Defaults to 100.
+
+    Example:
+        ```python
+        from sarban import SARBAN
+        from sarban.metrics import Metrics
+
+        sb = SARBAN("https://panel.example.com:2087", metrics=Metrics(slow_threshold=2))
+        ...
+        for name, stats in sb.metrics.stats()["endpoints"].items():
+            print(name, stats["count"], stats["latency"]["p99"])
+        ```
+    """
+
+    def __init__(
+        self,
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+        slow_threshold: Optional[float] = None,
+        slow_log_size: int = 100
+    ) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self.slow_threshold = slow_threshold
+        self.slow_requests = deque(maxlen=slow_log_size)
+        self._endpoints: Dict[Tuple[str, str], _Endpoint] = {}
+        self._errors: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._otel = None
+
+    def _endpoint(self, method: str, name: str) -> _Endpoint:
+        stats = self._endpoints.get((method, name))
+        if stats is None:
+            stats = self._endpoints[(method, name)] = _Endpoint(self.buckets)
+        return stats
+
+    def observe(
+        self,
+        method: str,
+        path: str,
+        prefix: str,
+        status: int,
+        elapsed: float,
+        bytes_out: int = 0,
+        bytes_in: int = 0
+    ) -> None:
+        """Record a request the panel answered."""
+        name = endpoint(path, prefix)
+        error = None
+        if status >= 400:
+            error = _ERROR_NAMES.get(status, "HTTPException")
+        with self._lock:
+            stats = self._endpoint(method, name)
+            stats.latency.observe(elapsed)
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+            stats.bytes_out += bytes_out
+            stats.bytes_in += bytes_in
+            if error is not None:
+                stats.errors += 1
+                self._errors[error] = self._errors.get(error, 0) + 1
+        if self._otel is not None:
+            self._otel.observe(method, name, status, elapsed, bytes_out, bytes_in, error)
+        if self.slow_threshold is not None and elapsed >= self.slow_threshold:
+            self._slow(method, path, prefix, status, elapsed)
+
+    def observe_error(
+        self,
+        method: str,
+        path: str,
+        prefix: str,
+        exception: BaseException,
+        elapsed: float,
+        bytes_out: int = 0
+    ) -> None:
+        """Record a request that got no answer (connection error, timeout...)."""
+        name = endpoint(path, prefix)
+        error = type(exception).__name__
+        with self._lock:
+            stats = self._endpoint(method, name)
+            stats.latency.observe(elapsed)
+            stats.bytes_out += bytes_out
+            stats.errors += 1
+            self._errors[error] = self._errors.get(error, 0) + 1
+        if self._otel is not None:
+            self._otel.observe(method, name, 0, elapsed, bytes_out, 0, error)
+        if self.slow_threshold is not None and elapsed >= self.slow_threshold:
+            self._slow(method, path, prefix, 0, elapsed)
+
+    def observe_retry(self, method: str, path: str, prefix: str) -> None:
+        """Record that a request is about to be retried."""
+        name = endpoint(path, prefix)
+        with self._lock:
+            self._endpoint(method, name).retries += 1
+        if self._otel is not None:
+            self._otel.retries.add(1, {"method": method, "endpoint": name})
+
+    def observe_cache_hit(self, method: str, path: str, prefix: str) -> None:
+        """Record a request answered from a client-side cache."""
+        name = endpoint(path, prefix)
+        with self._lock:
+            self._endpoint(method, name).cache_hits += 1
+        if self._otel is not None:
+            self._otel.cache_hits.add(1, {"method": method, "endpoint": name})
+
+    def _slow(self, method: str, path: str, prefix: str, status: int, elapsed: float) -> None:
+        self.slow_requests.append({
+            "time": time.time(),
+            "method": method,
+            "path": f"{prefix}/{path}",
+            "status": status,
+            "elapsed": elapsed,
+        })
+        logger.warning("Slow request: %s /%s/%s answered %s in %.3f s", method, prefix, path, status or "nothing", elapsed)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return a snapshot of every counter.
+
+        Returns:
+            `~Dict`: ``endpoints`` maps "METHOD endpoint" to its ``count``,
+            ``errors``, ``statuses``, ``bytes_in``, ``bytes_out``, ``retries``,
+            ``cache_hits`` and ``latency`` histogram (count, sum, estimated p50
+            and p99, cumulative buckets); ``errors`` counts errors by exception
+            class; ``totals`` sums the endpoints and ``slow_requests`` lists the
+            latest slow requests.
+        """
+        with self._lock:
+            endpoints = {}
+            totals = dict.fromkeys(("count", "errors", "bytes_in", "bytes_out", "retries", "cache_hits"), 0)
+            for (method, name), stats in sorted(self._endpoints.items()):
+                entry = {
+                    "count": stats.latency.count,
+                    "errors": stats.errors,
+                    "statuses": dict(stats.statuses),
+                    "bytes_in": stats.bytes_in,
+                    "bytes_out": stats.bytes_out,
+                    "retries": stats.retries,
+                    "cache_hits": stats.cache_hits,
+                    "latency": stats.latency.to_dict(),
+                }
+                for key in totals:
+                    totals[key] += entry[key]
+                endpoints[f"{method} {name}"] = entry
+            return {
+                "endpoints": endpoints,
+                "errors": dict(self._errors),
+                "totals": totals,
+                "slow_requests": list(self.slow_requests),
+            }
+
+    def reset(self) -> None:
+        """Clear every counter and the slow request log."""
+        with self._lock:
+            self._endpoints.clear()
+            self._errors.clear()
+            self.slow_requests.clear()
+
+    def prometheus(self, namespace: str = "sarban") -> str:
+        """Render the counters in the Prometheus text exposition format.
+
+        Serve the result from any HTTP endpoint scraped by Prometheus; no
+        client library is needed.
+
+        Parameters:
+            namespace (``str``, optional):
+                Prefix of the metric names. Defaults to "sarban".
+        """
+        def labels(method: str, name: str, **extra: Any) -> str:
+            pairs = {"method": method, "endpoint": name, **extra}
+            return "{" + ",".join(f'{k}="{v}"' for k, v in pairs.items()) + "}"
+
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+            errors = sorted(self._errors.items())
+            lines = [
+                f"# HELP {namespace}_request_duration_seconds Latency of panel requests.",
+                f"# TYPE {namespace}_request_duration_seconds histogram",
+            ]
+            for (method, name), stats in endpoints:
+                seen = 0
+                for bound, count in zip(stats.latency.bounds, stats.latency.counts):
+                    seen += count
+                    lines.append(f"{namespace}_request_duration_seconds_bucket{labels(method, name, le=bound)} {seen}")
+                lines.append(f"{namespace}_request_duration_seconds_bucket{labels(method, name, le='+Inf')} {stats.latency.count}")
+                lines.append(f"{namespace}_request_duration_seconds_sum{labels(method, name)} {stats.latency.sum}")
+                lines.append(f"{namespace}_request_duration_seconds_count{labels(method, name)} {stats.latency.count}")
+
+            counters = (
+                ("responses_total", "Panel responses by status code.", None),
+                ("request_bytes_total", "Bytes sent to the panel.", "bytes_out"),
+                ("response_bytes_total", "Bytes received from the panel.", "bytes_in"),
+                ("retries_total", "Retried requests.", "retries"),
+                ("cache_hits_total", "Requests answered from a client-side cache.", "cache_hits"),
+            )
+            for metric, description, attribute in counters:
+                lines.append(f"# HELP {namespace}_{metric} {description}")
+                lines.append(f"# TYPE {namespace}_{metric} counter")
+                for (method, name), stats in endpoints:
+                    if attribute is None:
+                        for status, count in sorted(stats.statuses.items()):
+                            lines.append(f"{namespace}_{metric}{labels(method, name, status=status)} {count}")
+                    else:
+                        lines.append(f"{namespace}_{metric}{labels(method, name)} {getattr(stats, attribute)}")
+
+            lines.append(f"# HELP {namespace}_errors_total Failed requests by exception class.")
+            lines.append(f"# TYPE {namespace}_errors_total counter")
+            for error, count in errors:
+                lines.append(f'{namespace}_errors_total{{exception="{error}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def bind_opentelemetry(self, meter: Any = None) -> None:
+        """Also record every observation on OpenTelemetry instruments.
+
+        Requires the optional ``opentelemetry-api`` dependency
+        (``pip install sarban[otel]``); exporting is left to the configured SDK.
+
+        Parameters:
+            meter (``opentelemetry.metrics.Meter``, optional):
+                Meter creating the instruments. Defaults to the global meter
+                provider's "sarban" meter.
+        """
+        self._otel = _OpenTelemetry(meter)
+
+
+class _OpenTelemetry:
+    def __init__(self, meter: Any = None) -> None:
+        try:
+            from opentelemetry import metrics
+        except ImportError:
+            raise ImportError(
+                "OpenTelemetry export requires opentelemetry-api, install it with `pip install sarban[otel]`"
+            )
+
+        meter = meter or metrics.get_meter("sarban")
+        self.duration = meter.create_histogram(
+            "sarban.request.duration", unit="s", description="Latency of panel requests"
+        )
+        self.bytes_out = meter.create_counter(
+            "sarban.request.size", unit="By", description="Bytes sent to the panel"
+        )
+        self.bytes_in = meter.create_counter(
+            "sarban.response.size", unit="By", description="Bytes received from the panel"
+        )
+        self.errors = meter.create_counter(
+            "sarban.request.errors", description="Failed requests by exception class"
+        )
+        self.retries = meter.create_counter("sarban.request.retries", description="Retried requests")
+        self.cache_hits = meter.create_counter(
+            "sarban.cache.hits", description="Requests answered from a client-side cache"
+        )
+
+    def observe(
+        self,
+        method: str,
+        name: str,
+        status: int,
+        elapsed: float,
+        bytes_out: int,
+        bytes_in: int,
+        error: Optional[str]
+    ) -> None:
+        attributes = {"method": method, "endpoint": name, "status": status}
+        self.duration.record(elapsed, attributes)
+        if bytes_out:
+            self.bytes_out.add(bytes_out, attributes)
+        if bytes_in:
+            self.bytes_in.add(bytes_in, attributes)
+        if error is not None:
+            self.errors.add(1, {"method": method, "endpoint": name, "exception": error})
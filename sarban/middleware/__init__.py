@@ -0,0 +1,133 @@
+from typing import Any, Awaitable, Callable, Iterable, Optional, Union
+
+
+class PanelRequest:
+    """A request on its way through the middleware chain.
+
+    Middleware may change any attribute before passing the request on, e.g.
+    add a header (copy ``headers`` first, the client shares the dict between
+    calls) or rewrite ``params``.
+
+    Attributes:
+        method (``str``):
+            HTTP method
+
+        path (``str``):
+            Path relative to /{prefix}/, e.g. "user/alice"
+
+        headers (``dict``):
+            Request headers
+
+        data (``dict | str``):
+            Request body, None if there is none
+
+        params (``dict``):
+            Query parameters, None if there are none
+
+        prefix (``str``):
+            "api" for the REST API, "sub" for subscription endpoints
+
+        idempotent (``bool``):
+            Idempotency hint of the caller, see `Base.request`
+
+        conflict_check (``str``):
+            Conflict check path of the caller, see `Base.request`
+    """
+
+    __slots__ = ("method", "path", "headers", "data", "params", "prefix", "idempotent", "conflict_check")
+
+    def __init__(
+        self,
+        method: str,
+        path: str,
+        headers: dict,
+        data: Optional[Union[dict, str]] = None,
+        params: Optional[dict] = None,
+        prefix: str = "api",
+        idempotent: Optional[bool] = None,
+        conflict_check: Optional[str] = None
+    ) -> None:
+        self.method = method
+        self.path = path
+        self.headers = headers
+        self.data = data
+        self.params = params
+        self.prefix = prefix
+        self.idempotent = idempotent
+        self.conflict_check = conflict_check
+
+    def __repr__(self) -> str:
+        return f"PanelRequest({self.method} /{self.prefix}/{self.path})"
+
+
+class Middleware:
+    """Base class of request middleware.
+
+    A middleware wraps `Base.request`: it receives the outgoing `PanelRequest`
+    and a ``call_next`` function sending it on to the next middleware (and
+    finally to the panel, through the client's cache, retries and token
+    refresh), and returns the response. Responses are seen before
+    `verify_response`, so panel errors arrive as responses with a 4xx/5xx
+    status, while connection failures are raised as ``HTTPException`` with
+    status 0. A middleware may also answer without calling ``call_next``.
+
+    Override `handle` for `SARBAN` and `handle_async` for `AsyncSARBAN`; the
+    defaults pass the request on unchanged. Plain functions
+    ``(request, call_next) -> response`` (coroutine functions for the async
+    client) can be used as middleware too.
+
+    Example:
+        ```python
+        class Timing(Middleware):
+            def handle(self, request, call_next):
+                start = time.perf_counter()
+                try:
+                    return call_next(request)
+                finally:
+                    print(request, time.perf_counter() - start)
+        ```
+    """
+
+    def handle(self, request: PanelRequest, call_next: Callable[[PanelRequest], Any]) -> Any:
+        return call_next(request)
+
+    async def handle_async(
+        self,
+        request: PanelRequest,
+        call_next: Callable[[PanelRequest], Awaitable[Any]]
+    ) -> Any:
+        return await call_next(request)
+
+
+def _handler(middleware: Any, asynchronous: bool) -> Callable:
+    if isinstance(middleware, Middleware):
+        return middleware.handle_async if asynchronous else middleware.handle
+    if callable(middleware):
+        return middleware
+    raise TypeError(f"{middleware!r} is not a Middleware or a callable")
+
+
+def compose(
+    middleware: Iterable[Any],
+    core: Callable[[PanelRequest], Any],
+    asynchronous: bool = False
+) -> Optional[Callable[[PanelRequest], Any]]:
+    """Chain middleware around ``core``, the first one being the outermost.
+
+    The chain is built once, so dispatching a request costs one call per
+    middleware and nothing else.
+
+    Returns:
+        `~Callable`: The chain's entry point, or None when there is no middleware.
+    """
+    chain = None
+    for item in reversed(list(middleware)):
+        chain = _bind(_handler(item, asynchronous), chain or core)
+    return chain
+
+
+def _bind(handle: Callable, call_next: Callable) -> Callable[[PanelRequest], Any]:
+    def dispatch(request: PanelRequest) -> Any:
+        return handle(request, call_next)
+
+    return dispatch
@@ -0,0 +1,246 @@
+import bisect
+import gzip
+import json
+import threading
+import time
+from typing import Dict, List, Optional
+
+import sarban
+from sarban import errors
+from sarban.sub_gen import extract_token
+
+
+def _admin(user: dict) -> Optional[str]:
+    admin = user.get("admin")
+    return admin.get("username") if admin else None
+
+
+class UserMirror:
+    """In-memory copy of the panel's users with indexed local lookups.
+
+    The mirror is filled page by page through `SARBAN.iter_users` and indexed by
+    username, subscription token, owner admin, status and expire time, so
+    lookups are served locally instead of costing a round trip each.
+
+    Parameters:
+        client (`~sarban.SARBAN`):
+            Logged in client used to fetch users
+
+        page_size (``int``, optional):
+            Number of users requested per page. Defaults to 1000.
+
+    Example:
+        ```python
+        mirror = UserMirror(sb)
+        mirror.refresh()
+        user = mirror.get_client("user1")
+        mirror.save("users.json.gz")
+        ```
+    """
+
+    def __init__(self, client: "sarban.SARBAN", page_size: int = 1000) -> None:
+        self.client = client
+        self.page_size = page_size
+        self.synced_at = None
+
+        self._users = {}
+        self._by_token = {}
+        self._by_admin = {}
+        self._by_status = {}
+        self._by_expire = []
+        self._expire_dirty = False
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def __contains__(self, username: str) -> bool:
+        return username in self._users
+
+    def _index(self, user: dict) -> None:
+        username = user["username"]
+        token = extract_token(user.get("subscription_url"))
+        if token:
+            self._by_token[token] = username
+        self._by_admin.setdefault(_admin(user), set()).add(username)
+        self._by_status.setdefault(user.get("status"), set()).add(username)
+        if user.get("expire"):
+            self._expire_dirty = True
+
+    def _unindex(self, user: dict) -> None:
+        username = user["username"]
+        token = extract_token(user.get("subscription_url"))
+        if token and self._by_token.get(token) == username:
+            del self._by_token[token]
+        self._by_admin.get(_admin(user), set()).discard(username)
+        self._by_status.get(user.get("status"), set()).discard(username)
+        if user.get("expire"):
+            self._expire_dirty = True
+
+    def update(self, user: dict) -> bool:
+        """Insert or replace one user, e.g. with the result of `edit_client`.
+
+        Returns:
+            `~bool`: True if the mirror changed.
+        """
+        with self._lock:
+            old = self._users.get(user["username"])
+            if old == user:
+                return False
+            if old is not None:
+                self._unindex(old)
+            self._users[user["username"]] = user
+            self._index(user)
+            return True
+
+    def remove(self, username: str) -> bool:
+        """Remove one user, e.g. after `delete_client`.
+
+        Returns:
+            `~bool`: True if the user was in the mirror.
+        """
+        with self._lock:
+            user = self._users.pop(username, None)
+            if user is None:
+                return False
+            self._unindex(user)
+            return True
+
+    def refresh(self) -> Dict[str, int]:
+        """Re-read every user and apply only the differences.
+
+        This is a full offset-paged pass over the panel's users; unchanged
+        users keep their index entries. Users created or deleted while the
+        pass runs shift the offsets, so some users may be missed: users not
+        seen are therefore only dropped when the pass was consistent, i.e.
+        every page reported the same ``total`` and that many users were read.
+        Otherwise they are kept until a later `refresh`.
+
+        Returns:
+            `~Dict`: Number of ``added``, ``updated`` and ``removed`` users, and
+            ``consistent``, 1 if the pass was consistent and 0 otherwise.
+        """
+        counts = {"added": 0, "updated": 0, "removed": 0, "consistent": 0}
+        seen = set()
+        totals = set()
+        offset = 0
+        while True:
+            page = self.client.get_users(offset=offset, limit=self.page_size, sort="created_at")
+            users = page["users"]
+            totals.add(page["total"])
+            for user in users:
+                seen.add(user["username"])
+                existed = user["username"] in self._users
+                if self.update(user):
+                    counts["updated" if existed else "added"] += 1
+            offset += len(users)
+            if len(users) < self.page_size or offset >= page["total"]:
+                break
+
+        with self._lock:
+            if len(totals) == 1 and len(seen) == totals.pop():
+                counts["consistent"] = 1
+                for username in [name for name in self._users if name not in seen]:
+                    self.remove(username)
+                    counts["removed"] += 1
+            self.synced_at = time.time()
+        return counts
+
+    def refresh_new(self) -> int:
+        """Fetch only users created since the last sync.
+
+        Users are read newest first and reading stops at the first user already
+        in the mirror, which makes this much cheaper than `refresh`. It does not
+        pick up modifications or deletions of existing users.
+
+        Returns:
+            `~int`: Number of users added.
+        """
+        added = 0
+        for user in self.client.iter_users(page_size=self.page_size, sort="-created_at"):
+            if user["username"] in self._users:
+                break
+            self.update(user)
+            added += 1
+        return added
+
+    def get_client(self, username: str) -> dict:
+        """Local counterpart of `SARBAN.get_client`.
+
+        Raises:
+            `~errors.NotFound`: If the user is not in the mirror
+        """
+        user = self._users.get(username)
+        if user is None:
+            raise errors.NotFound()
+        return user
+
+    def get_client_by_token(self, token: str) -> dict:
+        """Find a user by the token of its subscription URL.
+
+        Raises:
+            `~errors.NotFound`: If no user has this token
+        """
+        username = self._by_token.get(token)
+        if username is None:
+            raise errors.NotFound()
+        return self._users[username]
+
+    def get_users_by_admin(self, admin: Optional[str]) -> List[dict]:
+        """Return the users owned by an admin (None for users without one)."""
+        with self._lock:
+            return [self._users[name] for name in self._by_admin.get(admin, ())]
+
+    def get_users_by_status(self, status: str) -> List[dict]:
+        """Return the users with the given status."""
+        with self._lock:
+            return [self._users[name] for name in self._by_status.get(status, ())]
+
+    def get_expiring_users(self, start: int, end: int) -> List[dict]:
+        """Return the users whose expire timestamp is in [start, end), soonest first."""
+        with self._lock:
+            if self._expire_dirty:
+                # Rebuilt lazily: sorting once is far cheaper than keeping a
+                # sorted list up to date through thousands of inserts.
+                self._by_expire = sorted(
+                    (user["expire"], name) for name, user in self._users.items() if user.get("expire")
+                )
+                self._expire_dirty = False
+            lo = bisect.bisect_left(self._by_expire, (start,))
+            hi = bisect.bisect_left(self._by_expire, (end,))
+            return [self._users[name] for _, name in self._by_expire[lo:hi]]
+
+    def save(self, path: str) -> None:
+        """Write a gzip compressed JSON snapshot of the mirror to ``path``."""
+        with self._lock:
+            snapshot = {
+                "version": 1,
+                "synced_at": self.synced_at,
+                "users": list(self._users.values())
+            }
+            with gzip.open(path, "wt", encoding="utf-8") as f:
+                json.dump(snapshot, f, separators=(",", ":"))
+
+    def load(self, path: str) -> int:
+        """Replace the mirror content with a snapshot written by `save`.
+
+        Call `refresh` afterwards to catch up with changes made since.
+
+        Returns:
+            `~int`: Number of users loaded.
+        """
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            snapshot = json.load(f)
+
+        with self._lock:
+            self._users = {}
+            self._by_token = {}
+            self._by_admin = {}
+            self._by_status = {}
+            self._by_expire = []
+            self._expire_dirty = False
+            for user in snapshot["users"]:
+                self._users[user["username"]] = user
+                self._index(user)
+            self.synced_at = snapshot.get("synced_at")
+            return len(self._users)
@@ -0,0 +1,240 @@
+import sys
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+
+_MISSING = object()
+
+
+def parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    """Parse a datetime as sent by the panel (ISO 8601, optionally with "Z"), None if empty."""
+    if not value:
+        return None
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    return datetime.fromisoformat(value)
+
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _intern_tags(inbounds: Optional[Dict[str, List[str]]]) -> Optional[Dict[str, List[str]]]:
+    """Intern protocol names and inbound tags, which repeat across every user."""
+    if not inbounds:
+        return inbounds
+    return {
+        sys.intern(protocol): [sys.intern(tag) for tag in tags]
+        for protocol, tags in inbounds.items()
+    }
+
+
+def _datetime_slots(names: tuple) -> tuple:
+    """Slots backing the `LazyDatetime` fields ``names``: raw string and parsed value."""
+    return tuple(slot for name in names for slot in (f"_{name}", f"_{name}_dt"))
+
+
+class LazyDatetime:
+    """Descriptor exposing an ISO string slot as a datetime parsed on first access."""
+
+    def __init__(self, name: str) -> None:
+        self.raw = f"_{name}"
+        self.parsed = f"_{name}_dt"
+
+    def __get__(self, obj: Any, owner: type = None) -> Any:
+        if obj is None:
+            return self
+        value = getattr(obj, self.parsed, _MISSING)
+        if value is _MISSING:
+            value = parse_datetime(getattr(obj, self.raw))
+            setattr(obj, self.parsed, value)
+        return value
+
+    def __set__(self, obj: Any, value: Any) -> None:
+        if isinstance(value, datetime):
+            setattr(obj, self.raw, value.isoformat())
+            setattr(obj, self.parsed, value)
+        else:
+            setattr(obj, self.raw, value)
+            if hasattr(obj, self.parsed):
+                delattr(obj, self.parsed)
+
+
+class Model:
+    """Base of the typed response models.
+
+    Models keep their fields in ``__slots__`` instead of a per-instance dict,
+    intern the short strings repeated across many objects (status, protocol,
+    inbound tags) and parse datetime fields only when they are read. Keys the
+    model does not know are kept in ``extra``. Items can also be read with
+    ``model["field"]`` so existing dict-based code keeps working.
+    """
+
+    __slots__ = ("extra",)
+
+    _fields = ()
+    _datetimes = ()
+    _interned = ()
+    _nested = {}
+    _known = frozenset()
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._known = frozenset(cls._fields) | frozenset(cls._datetimes)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Model":
+        """Build a model from a response dict."""
+        obj = cls.__new__(cls)
+        for name in cls._fields:
+            value = data.get(name)
+            if value is not None:
+                if name in cls._interned:
+                    value = _intern(value)
+                elif name in cls._nested:
+                    value = cls._nested[name].from_dict(value)
+            setattr(obj, name, value)
+        for name in cls._datetimes:
+            setattr(obj, f"_{name}", data.get(name))
+
+        known = cls._known
+        obj.extra = {k: v for k, v in data.items() if k not in known} or None
+        return obj
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the model as the dict the panel sent."""
+        data = {}
+        for name in self._fields:
+            value = getattr(self, name)
+            if isinstance(value, Model):
+                value = value.to_dict()
+            data[name] = value
+        for name in self._datetimes:
+            data[name] = getattr(self, f"_{name}")
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._fields:
+            return getattr(self, key)
+        if key in self._datetimes:
+            return getattr(self, f"_{key}")
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __eq__(self, other: Any) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        key = self._fields[0]
+        return f"{type(self).__name__}({key}={getattr(self, key)!r})"
+
+
+class Admin(Model):
+    """Typed ``Admin`` schema."""
+
+    __slots__ = ("username", "is_sudo", "telegram_id", "discord_webhook", "users_usage")
+
+    _fields = __slots__
+
+
+class UserResponse(Model):
+    """Typed ``UserResponse`` schema."""
+
+    _fields = (
+        "username", "status", "used_traffic", "lifetime_used_traffic", "data_limit",
+        "data_limit_reset_strategy", "expire", "proxies", "inbounds", "excluded_inbounds",
+        "note", "sub_last_user_agent", "on_hold_expire_duration", "auto_delete_in_days",
+        "next_plan", "links", "subscription_url", "admin",
+    )
+    _datetimes = ("created_at", "online_at", "sub_updated_at", "on_hold_timeout")
+
+    __slots__ = _fields + _datetime_slots(_datetimes)
+    _interned = ("status", "data_limit_reset_strategy")
+    _nested = {"admin": Admin}
+
+    created_at = LazyDatetime("created_at")
+    online_at = LazyDatetime("online_at")
+    sub_updated_at = LazyDatetime("sub_updated_at")
+    on_hold_timeout = LazyDatetime("on_hold_timeout")
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "UserResponse":
+        obj = super().from_dict(data)
+        obj.inbounds = _intern_tags(obj.inbounds)
+        obj.excluded_inbounds = _intern_tags(obj.excluded_inbounds)
+        if obj.proxies:
+            obj.proxies = {sys.intern(k): v for k, v in obj.proxies.items()}
+        return obj
+
+
+class NodeResponse(Model):
+    """Typed ``NodeResponse`` schema."""
+
+    __slots__ = (
+        "name", "id", "address", "port", "api_port", "usage_coefficient",
+        "xray_version", "status", "message",
+    )
+
+    _fields = __slots__
+    _interned = ("status", "xray_version")
+
+
+class UserTemplateResponse(Model):
+    """Typed ``UserTemplateResponse`` schema."""
+
+    __slots__ = (
+        "name", "id", "data_limit", "expire_duration", "username_prefix",
+        "username_suffix", "inbounds",
+    )
+
+    _fields = __slots__
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "UserTemplateResponse":
+        obj = super().from_dict(data)
+        obj.inbounds = _intern_tags(obj.inbounds)
+        return obj
+
+
+class UsersResponse(Model):
+    """Typed ``UsersResponse`` schema, a page of users and the total count."""
+
+    __slots__ = ("users", "total")
+
+    _fields = __slots__
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "UsersResponse":
+        obj = cls.__new__(cls)
+        obj.users = []
+        # A page usually has a handful of owners, so identical admins are
+        # shared between users instead of being built once per user.
+        admins = {}
+        for item in data.get("users", ()):
+            user = UserResponse.from_dict(item)
+            if user.admin is not None:
+                try:
+                    user.admin = admins.setdefault(tuple(item["admin"].items()), user.admin)
+                except TypeError:
+                    pass
+            obj.users.append(user)
+        obj.total = data.get("total")
+        obj.extra = None
+        return obj
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"users": [user.to_dict() for user in self.users], "total": self.total}
+
+    def __repr__(self) -> str:
+        return f"UsersResponse(users=<{len(self.users)} users>, total={self.total})"
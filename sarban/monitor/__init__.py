@@ -0,0 +1,371 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import sarban
+from sarban.retry import RetryPolicy
+
+
+logger = logging.getLogger(__name__)
+
+
+class NodeEvent:
+    """Something the `NodeMonitor` noticed or did.
+
+    Attributes:
+        kind (``str``):
+            "status" when a node changed status, "reconnect" after a reconnect
+            request, "circuit_open" / "circuit_closed" when reconnects of a
+            node are suspended / resumed, "poll_failed" when a panel could not
+            be polled
+
+        panel (``str``):
+            Name of the panel
+
+        node_id (``int``):
+            Id of the node, None for "poll_failed"
+
+        name (``str``):
+            Name of the node
+
+        status (``str``):
+            Current status of the node
+
+        previous (``str``):
+            Previous status for "status" events
+
+        error (``Exception``):
+            Error of a failed reconnect request or poll, None otherwise
+
+        time (``float``):
+            Unix time of the event
+    """
+
+    __slots__ = ("kind", "panel", "node_id", "name", "status", "previous", "error", "time")
+
+    def __init__(
+        self,
+        kind: str,
+        panel: str,
+        node_id: Optional[int] = None,
+        name: Optional[str] = None,
+        status: Optional[str] = None,
+        previous: Optional[str] = None,
+        error: Optional[Exception] = None
+    ) -> None:
+        self.kind = kind
+        self.panel = panel
+        self.node_id = node_id
+        self.name = name
+        self.status = status
+        self.previous = previous
+        self.error = error
+        self.time = time.time()
+
+    def __repr__(self) -> str:
+        fields = ", ".join(
+            f"{name}={getattr(self, name)!r}"
+            for name in ("panel", "node_id", "name", "status", "previous", "error")
+            if getattr(self, name) is not None
+        )
+        return f"NodeEvent({self.kind}, {fields})"
+
+
+class _NodeState:
+    __slots__ = ("name", "status", "message", "since", "attempts", "next_attempt", "open_until")
+
+    def __init__(self, name: str, status: str, now: float) -> None:
+        self.name = name
+        self.status = status
+        self.message = None
+        self.since = now
+        self.attempts = 0
+        self.next_attempt = None
+        self.open_until = None
+
+
+class NodeMonitor:
+    """Watches the nodes of one or more panels and reconnects failing ones.
+
+    Every round lists the nodes of each panel with a single `get_nodes` call,
+    panels being polled concurrently on a small thread pool, so hundreds of
+    nodes cost a handful of requests and no thread per node.
+
+    A node in ``error``, or stuck in ``connecting`` for longer than
+    ``connecting_timeout``, is reconnected with exponential backoff. After
+    ``failure_threshold`` reconnects that did not bring it back, its circuit
+    opens and reconnects stop for ``cooldown`` seconds; afterwards one more
+    attempt is made before the circuit opens again. The circuit closes as soon
+    as the node is ``connected``.
+
+    Parameters:
+        panels (``SARBAN | Dict[str, SARBAN]``):
+            Logged in client, or clients by panel name
+
+        interval (``float``, optional):
+            Seconds between two polls. Defaults to 30.
+
+        reconnect (``bool``, optional):
+            Whether to reconnect failing nodes. Defaults to True.
+
+        backoff (`~sarban.retry.RetryPolicy`, optional):
+            Delays between reconnects of a node, from its ``backoff``,
+            ``max_backoff`` and ``jitter``. Defaults to 10 s doubling up to 5 minutes.
+
+        failure_threshold (``int``, optional):
+            Reconnects without recovery before the circuit opens. Defaults to 5.
+
+        cooldown (``float``, optional):
+            Seconds the circuit stays open. Defaults to 600.
+
+        connecting_timeout (``float``, optional):
+            Seconds after which a ``connecting`` node counts as failed. Defaults to 120.
+
+        workers (``int``, optional):
+            Threads used to poll panels and send reconnects. Defaults to 4.
+
+    Example:
+        ```python
+        monitor = NodeMonitor({"eu": eu_client, "us": us_client}, interval=15)
+        monitor.subscribe(lambda event: print(event))
+        monitor.start()
+        ```
+    """
+
+    UNHEALTHY = frozenset(("error",))
+
+    def __init__(
+        self,
+        panels: Union["sarban.SARBAN", Dict[str, "sarban.SARBAN"]],
+        interval: float = 30,
+        reconnect: bool = True,
+        backoff: Optional[RetryPolicy] = None,
+        failure_threshold: int = 5,
+        cooldown: float = 600,
+        connecting_timeout: float = 120,
+        workers: int = 4
+    ) -> None:
+        self.panels = dict(panels) if isinstance(panels, dict) else {"default": panels}
+        self.interval = interval
+        self.reconnect = reconnect
+        self.backoff = backoff or RetryPolicy(backoff=10, max_backoff=300)
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.connecting_timeout = connecting_timeout
+
+        self._nodes = {}
+        self._callbacks = []
+        self._lock = threading.RLock()
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def subscribe(self, callback: Callable[[NodeEvent], Any]) -> None:
+        """Call ``callback`` with every `NodeEvent`, from the monitor's threads."""
+        self._callbacks.append(callback)
+
+    def _emit(self, events: List[NodeEvent], event: NodeEvent) -> None:
+        events.append(event)
+
+    def _notify(self, events: List[NodeEvent]) -> None:
+        # Called without the lock held, so slow callbacks don't stall the workers
+        for event in events:
+            for callback in self._callbacks:
+                try:
+                    callback(event)
+                except Exception:
+                    logger.exception("NodeMonitor callback failed for %r", event)
+
+    def _failing(self, state: _NodeState, now: float) -> bool:
+        if state.status in self.UNHEALTHY:
+            return True
+        return state.status == "connecting" and now - state.since >= self.connecting_timeout
+
+    def _update(self, panel: str, nodes: List[dict], now: float, events: List[NodeEvent]) -> None:
+        seen = set()
+        for node in nodes:
+            key = (panel, node["id"])
+            seen.add(key)
+            state = self._nodes.get(key)
+            if state is None:
+                state = self._nodes[key] = _NodeState(node["name"], node["status"], now)
+            elif state.status != node["status"]:
+                previous, state.status, state.since = state.status, node["status"], now
+                self._emit(events, NodeEvent(
+                    "status", panel, node["id"], node["name"], state.status, previous
+                ))
+            state.name = node["name"]
+            state.message = node.get("message")
+
+            if state.status == "connected" or state.status == "disabled":
+                if state.open_until is not None:
+                    self._emit(events, NodeEvent(
+                        "circuit_closed", panel, node["id"], state.name, state.status
+                    ))
+                state.attempts = 0
+                state.next_attempt = state.open_until = None
+            elif not self._failing(state, now):
+                # e.g. back to "connecting" within connecting_timeout: nothing to retry
+                if state.open_until is None:
+                    state.attempts = 0
+                state.next_attempt = None
+            elif self.reconnect and state.next_attempt is None:
+                if state.open_until is None:
+                    state.next_attempt = now + self.backoff.delay(state.attempts + 1)
+                elif now >= state.open_until:
+                    # Half open: one attempt, which reopens the circuit on failure
+                    state.attempts = self.failure_threshold - 1
+                    state.open_until = None
+                    state.next_attempt = now
+
+        for key in [key for key in self._nodes if key[0] == panel and key not in seen]:
+            del self._nodes[key]
+
+    def _reconnect(self, panel: str, node_id: int, events: List[NodeEvent]) -> None:
+        error = None
+        try:
+            self.panels[panel].reconnect_node(node_id)
+        except Exception as e:
+            error = e
+
+        now = time.monotonic()
+        emitted = []
+        with self._lock:
+            state = self._nodes.get((panel, node_id))
+            if state is None:
+                return
+            state.attempts += 1
+            self._emit(emitted, NodeEvent("reconnect", panel, node_id, state.name, state.status, error=error))
+            if not self._failing(state, now):
+                state.next_attempt = None
+            elif state.attempts >= self.failure_threshold:
+                state.next_attempt = None
+                state.open_until = now + self.cooldown
+                self._emit(emitted, NodeEvent("circuit_open", panel, node_id, state.name, state.status))
+            else:
+                state.next_attempt = now + self.backoff.delay(state.attempts + 1)
+        events.extend(emitted)
+        self._notify(emitted)
+
+    def _due(self, now: float) -> List[Tuple[str, int]]:
+        due = []
+        with self._lock:
+            for key, state in self._nodes.items():
+                if state.next_attempt is None or state.next_attempt > now:
+                    continue
+                if not self._failing(state, now):
+                    state.next_attempt = None
+                    continue
+                state.next_attempt = float("inf")  # claimed until the attempt is done
+                due.append(key)
+        return due
+
+    def run_reconnects(self) -> List[NodeEvent]:
+        """Send the reconnects that are due, concurrently.
+
+        Returns:
+            `~List[NodeEvent]`: The events of this step.
+        """
+        events = []
+        futures = [
+            self._executor.submit(self._reconnect, panel, node_id, events)
+            for panel, node_id in self._due(time.monotonic())
+        ]
+        for future in futures:
+            future.result()
+        return events
+
+    def poll(self) -> List[NodeEvent]:
+        """Poll every panel once, then send the reconnects that are due.
+
+        Can be called directly, e.g. from a cron job, instead of `start`.
+
+        Returns:
+            `~List[NodeEvent]`: The events of this round.
+        """
+        events = []
+        futures = {
+            name: self._executor.submit(client.get_nodes)
+            for name, client in self.panels.items()
+        }
+        for name, future in futures.items():
+            emitted = []
+            try:
+                nodes = future.result()
+            except Exception as e:
+                self._emit(emitted, NodeEvent("poll_failed", name, error=e))
+            else:
+                with self._lock:
+                    self._update(name, nodes, time.monotonic(), emitted)
+            events.extend(emitted)
+            self._notify(emitted)
+
+        events.extend(self.run_reconnects())
+        return events
+
+    def _next_attempt(self) -> Optional[float]:
+        with self._lock:
+            pending = [s.next_attempt for s in self._nodes.values() if s.next_attempt is not None]
+        return min(pending) if pending else None
+
+    def _run(self) -> None:
+        next_poll = time.monotonic()
+        while not self._stop.is_set():
+            now = time.monotonic()
+            if now >= next_poll:
+                try:
+                    self.poll()
+                except Exception:
+                    logger.exception("NodeMonitor poll failed")
+                next_poll = now + self.interval
+            else:
+                self.run_reconnects()
+
+            wake = next_poll
+            attempt = self._next_attempt()
+            if attempt is not None:
+                wake = min(wake, attempt)
+            self._stop.wait(max(wake - time.monotonic(), 0.01))
+
+    def start(self) -> None:
+        """Start polling in a background thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sarban-node-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the background thread started by `start`."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def close(self) -> None:
+        """Stop polling and release the worker threads."""
+        self.stop()
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> "NodeMonitor":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def states(self) -> Dict[Tuple[str, int], Dict[str, Any]]:
+        """Return the last known state of every node, keyed by (panel, node id)."""
+        with self._lock:
+            return {
+                key: {
+                    "name": state.name,
+                    "status": state.status,
+                    "message": state.message,
+                    "reconnect_attempts": state.attempts,
+                    "circuit_open": state.open_until is not None,
+                }
+                for key, state in self._nodes.items()
+            }
@@ -0,0 +1,351 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class RateLimiter:
+    """Thread-safe token bucket limiting how many calls are made per second.
+
+    Parameters:
+        rate (``float``):
+            Number of calls allowed per second
+
+        burst (``int``, optional):
+            Number of calls that may be made back to back before the rate
+            applies. Defaults to 1.
+    """
+
+    def __init__(self, rate: float, burst: Optional[int] = None) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be greater than 0")
+
+        self.rate = rate
+        self.burst = burst or 1
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take one token and return how long the caller has to wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self) -> None:
+        """Block until a call is allowed."""
+        delay = self._reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def acquire_async(self) -> None:
+        """Wait without blocking the event loop until a call is allowed."""
+        delay = self._reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+
+class SharedRateLimiter(RateLimiter):
+    """Token bucket whose state lives in a local file shared by several processes.
+
+    Every process using the same ``path`` draws from the same bucket. The file
+    is locked with ``fcntl.flock``, so this limiter is only available on POSIX
+    systems. It shares the request rate only; concurrency caps such as
+    `Limit`'s ``max_in_flight`` remain per process.
+
+    Parameters:
+        rate (``float``):
+            Number of calls allowed per second across all processes
+
+        path (``str``):
+            File holding the bucket state, created if missing
+
+        burst (``int``, optional):
+            Number of calls that may be made back to back. Defaults to 1.
+    """
+
+    def __init__(self, rate: float, path: str, burst: Optional[int] = None) -> None:
+        if fcntl is None:
+            raise RuntimeError("SharedRateLimiter requires fcntl (POSIX only)")
+
+        super().__init__(rate, burst)
+        self.path = path
+
+    def _reserve(self) -> float:
+        with self._lock, open(self.path, "a+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                state = f.read().split()
+                now = time.time()
+                if len(state) == 2:
+                    tokens, updated = float(state[0]), float(state[1])
+                    tokens = min(self.burst, tokens + (now - updated) * self.rate)
+                else:
+                    tokens = float(self.burst)
+                tokens -= 1
+                f.seek(0)
+                f.truncate()
+                f.write(f"{tokens} {now}")
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+        if tokens >= 0:
+            return 0.0
+        return -tokens / self.rate
+
+
+# Endpoint group of a request, keyed by the first segment of its path
+ENDPOINT_GROUPS = {
+    "user": "users",
+    "users": "users",
+    "node": "nodes",
+    "nodes": "nodes",
+    "core": "core",
+    "admin": "admins",
+    "admins": "admins",
+    "system": "system",
+    "inbounds": "system",
+    "hosts": "system",
+    "user_template": "templates",
+}
+
+
+def endpoint_group(path: str, prefix: str = "api") -> str:
+    """Return the endpoint group ("users", "nodes", "core", ...) of a request path."""
+    if prefix == "sub":
+        return "subscription"
+    return ENDPOINT_GROUPS.get(path.split("/", 1)[0], "default")
+
+
+class Limit:
+    """Limits applied to one endpoint group of a `Governor`.
+
+    Parameters:
+        rate (``float``, optional):
+            Requests per second. Defaults to no rate limit.
+
+        burst (``int``, optional):
+            Requests that may be sent back to back. Defaults to 1.
+
+        max_in_flight (``int``, optional):
+            Maximum number of concurrent requests of this process, across its
+            threads and event loops. Defaults to no limit.
+
+        shared_path (``str``, optional):
+            Share the rate limit with other processes through this file,
+            see `SharedRateLimiter`. Only the rate is shared: ``max_in_flight``
+            stays a per-process cap. Defaults to a per-process limit.
+    """
+
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        burst: Optional[int] = None,
+        max_in_flight: Optional[int] = None,
+        shared_path: Optional[str] = None
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+        self.shared_path = shared_path
+
+
+class _Slots:
+    """Counting semaphore shared by threads and event loops.
+
+    A released slot is handed straight to the longest waiting caller, a thread
+    blocked in `acquire` or a task awaiting `acquire_async` on any loop, so
+    waiters are woken exactly when a slot frees up instead of polling.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.free = size
+        self._waiters = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        with self._lock:
+            if self.free > 0:
+                self.free -= 1
+                return
+            waiter = threading.Event()
+            self._waiters.append(waiter)
+        waiter.wait()
+
+    async def acquire_async(self) -> None:
+        loop = asyncio.get_event_loop()
+        with self._lock:
+            if self.free > 0:
+                self.free -= 1
+                return
+            future = loop.create_future()
+            waiter = (loop, future)
+            self._waiters.append(waiter)
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass  # already granted; _grant hands it on if still pending
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def _grant(self, future: "asyncio.Future") -> None:
+        if future.done():
+            self.release()  # cancelled meanwhile
+        else:
+            future.set_result(None)
+
+    def release(self) -> None:
+        with self._lock:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                if isinstance(waiter, threading.Event):
+                    waiter.set()
+                    return
+                loop, future = waiter
+                if not loop.is_closed():
+                    loop.call_soon_threadsafe(self._grant, future)
+                    return
+            self.free += 1
+
+
+class _Group:
+    def __init__(self, limit: Limit) -> None:
+        self.limiter = None
+        if limit.rate and limit.shared_path:
+            self.limiter = SharedRateLimiter(limit.rate, limit.shared_path, limit.burst)
+        elif limit.rate:
+            self.limiter = RateLimiter(limit.rate, limit.burst)
+        self.semaphore = _Slots(limit.max_in_flight) if limit.max_in_flight else None
+        self.waiting = 0
+        self.in_flight = 0
+        self.lock = threading.Lock()
+
+
+class Governor:
+    """Client-side rate limiter and concurrency governor for a `SARBAN` transport.
+
+    Requests are sorted into endpoint groups (see `endpoint_group`) and each
+    group may cap its request rate and the number of requests in flight. A
+    group without its own `Limit` uses the "default" one, if any. The same
+    governor works for threads and asyncio tasks, and may be shared by several
+    clients talking to one panel.
+
+    Parameters:
+        limits (``Dict[str, Limit]``):
+            Limits per group name ("users", "nodes", "core", "admins",
+            "system", "templates", "subscription" or "default")
+
+    Example:
+        ```python
+        governor = Governor({
+            "users": Limit(rate=20, burst=40, max_in_flight=8),
+            "nodes": Limit(rate=2),
+            "default": Limit(max_in_flight=16),
+        })
+        sb = SARBAN("https://panel.example.com", governor=governor)
+        ```
+    """
+
+    def __init__(self, limits: Dict[str, Limit]) -> None:
+        self._groups = {name: _Group(limit) for name, limit in limits.items()}
+
+    def _group(self, path: str, prefix: str) -> Optional[_Group]:
+        group = self._groups.get(endpoint_group(path, prefix))
+        return group if group is not None else self._groups.get("default")
+
+    def acquire(self, path: str, prefix: str = "api") -> Optional[_Group]:
+        """Block until a request to ``path`` may be sent.
+
+        Returns:
+            The group to hand back to `release` once the request is done.
+        """
+        group = self._group(path, prefix)
+        if group is None:
+            return None
+
+        with group.lock:
+            group.waiting += 1
+        try:
+            if group.semaphore is not None:
+                group.semaphore.acquire()
+            try:
+                if group.limiter is not None:
+                    group.limiter.acquire()
+            except BaseException:
+                if group.semaphore is not None:
+                    group.semaphore.release()
+                raise
+        finally:
+            with group.lock:
+                group.waiting -= 1
+
+        with group.lock:
+            group.in_flight += 1
+        return group
+
+    async def acquire_async(self, path: str, prefix: str = "api") -> Optional[_Group]:
+        """Async counterpart of `acquire` that never blocks the event loop."""
+        group = self._group(path, prefix)
+        if group is None:
+            return None
+
+        with group.lock:
+            group.waiting += 1
+        try:
+            if group.semaphore is not None:
+                await group.semaphore.acquire_async()
+            try:
+                if group.limiter is not None:
+                    await group.limiter.acquire_async()
+            except BaseException:
+                if group.semaphore is not None:
+                    group.semaphore.release()
+                raise
+        finally:
+            with group.lock:
+                group.waiting -= 1
+
+        with group.lock:
+            group.in_flight += 1
+        return group
+
+    @staticmethod
+    def release(group: Optional[_Group]) -> None:
+        """Mark a request started with `acquire` or `acquire_async` as done."""
+        if group is None:
+            return
+        with group.lock:
+            group.in_flight -= 1
+        if group.semaphore is not None:
+            group.semaphore.release()
+
+    def queue_depth(self, group: Optional[str] = None) -> int:
+        """Number of requests waiting for a slot, in one group or in all of them."""
+        if group is not None:
+            return self._groups[group].waiting if group in self._groups else 0
+        return sum(g.waiting for g in self._groups.values())
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Return the number of ``waiting`` and ``in_flight`` requests per group."""
+        return {
+            name: {"waiting": g.waiting, "in_flight": g.in_flight}
+            for name, g in self._groups.items()
+        }
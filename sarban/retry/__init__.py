@@ -0,0 +1,106 @@
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Iterable, Optional
+
+
+class RetryPolicy:
+    """When and how long to wait before retrying a failed request.
+
+    Connection errors and the ``statuses`` responses are retried with
+    exponential backoff and full jitter; a ``Retry-After`` header sent by the
+    panel takes precedence over the computed delay.
+
+    GET, PUT and DELETE are idempotent and retried by default. POST requests
+    are only retried when they are marked idempotent, either by the caller or
+    through ``idempotent_posts``, or when they carry a conflict check (see
+    `Base.request`).
+
+    Parameters:
+        retries (``int``, optional):
+            Maximum number of retries after the first attempt. Defaults to 3.
+
+        backoff (``float``, optional):
+            Base delay in seconds, doubled on every retry. Defaults to 0.5.
+
+        max_backoff (``float``, optional):
+            Upper bound of a single delay in seconds, including ``Retry-After``.
+            Defaults to 30.
+
+        jitter (``bool``, optional):
+            Whether to randomize delays between 0 and the computed backoff.
+            Defaults to True.
+
+        statuses (``Iterable[int]``, optional):
+            Response status codes that are retried. Defaults to 429, 502, 503, 504.
+
+        idempotent_posts (``Iterable[str]``, optional):
+            Prefixes of POST paths (relative to /api/) that are safe to retry,
+            e.g. ``("core/restart", "node/")``. Defaults to none.
+    """
+
+    IDEMPOTENT_METHODS = frozenset(("GET", "PUT", "DELETE"))
+    UNKNOWN_OUTCOME_STATUSES = frozenset((504,))
+
+    def __init__(
+        self,
+        retries: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 30,
+        jitter: bool = True,
+        statuses: Iterable[int] = (429, 502, 503, 504),
+        idempotent_posts: Iterable[str] = ()
+    ) -> None:
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.statuses = frozenset(statuses)
+        self.idempotent_posts = tuple(idempotent_posts)
+
+    def is_idempotent(self, method: str, path: str, idempotent: Optional[bool] = None) -> bool:
+        """Whether a request may be sent more than once."""
+        if idempotent is not None:
+            return idempotent
+        if method in self.IDEMPOTENT_METHODS:
+            return True
+        return path.startswith(self.idempotent_posts) if self.idempotent_posts else False
+
+    def is_retryable(self, response: Any) -> bool:
+        """Whether a response is a transient failure worth retrying."""
+        return response.status_code in self.statuses
+
+    def is_outcome_unknown(self, response: Any) -> bool:
+        """Whether a failed attempt may have been applied by the panel anyway.
+
+        True when the connection dropped or timed out (``response`` is None)
+        or a gateway timed out waiting for the panel; a definite error
+        response means the request was not applied.
+        """
+        return response is None or response.status_code in self.UNKNOWN_OUTCOME_STATUSES
+
+    def delay(self, attempt: int, response: Any = None) -> float:
+        """Seconds to wait before retry number ``attempt`` (starting at 1)."""
+        if response is not None:
+            retry_after = self._retry_after(response)
+            if retry_after is not None:
+                return min(retry_after, self.max_backoff)
+
+        delay = min(self.backoff * (2 ** (attempt - 1)), self.max_backoff)
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+    @staticmethod
+    def _retry_after(response: Any) -> Optional[float]:
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError, IndexError):
+            return None
@@ -1,3 +1,13 @@
+import threading
+from typing import Any, Iterable, Optional, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from sarban.cache import ResponseCache, SubscriptionCache
+from sarban.metrics import Metrics
+from sarban.ratelimit import Governor
+from sarban.retry import RetryPolicy
 from sarban.methods import Methods
 
 
@@ -6,16 +16,20 @@ class SARBAN(Methods):
     
     This class provides all methods for managing Marzban panel including
     admin management, user management, node management, and more.
+
+    Every instance owns a pooled HTTP session, so TCP connections and TLS
+    handshakes are reused across calls. Close it with `close()` or use the
+    client as a context manager.
     
     Example:
         ```python
         from sarban import SARBAN
         
-        sb = SARBAN(
+        with SARBAN(
             full_address="https://panel.example.com:2087",
             https=True
-        )
-        sb.login("admin", "password")
+        ) as sb:
+            sb.login("admin", "password")
         ```
     """
     
@@ -23,6 +37,16 @@ class SARBAN(Methods):
         self,
         full_address: str,
         https: bool = True,
+        timeout: float = 30,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        pool_block: bool = False,
+        cache: Union[bool, ResponseCache] = False,
+        retry: Optional[Union[bool, RetryPolicy]] = None,
+        governor: Optional[Governor] = None,
+        subscription_cache: Union[bool, SubscriptionCache] = False,
+        metrics: Union[bool, Metrics] = False,
+        middleware: Iterable[Any] = (),
     ) -> None:
         """Initialize SARBAN client.
         
@@ -32,6 +56,50 @@ class SARBAN(Methods):
                 
             https (``bool``, optional):
                 Whether to use HTTPS. Defaults to True.
+
+            timeout (``float``, optional):
+                Timeout of each request in seconds. Defaults to 30.
+
+            pool_connections (``int``, optional):
+                Number of per-host connection pools to keep. Defaults to 10.
+
+            pool_maxsize (``int``, optional):
+                Maximum number of kept-alive connections per host. Defaults to 10.
+
+            pool_block (``bool``, optional):
+                Whether to block when all connections of a host are busy instead
+                of opening extra, non-pooled connections. Turning this on makes
+                ``pool_maxsize`` a hard per-host limit. Defaults to False.
+
+            cache (``bool | ResponseCache``, optional):
+                Response cache of read-only endpoints (system stats, inbounds,
+                hosts, nodes, core config, user templates). Pass True for the
+                default TTLs or a configured `ResponseCache`. Defaults to False.
+
+            retry (``bool | RetryPolicy``, optional):
+                Retry policy for connection errors and 429/502/503/504 responses.
+                True uses the default `RetryPolicy`. Defaults to None: requests
+                are sent once and failures are raised.
+
+            governor (`~sarban.ratelimit.Governor`, optional):
+                Client-side rate limits and in-flight caps per endpoint group.
+                Can be shared by several clients of the same panel. Defaults to none.
+
+            subscription_cache (``bool | SubscriptionCache``, optional):
+                Cache of subscription contents revalidated with conditional
+                requests. Pass True for the defaults or a configured
+                `SubscriptionCache`. Defaults to False.
+
+            metrics (``bool | Metrics``, optional):
+                Per-endpoint latency histograms, status and error counts, bytes
+                in/out, retries and cache hits. Pass True for the defaults or a
+                configured (possibly shared) `~sarban.metrics.Metrics`.
+                Defaults to False.
+
+            middleware (``Iterable[Middleware]``, optional):
+                `~sarban.middleware.Middleware` objects or functions wrapping
+                every request, the first one outermost. More can be added
+                with `use`. Defaults to none.
         """
         super().__init__()
 
@@ -40,4 +108,46 @@ class SARBAN(Methods):
             self.full_address = f"{'https' if https else 'http'}://{self.full_address}"
         
         self.https = https
+        self.timeout = timeout
         self.token = None
+        self.token_expires_at = None
+        self.token_refresh_at = None
+        self._credentials = None
+        self._headers = None
+        self._base_urls = {
+            "api": f"{self.full_address}/api/",
+            "sub": f"{self.full_address}/sub/"
+        }
+        self._token_lock = threading.Lock()
+        self.cache = ResponseCache() if cache is True else (cache or None)
+        self.retry = RetryPolicy() if retry is True else (retry or None)
+        self.governor = governor
+        self.subscription_cache = (
+            SubscriptionCache() if subscription_cache is True else (subscription_cache or None)
+        )
+        self.metrics = Metrics() if metrics is True else (metrics or None)
+        self.middleware = []
+        self._chain = None
+        if middleware:
+            self.use(*middleware)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._send_settings = None
+        self._send_settings_key = None
+
+    def close(self) -> None:
+        """Close the pooled session and release all kept-alive connections."""
+        self.session.close()
+
+    def __enter__(self) -> "SARBAN":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
@@ -1,3 +1,37 @@
+import functools
+import re
+from typing import Iterable, Iterator, Optional
+
+from sarban.sub_gen.render import (
+    CLIENT_TYPES,
+    parse_link,
+    render_clash,
+    render_singbox,
+    render_subscription,
+    render_v2ray,
+    subscription_headers
+)
+
+
+def sub_base(fullAddress: str, verify: bool = False, path: str = "sub") -> str:
+    """Return the normalized subscription prefix of a server, e.g. "https://sub.example.com/sub/".
+
+    Parameters:
+        fullAddress (``str``):
+            Full address of subscription server (e.g., "sub.example.com:2096")
+
+        verify (``bool``, optional):
+            Whether to use HTTPS when the address has no scheme. Defaults to False.
+
+        path (``str``, optional):
+            Subscription path of the panel. Defaults to "sub".
+    """
+    address = fullAddress.rstrip('/')
+    if not address.startswith(('http://', 'https://')):
+        address = f"{'https' if verify else 'http'}://{address}"
+    return f"{address}/{path.strip('/')}/"
+
+
 def sub_generator(userToken: str, fullAddress: str, verify: bool = False) -> str:
     """Generate subscription link for user.
     
@@ -14,11 +48,102 @@ def sub_generator(userToken: str, fullAddress: str, verify: bool = False) -> str
     Returns:
         `~str`: Generated subscription URL.
     """
-    protocol = 'https' if verify else "http"
-    address = fullAddress.rstrip('/')
-    if not address.startswith(('http://', 'https://')):
-        address = f"{protocol}://{address}"
-    else:
-        address = address
-    
-    return f"{address}/sub/{userToken}/"
+    return f"{sub_base(fullAddress, verify)}{userToken}/"
+
+
+def sub_links(
+    tokens: Iterable[str],
+    fullAddress: str,
+    verify: bool = False,
+    path: str = "sub"
+) -> Iterator[str]:
+    """Generate the subscription links of many tokens.
+
+    The address is normalized once and links are built lazily, so millions
+    of tokens can be streamed through without holding them in memory.
+
+    Parameters:
+        tokens (``Iterable[str]``):
+            User subscription tokens
+
+        fullAddress (``str``):
+            Full address of subscription server (e.g., "sub.example.com:2096")
+
+        verify (``bool``, optional):
+            Whether to use HTTPS. Defaults to False.
+
+        path (``str``, optional):
+            Subscription path of the panel. Defaults to "sub".
+
+    Returns:
+        `~Iterator[str]`: One subscription URL per token, in order.
+    """
+    base = sub_base(fullAddress, verify, path)
+    return (f"{base}{token}/" for token in tokens)
+
+
+@functools.lru_cache(maxsize=16)
+def _token_search(path: str):
+    search = re.compile(rf"/{re.escape(path.strip('/'))}/([^/?#]+)(.*)", re.S).search
+
+    def match(url: Optional[str]):
+        if not url:
+            return None
+        # Skip the scheme and host so a host named like the path is not matched
+        scheme = url.find("://")
+        start = url.find("/", scheme + 3) if scheme != -1 else 0
+        return search(url, start) if start != -1 else None
+
+    return match
+
+
+def extract_token(subscription_url: Optional[str], path: str = "sub") -> Optional[str]:
+    """Return the token of a subscription URL ("https://host/sub/<token>/"), None if it has none.
+
+    Relative URLs such as "/sub/<token>" are accepted too.
+    """
+    match = _token_search(path)(subscription_url)
+    return match.group(1) if match else None
+
+
+def extract_tokens(urls: Iterable[Optional[str]], path: str = "sub") -> Iterator[Optional[str]]:
+    """Stream the tokens of many subscription URLs, None for URLs without one."""
+    search = _token_search(path)
+    for url in urls:
+        match = search(url)
+        yield match.group(1) if match else None
+
+
+def rewrite_sub_links(
+    urls: Iterable[str],
+    fullAddress: str,
+    verify: bool = False,
+    path: str = "sub"
+) -> Iterator[str]:
+    """Move subscription links to another address, e.g. after a domain change.
+
+    The token and anything after it (client type, query) are kept. URLs
+    without a token are yielded unchanged so the output stays aligned with
+    the input.
+
+    Parameters:
+        urls (``Iterable[str]``):
+            Current subscription URLs
+
+        fullAddress (``str``):
+            New address of the subscription server
+
+        verify (``bool``, optional):
+            Whether to use HTTPS. Defaults to False.
+
+        path (``str``, optional):
+            Subscription path, both old and new. Defaults to "sub".
+
+    Returns:
+        `~Iterator[str]`: One rewritten URL per input URL, in order.
+    """
+    base = sub_base(fullAddress, verify, path)
+    search = _token_search(path)
+    for url in urls:
+        match = search(url)
+        yield f"{base}{match.group(1)}{match.group(2)}" if match else url
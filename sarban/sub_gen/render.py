@@ -0,0 +1,337 @@
+import base64
+import binascii
+import functools
+import json
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import parse_qs, unquote, urlsplit
+
+
+# Client types that can be rendered locally
+CLIENT_TYPES = ("v2ray", "clash", "clash-meta", "sing-box")
+
+
+def _b64decode(value: str) -> bytes:
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+
+
+def _alpn(value: Optional[str]) -> List[str]:
+    return [a for a in value.split(",") if a] if value else []
+
+
+@functools.lru_cache(maxsize=65536)
+def parse_link(link: str) -> Optional[Dict[str, Any]]:
+    """Parse a vmess, vless, trojan or shadowsocks share link.
+
+    Returns:
+        `~Dict`: The link's settings with protocol independent keys
+        (``protocol``, ``remark``, ``address``, ``port``, ``network``,
+        ``security``, ``sni``, ``host``, ``path``...), or None for an
+        unsupported or malformed link. Results are memoized, so they must not be modified.
+    """
+    scheme, sep, rest = link.strip().partition("://")
+    if not sep:
+        return None
+
+    if scheme == "vmess":
+        try:
+            data = json.loads(_b64decode(rest))
+        except (ValueError, binascii.Error, UnicodeDecodeError):
+            return None
+        if not isinstance(data, dict):
+            return None
+        return {
+            "protocol": "vmess",
+            "remark": data.get("ps", ""),
+            "address": data.get("add"),
+            "port": int(data.get("port") or 0),
+            "id": data.get("id"),
+            "alter_id": int(data.get("aid") or 0),
+            "network": data.get("net") or "tcp",
+            "header_type": data.get("type") or "",
+            "security": data.get("tls") or "none",
+            "sni": data.get("sni") or "",
+            "host": data.get("host") or "",
+            "path": data.get("path") or "",
+            "service_name": (data.get("path") or "") if data.get("net") == "grpc" else "",
+            "fp": data.get("fp") or "",
+            "alpn": _alpn(data.get("alpn")),
+            "allow_insecure": bool(data.get("allowInsecure")),
+        }
+
+    if scheme not in ("vless", "trojan", "ss"):
+        return None
+
+    url = urlsplit(link.strip())
+    query = {k: v[0] for k, v in parse_qs(url.query).items()}
+    settings = {
+        "protocol": "shadowsocks" if scheme == "ss" else scheme,
+        "remark": unquote(url.fragment),
+        "address": url.hostname,
+        "port": url.port or 0,
+        "network": query.get("type") or "tcp",
+        "header_type": query.get("headerType", ""),
+        "security": query.get("security") or "none",
+        "sni": query.get("sni", ""),
+        "host": query.get("host", ""),
+        "path": query.get("path", ""),
+        "service_name": query.get("serviceName", ""),
+        "fp": query.get("fp", ""),
+        "alpn": _alpn(query.get("alpn")),
+        "allow_insecure": query.get("allowInsecure") in ("1", "true"),
+        "pbk": query.get("pbk", ""),
+        "sid": query.get("sid", ""),
+        "flow": query.get("flow", ""),
+    }
+    if scheme == "vless":
+        settings["id"] = unquote(url.username or "")
+    elif scheme == "trojan":
+        settings["password"] = unquote(url.username or "")
+    else:
+        try:
+            userinfo = _b64decode(unquote(url.username or "")).decode()
+        except (ValueError, binascii.Error, UnicodeDecodeError):
+            return None
+        method, _, password = userinfo.partition(":")
+        settings["method"] = method
+        settings["password"] = password
+    return settings
+
+
+def _unique_names(proxies: Iterable[Dict[str, Any]]) -> Iterable[tuple]:
+    seen = {}
+    for proxy in proxies:
+        name = proxy["remark"]
+        count = seen.get(name, 0)
+        seen[name] = count + 1
+        yield (f"{name} ({count})" if count else name), proxy
+
+
+def _clash_proxy(name: str, p: Dict[str, Any], meta: bool) -> Optional[Dict[str, Any]]:
+    protocol = p["protocol"]
+    if not meta and (protocol == "vless" or p["security"] == "reality"):
+        return None
+
+    node = {
+        "name": name,
+        "type": "ss" if protocol == "shadowsocks" else protocol,
+        "server": p["address"],
+        "port": p["port"],
+    }
+    network = p["network"]
+    if network == "tcp" and p["header_type"] == "http":
+        node["network"] = "http"
+        node["http-opts"] = {"path": [p["path"] or "/"]}
+        if p["host"]:
+            node["http-opts"]["headers"] = {"Host": [p["host"]]}
+    elif network == "ws":
+        node["network"] = "ws"
+        node["ws-opts"] = {"path": p["path"] or "/"}
+        if p["host"]:
+            node["ws-opts"]["headers"] = {"Host": p["host"]}
+    elif network == "grpc":
+        node["network"] = "grpc"
+        node["grpc-opts"] = {"grpc-service-name": p["service_name"]}
+    elif network in ("h2", "http"):
+        node["network"] = "h2"
+        node["h2-opts"] = {"path": p["path"] or "/"}
+        if p["host"]:
+            node["h2-opts"]["host"] = [p["host"]]
+    node["udp"] = True
+
+    if p["security"] in ("tls", "reality"):
+        node["tls"] = True
+        if p["sni"]:
+            node["sni" if protocol == "trojan" else "servername"] = p["sni"]
+        if p["alpn"]:
+            node["alpn"] = p["alpn"]
+        if p["allow_insecure"]:
+            node["skip-cert-verify"] = True
+        if meta and p["fp"]:
+            node["client-fingerprint"] = p["fp"]
+        if p["security"] == "reality":
+            node["reality-opts"] = {"public-key": p["pbk"], "short-id": p["sid"]}
+
+    if protocol == "vmess":
+        node.update({"uuid": p["id"], "alterId": p["alter_id"], "cipher": "auto"})
+    elif protocol == "vless":
+        node["uuid"] = p["id"]
+        if p["flow"]:
+            node["flow"] = p["flow"]
+    elif protocol == "trojan":
+        node["password"] = p["password"]
+    else:
+        node.update({"cipher": p["method"], "password": p["password"]})
+    return node
+
+
+_scalar = json.JSONEncoder(ensure_ascii=False).encode
+
+
+def _yaml(value: Any, indent: int = 0) -> List[str]:
+    """Emit block style YAML; scalars are written as JSON, which YAML accepts."""
+    pad = " " * indent
+    lines = []
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if isinstance(item, (dict, list)) and item:
+                lines.append(f"{pad}{key}:")
+                lines.extend(_yaml(item, indent + 2))
+            else:
+                lines.append(f"{pad}{key}: {_scalar(item)}")
+    else:
+        for item in value:
+            if isinstance(item, (dict, list)) and item:
+                nested = _yaml(item, indent + 2)
+                lines.append(f"{pad}- {nested[0].lstrip()}")
+                lines.extend(nested[1:])
+            else:
+                lines.append(f"{pad}- {_scalar(item)}")
+    return lines
+
+
+def render_clash(links: Iterable[str], meta: bool = False) -> str:
+    """Render a Clash (or Clash Meta with ``meta=True``) YAML config from share links."""
+    proxies = []
+    for name, settings in _unique_names(filter(None, map(parse_link, links))):
+        node = _clash_proxy(name, settings, meta)
+        if node is not None:
+            proxies.append(node)
+
+    names = [node["name"] for node in proxies]
+    config = {
+        "mode": "rule",
+        "proxies": proxies,
+        "proxy-groups": [{"name": "PROXY", "type": "select", "proxies": names}],
+        "rules": ["MATCH,PROXY"],
+    }
+    return "\n".join(_yaml(config)) + "\n"
+
+
+def _singbox_outbound(name: str, p: Dict[str, Any]) -> Dict[str, Any]:
+    protocol = p["protocol"]
+    outbound = {"type": protocol, "tag": name, "server": p["address"], "server_port": p["port"]}
+
+    if protocol == "vmess":
+        outbound.update({"uuid": p["id"], "alter_id": p["alter_id"], "security": "auto"})
+    elif protocol == "vless":
+        outbound["uuid"] = p["id"]
+        if p["flow"]:
+            outbound["flow"] = p["flow"]
+    elif protocol == "trojan":
+        outbound["password"] = p["password"]
+    else:
+        outbound.update({"method": p["method"], "password": p["password"]})
+
+    if p["security"] in ("tls", "reality"):
+        tls = {"enabled": True, "server_name": p["sni"], "insecure": p["allow_insecure"]}
+        if p["alpn"]:
+            tls["alpn"] = p["alpn"]
+        if p["fp"]:
+            tls["utls"] = {"enabled": True, "fingerprint": p["fp"]}
+        if p["security"] == "reality":
+            tls["reality"] = {"enabled": True, "public_key": p["pbk"], "short_id": p["sid"]}
+        outbound["tls"] = tls
+
+    network = p["network"]
+    if network == "ws":
+        outbound["transport"] = {"type": "ws", "path": p["path"] or "/"}
+        if p["host"]:
+            outbound["transport"]["headers"] = {"Host": p["host"]}
+    elif network == "grpc":
+        outbound["transport"] = {"type": "grpc", "service_name": p["service_name"]}
+    elif network == "httpupgrade":
+        outbound["transport"] = {"type": "httpupgrade", "path": p["path"] or "/", "host": p["host"]}
+    elif network in ("h2", "http") or p["header_type"] == "http":
+        outbound["transport"] = {"type": "http", "path": p["path"] or "/"}
+        if p["host"]:
+            outbound["transport"]["host"] = [p["host"]]
+    return outbound
+
+
+def render_singbox(links: Iterable[str]) -> str:
+    """Render a sing-box JSON config from share links."""
+    outbounds = [
+        _singbox_outbound(name, settings)
+        for name, settings in _unique_names(filter(None, map(parse_link, links)))
+    ]
+    tags = [outbound["tag"] for outbound in outbounds]
+    config = {
+        "outbounds": [
+            {"type": "selector", "tag": "proxy", "outbounds": ["Best Latency"] + tags},
+            {"type": "urltest", "tag": "Best Latency", "outbounds": tags},
+            *outbounds,
+            {"type": "direct", "tag": "direct"},
+        ]
+    }
+    return json.dumps(config, indent=4, ensure_ascii=False)
+
+
+def render_v2ray(links: Iterable[str]) -> str:
+    """Render a v2ray subscription: the share links, one per line, base64 encoded."""
+    return base64.b64encode("\n".join(links).encode()).decode()
+
+
+def render_subscription(user: Any, client_type: str = "v2ray") -> str:
+    """Render a user's subscription locally instead of downloading it from the panel.
+
+    The share links of `get_client` / `get_users` (``user["links"]``) are
+    the panel's rendering of the user's proxies for its hosts and inbounds,
+    so a cached user (e.g. from `~sarban.mirror.UserMirror`) is all that is
+    needed. The v2ray format matches the panel byte for byte for the same
+    links; Clash and sing-box configs carry the same proxies but use a
+    minimal built-in template instead of the panel's templates.
+
+    Parameters:
+        user (``Dict``):
+            User dict or model with its ``links``
+
+        client_type (``str``, optional):
+            One of "v2ray", "clash", "clash-meta" or "sing-box". Defaults to "v2ray".
+
+    Returns:
+        `~str`: Subscription content.
+    """
+    links = user["links"] or []
+    if client_type == "v2ray":
+        return render_v2ray(links)
+    if client_type in ("clash", "clash-meta"):
+        return render_clash(links, meta=client_type == "clash-meta")
+    if client_type == "sing-box":
+        return render_singbox(links)
+    raise ValueError(f"Unsupported client type: {client_type}")
+
+
+def subscription_headers(
+    user: Any,
+    update_interval: int = 12,
+    profile_title: str = "Subscription",
+    support_url: str = ""
+) -> Dict[str, str]:
+    """Build the response headers the panel sends with a subscription.
+
+    Parameters:
+        user (``Dict``):
+            User dict or model
+
+        update_interval (``int``, optional):
+            Suggested update interval in hours. Defaults to 12.
+
+        profile_title (``str``, optional):
+            Profile title shown by clients. Defaults to "Subscription".
+
+        support_url (``str``, optional):
+            Support URL shown by clients. Defaults to none.
+    """
+    userinfo = {
+        "upload": 0,
+        "download": user["used_traffic"] or 0,
+        "total": user["data_limit"] or 0,
+        "expire": user["expire"] or 0,
+    }
+    return {
+        "content-disposition": f'attachment; filename="{user["username"]}"',
+        "support-url": support_url,
+        "profile-title": "base64:" + base64.b64encode(profile_title.encode()).decode(),
+        "profile-update-interval": str(update_interval),
+        "subscription-userinfo": "; ".join(f"{k}={v}" for k, v in userinfo.items()),
+    }
@@ -0,0 +1,1653 @@
+import asyncio
+import base64
+import copy
+import hashlib
+import json
+import random
+import re
+import secrets
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    from orjson import dumps as _dumps
+except ImportError:
+    def _dumps(value: Any) -> bytes:
+        return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode()
+
+import sarban
+from sarban.sub_gen.render import subscription_headers
+
+
+# Inbounds of a new panel, by protocol
+DEFAULT_INBOUNDS = {
+    "vmess": [{"tag": "VMess TCP", "protocol": "vmess", "network": "tcp", "tls": "none", "port": 8080}],
+    "vless": [{"tag": "VLESS TCP REALITY", "protocol": "vless", "network": "tcp", "tls": "reality", "port": 443}],
+    "trojan": [{"tag": "Trojan Websocket TLS", "protocol": "trojan", "network": "ws", "tls": "tls", "port": 2083}],
+    "shadowsocks": [{"tag": "Shadowsocks TCP", "protocol": "shadowsocks", "network": "tcp", "tls": "none", "port": 1080}],
+}
+
+USER_STATUSES = ("active", "disabled", "limited", "expired", "on_hold")
+RESET_STRATEGIES = ("no_reset", "day", "week", "month", "year")
+CLIENT_TYPES = ("sing-box", "clash-meta", "clash", "outline", "v2ray", "v2ray-json")
+
+_USERNAME = re.compile(r"^\w{3,32}$")
+_TOKEN_HEADER = base64.urlsafe_b64encode(b'{"alg":"HS256","typ":"JWT"}').decode().rstrip("=")
+_REASONS = {
+    200: "OK", 304: "Not Modified", 400: "Bad Request", 401: "Unauthorized", 403: "Forbidden",
+    404: "Not Found", 405: "Method Not Allowed", 409: "Conflict", 422: "Unprocessable Entity",
+    429: "Too Many Requests", 500: "Internal Server Error", 502: "Bad Gateway",
+    503: "Service Unavailable", 504: "Gateway Timeout",
+}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).replace(tzinfo=None).isoformat(timespec="seconds")
+
+
+def _timestamp(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise _PanelError(422, _invalid("query", "date", value, "Input should be a valid datetime"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _check_range(request: "_Request") -> None:
+    """Reject invalid ``start`` / ``end`` dates; usage is not tracked per period."""
+    _timestamp(request.param("start"))
+    _timestamp(request.param("end"))
+
+
+def _invalid(where: str, field: str, value: Any, msg: str) -> List[dict]:
+    return [{"type": "value_error", "loc": [where, field], "msg": msg, "input": value}]
+
+
+class _PanelError(Exception):
+    def __init__(self, status: int, detail: Any) -> None:
+        self.status = status
+        self.detail = detail
+
+
+class _Raw:
+    """A non-JSON answer of a handler."""
+
+    __slots__ = ("status", "content", "content_type", "headers")
+
+    def __init__(
+        self,
+        content: bytes,
+        content_type: str = "text/plain; charset=utf-8",
+        headers: Optional[Dict[str, str]] = None,
+        status: int = 200
+    ) -> None:
+        self.status = status
+        self.content = content
+        self.content_type = content_type
+        self.headers = headers or {}
+
+
+class _Request:
+    __slots__ = ("params", "body", "headers", "admin")
+
+    def __init__(self, params: Dict[str, List[str]], body: Any, headers: Any, admin: Optional[dict]) -> None:
+        self.params = params
+        self.body = body
+        self.headers = headers
+        self.admin = admin
+
+    def param(self, name: str, cast: Callable = str, default: Any = None) -> Any:
+        values = self.params.get(name)
+        if not values:
+            return default
+        try:
+            return cast(values[0])
+        except ValueError:
+            raise _PanelError(422, _invalid("query", name, values[0], f"Input should be a valid {cast.__name__}"))
+
+    def json(self) -> dict:
+        if not isinstance(self.body, dict):
+            raise _PanelError(422, _invalid("body", "", self.body, "Input should be a valid dictionary"))
+        return self.body
+
+
+# (method, path template, handler, public) of every operation, in marzbanDocs.json order
+_ROUTES: List[Tuple[str, str, Callable, bool]] = []
+
+
+def _route(method: str, template: str, public: bool = False) -> Callable:
+    def register(func: Callable) -> Callable:
+        _ROUTES.append((method, template, func, public))
+        return func
+
+    return register
+
+
+def _compile(routes: Iterable[Tuple[str, str, Callable, bool]]) -> Tuple[dict, dict]:
+    """Split routes into an exact-match table and per-method path patterns."""
+    static = {}
+    dynamic = {}
+    for method, template, func, public in routes:
+        if "{" not in template:
+            static[(method, template)] = (func, public)
+            continue
+        pattern = "".join(
+            f"(?P<{part[1:-1]}>[^/]+)" if part.startswith("{") else re.escape(part)
+            for part in re.split(r"(\{\w+\})", template)
+        )
+        dynamic.setdefault(method, []).append(
+            (template.count("{"), -len(template), re.compile(pattern + "$").match, func, public)
+        )
+    # Literal segments win over parameters, e.g. /sub/{token}/info over /sub/{token}/{client_type}
+    for method, entries in dynamic.items():
+        entries.sort(key=lambda entry: entry[:2])
+        dynamic[method] = [entry[2:] for entry in entries]
+    return static, dynamic
+
+
+class FakePanel:
+    """In-memory stand-in for a Marzban panel.
+
+    It implements every operation of ``marzbanDocs.json`` on in-process state
+    (users, admins, nodes, user templates, hosts and core config), so code
+    built on `SARBAN` can be tested without a real panel. Requests reach it
+    through a requests adapter (`client`), an httpx transport (`async_client`)
+    or a localhost HTTP server (`serve`); the in-process transports skip the
+    network entirely and answer tens of thousands of requests per second.
+
+    Authentication, validation and status codes follow the panel: requests
+    need a token from ``admin/token``, non-sudo admins only see their own users
+    and invalid bodies are answered with 422. Traffic and node status are
+    not simulated; use `add_traffic` or edit `nodes` to set them.
+
+    Parameters:
+        username (``str``, optional):
+            Username of the sudo admin that exists from the start. Defaults to "admin".
+
+        password (``str``, optional):
+            Its password. Defaults to "admin".
+
+        latency (``float | Tuple[float, float]``, optional):
+            Seconds added to every answer, fixed or uniformly drawn from a
+            (min, max) range. Defaults to 0.
+
+        error_rate (``float``, optional):
+            Probability of answering any request with ``error_status``
+            instead of handling it. Defaults to 0.
+
+        error_status (``int``, optional):
+            Status of random errors, 0 for a dropped connection. Defaults to 503.
+
+        token_ttl (``float``, optional):
+            Lifetime of access tokens in seconds, None for tokens that never
+            expire. Defaults to one day.
+
+        seed (``int``, optional):
+            Seed of the random latency and errors. Defaults to none.
+
+        spec (``str``, optional):
+            Path of an OpenAPI document such as the repository's
+            ``marzbanDocs.json``. Only its operations are then served, and a
+            `ValueError` is raised if one of them is not implemented.
+
+        subscriptions (``Dict[str, str]``, optional):
+            Subscription bodies by client type ("v2ray", "clash",
+            "clash-meta", "sing-box", "outline", "v2ray-json"), e.g. captured
+            from a real panel. Client types not given are served from
+            `SUBSCRIPTION_FIXTURES`, v2ray as the panel encodes it: the user's
+            share links, one per line, base64 encoded.
+
+        subscription_etags (``bool``, optional):
+            Whether subscriptions carry an ``ETag`` and are answered with 304
+            to a matching ``If-None-Match``. Marzban sends no validators, so
+            leave it off to measure against the real behavior; turn it on to
+            test revalidation as behind a caching proxy. Defaults to False.
+
+    Example:
+        ```python
+        from sarban.testing import FakePanel
+
+        panel = FakePanel(latency=0.005)
+        panel.seed_users(1000)
+        sb = panel.client(retry=True)
+        assert sb.get_users(limit=10)["total"] == 1000
+
+        panel.fail(status=503, times=2, path="^/api/users$")
+        sb.get_users(limit=10)  # retried twice, then answered
+        ```
+    """
+
+    def __init__(
+        self,
+        username: str = "admin",
+        password: str = "admin",
+        latency: Union[float, Tuple[float, float]] = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        token_ttl: Optional[float] = 86400,
+        seed: Optional[int] = None,
+        spec: Optional[str] = None,
+        address: str = "http://fake-panel",
+        subscriptions: Optional[Dict[str, str]] = None,
+        subscription_etags: bool = False
+    ) -> None:
+        routes = _ROUTES
+        if spec is not None:
+            with open(spec, "r", encoding="utf-8") as f:
+                paths = json.load(f)["paths"]
+            wanted = {(method.upper(), path) for path, ops in paths.items() for method in ops}
+            missing = wanted - {(method, template) for method, template, *_ in _ROUTES}
+            if missing:
+                raise ValueError(
+                    "Operations without a handler: "
+                    + ", ".join(f"{m} {p}" for m, p in sorted(missing, key=lambda op: op[1]))
+                )
+            routes = [route for route in _ROUTES if route[:2] in wanted]
+        self._static, self._dynamic = _compile(routes)
+        self._paths = {template for _, template, *_ in routes}
+
+        self.address = address.rstrip("/")
+        self.username = username
+        self.password = password
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.token_ttl = token_ttl
+        self.subscriptions = {**SUBSCRIPTION_FIXTURES, **(subscriptions or {})}
+        self.subscription_etags = subscription_etags
+        self.request_count = 0
+
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._failures = []
+        self._tokens = {}
+
+        self.admins: Dict[str, dict] = {}
+        self._passwords: Dict[str, str] = {}
+        self.users: Dict[str, dict] = {}
+        self._user_list: Optional[List[dict]] = None
+        self._sub_tokens: Dict[str, str] = {}
+        self.nodes: Dict[int, dict] = {}
+        self.templates: Dict[int, dict] = {}
+        self._ids = {"node": 0, "template": 0}
+        self.inbounds = copy.deepcopy(DEFAULT_INBOUNDS)
+        self.hosts = {
+            inbound["tag"]: [self._host(inbound["tag"])]
+            for inbounds in self.inbounds.values() for inbound in inbounds
+        }
+        self.core_config: Dict[str, Any] = {
+            "log": {"loglevel": "warning"},
+            "inbounds": [inbound for inbounds in self.inbounds.values() for inbound in inbounds],
+            "outbounds": [{"protocol": "freedom", "tag": "DIRECT"}],
+        }
+        self.master_usage = [0, 0]
+        self._add_admin(username, password, True)
+
+    # ---- State helpers --------------------------------------------------
+
+    def _host(self, tag: str) -> dict:
+        return {
+            "remark": f"{tag} ({{USERNAME}})", "address": urlsplit(self.address).hostname or "127.0.0.1",
+            "port": None, "sni": None, "host": None, "path": None, "security": "inbound_default",
+            "alpn": "", "fingerprint": "", "allowinsecure": None, "is_disabled": False,
+            "mux_enable": None, "fragment_setting": None, "noise_setting": None,
+            "random_user_agent": None, "use_sni_as_host": None,
+        }
+
+    def _add_admin(self, username: str, password: str, is_sudo: bool, **fields) -> dict:
+        admin = {
+            "username": username,
+            "is_sudo": is_sudo,
+            "telegram_id": fields.get("telegram_id"),
+            "discord_webhook": fields.get("discord_webhook"),
+            "users_usage": 0,
+        }
+        self.admins[username] = admin
+        self._passwords[username] = password
+        return admin
+
+    def add_admin(self, username: str, password: str, is_sudo: bool = False) -> dict:
+        """Create an admin directly, without a request."""
+        with self._lock:
+            return dict(self._add_admin(username, password, is_sudo))
+
+    def seed_users(
+        self,
+        count: int,
+        prefix: str = "user",
+        admin: Optional[str] = None,
+        **fields
+    ) -> List[str]:
+        """Create ``count`` users directly, without requests.
+
+        Parameters:
+            count (``int``):
+                Number of users
+
+            prefix (``str``, optional):
+                Usernames are the prefix followed by a zero padded number,
+                continuing after the users that already exist. Defaults to "user".
+
+            admin (``str``, optional):
+                Owner of the users. Defaults to the initial admin.
+
+            **fields:
+                Fields of a UserCreate body (proxies, inbounds, data_limit,
+                expire, status, note...). Defaults to a single vless proxy.
+
+        Returns:
+            `~List[str]`: The usernames of the new users.
+        """
+        fields.setdefault("proxies", {"vless": {}})
+        owner = self.admins[admin or self.username]
+        with self._lock:
+            names = []
+            i = len(self.users)
+            while len(names) < count:
+                username = f"{prefix}{i:06d}"
+                i += 1
+                if username not in self.users:
+                    self._create_user({**fields, "username": username}, owner)
+                    names.append(username)
+            return names
+
+    def add_traffic(self, username: str, used: int) -> dict:
+        """Count ``used`` bytes of traffic for a user, limiting it past its data limit."""
+        with self._lock:
+            user = self.users[username]
+            user["used_traffic"] += used
+            user["lifetime_used_traffic"] += used
+            if user["admin"] is not None:
+                user["admin"]["users_usage"] = (user["admin"]["users_usage"] or 0) + used
+            self.master_usage[1] += used
+            if user["data_limit"] and user["used_traffic"] >= user["data_limit"] and user["status"] == "active":
+                user["status"] = "limited"
+            return dict(user)
+
+    def fail(
+        self,
+        status: int = 503,
+        times: Optional[int] = 1,
+        path: Optional[str] = None,
+        method: Optional[str] = None,
+        detail: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None
+    ) -> None:
+        """Answer the next matching requests with an error instead of handling them.
+
+        Parameters:
+            status (``int``, optional):
+                Status of the error, 0 to drop the connection. Defaults to 503.
+
+            times (``int``, optional):
+                Number of requests to fail, None for all of them. Defaults to 1.
+
+            path (``str``, optional):
+                Regular expression searched in the request path (e.g.
+                "^/api/user/"). Defaults to any path.
+
+            method (``str``, optional):
+                HTTP method to match. Defaults to any method.
+
+            detail (``str``, optional):
+                Error detail of the JSON body. Defaults to the status reason.
+
+            headers (``Dict[str, str]``, optional):
+                Extra response headers, e.g. {"Retry-After": "1"}.
+        """
+        with self._lock:
+            self._failures.append([
+                re.compile(path).search if path else None, method, status, times, detail, headers
+            ])
+
+    def clear_failures(self) -> None:
+        """Forget the failures scheduled with `fail`."""
+        with self._lock:
+            self._failures.clear()
+
+    def delay(self) -> float:
+        """Seconds to wait before answering a request, from ``latency``."""
+        latency = self.latency
+        if isinstance(latency, tuple):
+            return self._random.uniform(*latency)
+        return latency
+
+    # ---- Dispatch -------------------------------------------------------
+
+    def _error(self, status: int, detail: Any, headers: Optional[Dict[str, str]] = None) -> Tuple[int, dict, bytes]:
+        if not status:
+            return 0, {}, b""
+        response_headers = {"Content-Type": "application/json"}
+        if headers:
+            response_headers.update(headers)
+        return status, response_headers, _dumps({"detail": detail if detail is not None else _REASONS.get(status, "Error")})
+
+    def _injected(self, method: str, path: str) -> Optional[Tuple[int, dict, bytes]]:
+        for failure in self._failures:
+            search, failure_method, status, times, detail, headers = failure
+            if (failure_method is None or failure_method == method) and (search is None or search(path)):
+                if times is not None:
+                    failure[3] -= 1
+                    if failure[3] <= 0:
+                        self._failures.remove(failure)
+                return self._error(status, detail, headers)
+        if self.error_rate and self._random.random() < self.error_rate:
+            return self._error(self.error_status, None)
+        return None
+
+    def _match(self, method: str, path: str) -> Optional[Tuple[Callable, bool, dict]]:
+        route = self._static.get((method, path))
+        if route is not None:
+            return route[0], route[1], {}
+        for match, func, public in self._dynamic.get(method, ()):
+            found = match(path)
+            if found is not None:
+                return func, public, {k: unquote(v) for k, v in found.groupdict().items()}
+        return None
+
+    def _authenticate(self, headers: Any) -> dict:
+        authorization = headers.get("Authorization") or ""
+        entry = self._tokens.get(authorization[7:]) if authorization.startswith("Bearer ") else None
+        if entry is not None:
+            username, expires_at = entry
+            admin = self.admins.get(username)
+            if admin is not None and (expires_at is None or time.time() < expires_at):
+                return admin
+        raise _PanelError(401, "Could not validate credentials")
+
+    def _decode_body(self, body: bytes, headers: Any) -> Any:
+        if not body:
+            return None
+        content_type = headers.get("Content-Type") or ""
+        if "application/x-www-form-urlencoded" in content_type:
+            return {k: v[0] for k, v in parse_qs(body.decode(), keep_blank_values=True).items()}
+        try:
+            return json.loads(body)
+        except ValueError:
+            raise _PanelError(422, _invalid("body", "", body.decode(errors="replace"), "JSON decode error"))
+
+    def handle(
+        self,
+        method: str,
+        path: str,
+        query: str = "",
+        body: bytes = b"",
+        headers: Any = None
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        """Answer one request like the panel would.
+
+        This is what the transports call; it does not wait for ``latency``.
+
+        Parameters:
+            method (``str``):
+                HTTP method
+
+            path (``str``):
+                URL path, e.g. "/api/users"
+
+            query (``str``, optional):
+                URL query string, without the "?"
+
+            body (``bytes``, optional):
+                Request body
+
+            headers (``Mapping``, optional):
+                Request headers, looked up case-insensitively
+
+        Returns:
+            `~Tuple[int, Dict, bytes]`: Status, headers and body of the
+            response. A status of 0 means the connection is to be dropped.
+        """
+        headers = headers if headers is not None else CaseInsensitiveDict()
+        with self._lock:
+            self.request_count += 1
+            if self._failures or self.error_rate:
+                failure = self._injected(method, path)
+                if failure is not None:
+                    return failure
+
+        route = self._match(method, path)
+        if route is None:
+            known = any(
+                self._match(other, path) is not None
+                for other in ("GET", "POST", "PUT", "DELETE") if other != method
+            )
+            return self._error(405, "Method Not Allowed") if known else self._error(404, "Not Found")
+
+        func, public, path_params = route
+        try:
+            with self._lock:
+                admin = None if public else self._authenticate(headers)
+                request = _Request(
+                    parse_qs(query, keep_blank_values=True) if query else {},
+                    self._decode_body(body, headers),
+                    headers,
+                    admin
+                )
+                result = func(self, request, **path_params)
+                if isinstance(result, _Raw):
+                    return result.status, {"Content-Type": result.content_type, **result.headers}, result.content
+                return 200, {"Content-Type": "application/json"}, _dumps(result)
+        except _PanelError as e:
+            return self._error(
+                e.status, e.detail, {"WWW-Authenticate": "Bearer"} if e.status == 401 else None
+            )
+
+    # ---- Clients --------------------------------------------------------
+
+    def adapter(self) -> "FakePanelAdapter":
+        """Return a requests adapter answering from this panel."""
+        return FakePanelAdapter(self)
+
+    def transport(self) -> "FakePanelTransport":
+        """Return an httpx transport answering from this panel."""
+        return FakePanelTransport(self)
+
+    def client(self, login: bool = True, **kwargs) -> "sarban.SARBAN":
+        """Return a `SARBAN` client connected to this panel in-process.
+
+        Parameters:
+            login (``bool``, optional):
+                Whether to log in as the initial admin. Defaults to True.
+
+            **kwargs:
+                Options of `SARBAN` (cache, retry, governor...)
+        """
+        sb = sarban.SARBAN(self.address, **kwargs)
+        sb.session.mount(sb.full_address + "/", self.adapter())
+        if login:
+            sb.login(self.username, self.password)
+        return sb
+
+    async def async_client(self, login: bool = True, **kwargs) -> "sarban.AsyncSARBAN":
+        """Return an `AsyncSARBAN` client connected to this panel in-process.
+
+        Parameters:
+            login (``bool``, optional):
+                Whether to log in as the initial admin. Defaults to True.
+
+            **kwargs:
+                Options of `AsyncSARBAN`
+        """
+        sb = sarban.AsyncSARBAN(self.address, **kwargs)
+        await sb.session.aclose()
+        sb.session = httpx.AsyncClient(transport=self.transport(), timeout=sb.timeout)
+        if login:
+            await sb.login(self.username, self.password)
+        return sb
+
+    def serve(self, host: str = "127.0.0.1", port: int = 0) -> "FakePanelServer":
+        """Serve this panel over HTTP on a background thread.
+
+        Parameters:
+            host (``str``, optional):
+                Address to listen on. Defaults to "127.0.0.1".
+
+            port (``int``, optional):
+                Port to listen on, 0 for a free one. Defaults to 0.
+
+        Returns:
+            `~FakePanelServer`: The running server; its ``url`` is the panel address.
+        """
+        return FakePanelServer(self, host, port)
+
+    # ---- Users ----------------------------------------------------------
+
+    def _visible_users(self, admin: dict) -> List[dict]:
+        if self._user_list is None:
+            self._user_list = list(self.users.values())
+        if admin["is_sudo"]:
+            return self._user_list
+        return [user for user in self._user_list if user["admin"] is admin]
+
+    def _user(self, request: _Request, username: str) -> dict:
+        user = self.users.get(username)
+        if user is None:
+            raise _PanelError(404, "User not found")
+        if not request.admin["is_sudo"] and user["admin"] is not request.admin:
+            raise _PanelError(403, "You're not allowed")
+        return user
+
+    def _proxies(self, proxies: Any, inbounds: Any) -> Tuple[dict, dict]:
+        if not isinstance(proxies, dict) or not proxies:
+            raise _PanelError(422, _invalid("body", "proxies", proxies, "Each user needs at least one proxy"))
+        settings = {}
+        for protocol, proxy in proxies.items():
+            if protocol not in self.inbounds:
+                raise _PanelError(400, f"Protocol {protocol} is disabled on your server")
+            proxy = dict(proxy or {})
+            if protocol in ("vmess", "vless"):
+                proxy.setdefault("id", str(uuid.uuid4()))
+                if protocol == "vless":
+                    proxy.setdefault("flow", "")
+            else:
+                proxy.setdefault("password", secrets.token_urlsafe(16))
+                if protocol == "shadowsocks":
+                    proxy.setdefault("method", "chacha20-ietf-poly1305")
+            settings[protocol] = proxy
+
+        inbounds = dict(inbounds or {})
+        for protocol, tags in inbounds.items():
+            if protocol not in settings:
+                raise _PanelError(422, _invalid("body", "inbounds", inbounds, f"{protocol} inbounds need a {protocol} proxy"))
+            known = {inbound["tag"] for inbound in self.inbounds.get(protocol, ())}
+            for tag in tags:
+                if tag not in known:
+                    raise _PanelError(400, f"Inbound {tag} doesn't exist")
+        for protocol in settings:
+            if not inbounds.get(protocol):
+                inbounds[protocol] = [inbound["tag"] for inbound in self.inbounds[protocol]]
+        return settings, inbounds
+
+    def _links(self, user: dict) -> List[str]:
+        links = []
+        for protocol, tags in user["inbounds"].items():
+            proxy = user["proxies"][protocol]
+            for inbound in self.inbounds[protocol]:
+                if inbound["tag"] not in tags:
+                    continue
+                for host in self.hosts.get(inbound["tag"], ()):
+                    if host.get("is_disabled"):
+                        continue
+                    links.append(_share_link(protocol, proxy, inbound, host, user["username"]))
+        return links
+
+    def _apply_status(self, user: dict) -> None:
+        if user["status"] != "active":
+            return
+        if user["expire"] and user["expire"] <= time.time():
+            user["status"] = "expired"
+        elif user["data_limit"] and user["used_traffic"] >= user["data_limit"]:
+            user["status"] = "limited"
+
+    def _validate_user_fields(self, data: dict, statuses: Tuple[str, ...]) -> None:
+        for field in ("data_limit", "expire", "on_hold_expire_duration", "auto_delete_in_days"):
+            value = data.get(field)
+            if value is not None and (not isinstance(value, int) or isinstance(value, bool) or (field == "data_limit" and value < 0)):
+                raise _PanelError(422, _invalid("body", field, value, "Input should be a valid integer"))
+        status = data.get("status")
+        if status is not None and status not in statuses:
+            raise _PanelError(422, _invalid("body", "status", status, f"Input should be {', '.join(statuses)}"))
+        strategy = data.get("data_limit_reset_strategy")
+        if strategy is not None and strategy not in RESET_STRATEGIES:
+            raise _PanelError(422, _invalid("body", "data_limit_reset_strategy", strategy, "Invalid reset strategy"))
+        if status == "on_hold" and not data.get("on_hold_expire_duration"):
+            raise _PanelError(422, _invalid(
+                "body", "on_hold_expire_duration", None,
+                "User cannot be on hold without a valid on_hold_expire_duration."
+            ))
+
+    def _create_user(self, data: dict, admin: dict) -> dict:
+        username = data.get("username")
+        if not isinstance(username, str) or not _USERNAME.match(username):
+            raise _PanelError(422, _invalid(
+                "body", "username", username,
+                "Username only can be 3 to 32 characters and contain a-z, 0-9, and underscores in between."
+            ))
+        self._validate_user_fields(data, ("active", "on_hold"))
+        if username in self.users:
+            raise _PanelError(409, "User already exists")
+        proxies, inbounds = self._proxies(data.get("proxies"), data.get("inbounds"))
+
+        token = secrets.token_urlsafe(18)
+        user = {
+            "proxies": proxies,
+            "expire": data.get("expire") or None,
+            "data_limit": data.get("data_limit") or None,
+            "data_limit_reset_strategy": data.get("data_limit_reset_strategy") or "no_reset",
+            "inbounds": inbounds,
+            "note": data.get("note"),
+            "sub_updated_at": None,
+            "sub_last_user_agent": None,
+            "online_at": None,
+            "on_hold_expire_duration": data.get("on_hold_expire_duration"),
+            "on_hold_timeout": data.get("on_hold_timeout"),
+            "auto_delete_in_days": data.get("auto_delete_in_days"),
+            "next_plan": data.get("next_plan"),
+            "username": username,
+            "status": data.get("status") or "active",
+            "used_traffic": 0,
+            "lifetime_used_traffic": 0,
+            "created_at": _now(),
+            "links": [],
+            "subscription_url": f"/sub/{token}",
+            "excluded_inbounds": {
+                protocol: [i["tag"] for i in self.inbounds[protocol] if i["tag"] not in inbounds[protocol]]
+                for protocol in inbounds
+            },
+            "admin": admin,
+        }
+        user["links"] = self._links(user)
+        self._apply_status(user)
+        self.users[username] = user
+        self._sub_tokens[token] = username
+        self._user_list = None
+        return user
+
+    def _modify_user(self, user: dict, data: dict) -> dict:
+        self._validate_user_fields(data, ("active", "disabled", "on_hold"))
+        if data.get("proxies") or data.get("inbounds"):
+            proxies = data.get("proxies") or {p: {} for p in data["inbounds"]}
+            # Existing credentials are kept unless the body replaces them
+            proxies = {p: {**user["proxies"].get(p, {}), **(s or {})} for p, s in proxies.items()}
+            user["proxies"], user["inbounds"] = self._proxies(proxies, data.get("inbounds"))
+            user["excluded_inbounds"] = {
+                protocol: [i["tag"] for i in self.inbounds[protocol] if i["tag"] not in user["inbounds"][protocol]]
+                for protocol in user["inbounds"]
+            }
+            user["links"] = self._links(user)
+        for field in (
+            "expire", "data_limit", "data_limit_reset_strategy", "note", "on_hold_expire_duration",
+            "on_hold_timeout", "auto_delete_in_days", "next_plan", "status"
+        ):
+            if field in data and data[field] is not None:
+                user[field] = data[field]
+        if user["status"] in ("expired", "limited"):
+            user["status"] = "active"
+        self._apply_status(user)
+        return user
+
+    def _delete_user(self, user: dict) -> None:
+        del self.users[user["username"]]
+        self._sub_tokens.pop(user["subscription_url"].rsplit("/", 1)[-1], None)
+        self._user_list = None
+
+    def _expired(self, request: _Request) -> List[dict]:
+        after = _timestamp(request.param("expired_after"))
+        before = _timestamp(request.param("expired_before"))
+        now = time.time()
+        return [
+            user for user in self._visible_users(request.admin)
+            if user["expire"] and user["expire"] <= now
+            and (after is None or user["expire"] >= after)
+            and (before is None or user["expire"] <= before)
+        ]
+
+    def _subscriber(self, token: str) -> dict:
+        username = self._sub_tokens.get(token)
+        if username is None:
+            raise _PanelError(404, "Not Found")
+        return self.users[username]
+
+    # ---- Admin ----------------------------------------------------------
+
+    @_route("POST", "/api/admin/token", public=True)
+    def _admin_token(self, request: _Request) -> dict:
+        form = request.body if isinstance(request.body, dict) else {}
+        username = form.get("username")
+        if username not in self._passwords or self._passwords[username] != form.get("password"):
+            raise _PanelError(401, "Incorrect username or password")
+        now = int(time.time())
+        claims = {"sub": username, "access": "sudo" if self.admins[username]["is_sudo"] else "admin", "iat": now}
+        expires_at = None
+        if self.token_ttl is not None:
+            expires_at = now + self.token_ttl
+            claims["exp"] = int(expires_at)
+        payload = base64.urlsafe_b64encode(json.dumps(claims).encode()).decode().rstrip("=")
+        token = f"{_TOKEN_HEADER}.{payload}.{secrets.token_urlsafe(24)}"
+        self._tokens[token] = (username, expires_at)
+        return {"access_token": token, "token_type": "bearer"}
+
+    def _sudo(self, request: _Request) -> None:
+        if not request.admin["is_sudo"]:
+            raise _PanelError(403, "You're not allowed")
+
+    def _target_admin(self, username: str) -> dict:
+        admin = self.admins.get(username)
+        if admin is None:
+            raise _PanelError(404, "Admin not found")
+        return admin
+
+    @_route("GET", "/api/admin")
+    def _get_current_admin(self, request: _Request) -> dict:
+        return request.admin
+
+    @_route("POST", "/api/admin")
+    def _create_admin(self, request: _Request) -> dict:
+        self._sudo(request)
+        data = request.json()
+        username, password = data.get("username"), data.get("password")
+        if not isinstance(username, str) or not username:
+            raise _PanelError(422, _invalid("body", "username", username, "Field required"))
+        if not isinstance(password, str) or not password:
+            raise _PanelError(422, _invalid("body", "password", password, "Field required"))
+        if not isinstance(data.get("is_sudo"), bool):
+            raise _PanelError(422, _invalid("body", "is_sudo", data.get("is_sudo"), "Input should be a valid boolean"))
+        if username in self.admins:
+            raise _PanelError(409, "Admin already exists")
+        return self._add_admin(
+            username, password, data["is_sudo"],
+            telegram_id=data.get("telegram_id"), discord_webhook=data.get("discord_webhook")
+        )
+
+    @_route("PUT", "/api/admin/{username}")
+    def _modify_admin(self, request: _Request, username: str) -> dict:
+        self._sudo(request)
+        admin = self._target_admin(username)
+        if admin["is_sudo"] and admin is not request.admin:
+            raise _PanelError(403, "You're not allowed to edit another sudoer's account. Use marzban-cli instead.")
+        data = request.json()
+        if not isinstance(data.get("is_sudo"), bool):
+            raise _PanelError(422, _invalid("body", "is_sudo", data.get("is_sudo"), "Input should be a valid boolean"))
+        admin["is_sudo"] = data["is_sudo"]
+        if data.get("password"):
+            self._passwords[username] = data["password"]
+        for field in ("telegram_id", "discord_webhook"):
+            if field in data:
+                admin[field] = data[field]
+        return admin
+
+    @_route("DELETE", "/api/admin/{username}")
+    def _remove_admin(self, request: _Request, username: str) -> dict:
+        self._sudo(request)
+        admin = self._target_admin(username)
+        if admin["is_sudo"]:
+            raise _PanelError(403, "You're not allowed to delete sudo accounts. Use marzban-cli instead.")
+        for user in self.users.values():
+            if user["admin"] is admin:
+                user["admin"] = None
+        del self.admins[username], self._passwords[username]
+        return {}
+
+    @_route("GET", "/api/admins")
+    def _get_admins(self, request: _Request) -> List[dict]:
+        self._sudo(request)
+        search = request.param("username")
+        admins = [a for a in self.admins.values() if not search or search.lower() in a["username"].lower()]
+        offset = request.param("offset", int, 0)
+        limit = request.param("limit", int)
+        return admins[offset:offset + limit if limit is not None else None]
+
+    def _set_admin_users(self, request: _Request, username: str, old: str, new: str) -> dict:
+        self._sudo(request)
+        admin = self._target_admin(username)
+        for user in self.users.values():
+            if user["admin"] is admin and user["status"] == old:
+                user["status"] = new
+                self._apply_status(user)
+        return {"detail": f"Users successfully {'disabled' if new == 'disabled' else 'activated'}"}
+
+    @_route("POST", "/api/admin/{username}/users/disable")
+    def _disable_all_active_users(self, request: _Request, username: str) -> dict:
+        return self._set_admin_users(request, username, "active", "disabled")
+
+    @_route("POST", "/api/admin/{username}/users/activate")
+    def _activate_all_disabled_users(self, request: _Request, username: str) -> dict:
+        return self._set_admin_users(request, username, "disabled", "active")
+
+    @_route("POST", "/api/admin/usage/reset/{username}")
+    def _reset_admin_usage(self, request: _Request, username: str) -> dict:
+        self._sudo(request)
+        admin = self._target_admin(username)
+        admin["users_usage"] = 0
+        return admin
+
+    @_route("GET", "/api/admin/usage/{username}")
+    def _get_admin_usage(self, request: _Request, username: str) -> int:
+        self._sudo(request)
+        return self._target_admin(username)["users_usage"] or 0
+
+    # ---- Core -----------------------------------------------------------
+
+    @_route("GET", "/api/core")
+    def _get_core_stats(self, request: _Request) -> dict:
+        return {"version": "1.8.24", "started": True, "logs_websocket": "/api/core/logs"}
+
+    @_route("POST", "/api/core/restart")
+    def _restart_core(self, request: _Request) -> dict:
+        self._sudo(request)
+        return {}
+
+    @_route("GET", "/api/core/config")
+    def _get_core_config(self, request: _Request) -> dict:
+        self._sudo(request)
+        return self.core_config
+
+    @_route("PUT", "/api/core/config")
+    def _modify_core_config(self, request: _Request) -> dict:
+        self._sudo(request)
+        self.core_config = request.json()
+        return self.core_config
+
+    # ---- Node -----------------------------------------------------------
+
+    def _node(self, node_id: str) -> dict:
+        try:
+            node = self.nodes.get(int(node_id))
+        except ValueError:
+            raise _PanelError(422, _invalid("path", "node_id", node_id, "Input should be a valid integer"))
+        if node is None:
+            raise _PanelError(404, "Node not found")
+        return node
+
+    @_route("GET", "/api/node/settings")
+    def _get_node_settings(self, request: _Request) -> dict:
+        self._sudo(request)
+        return {
+            "min_node_version": "v0.2.0",
+            "certificate": "-----BEGIN CERTIFICATE-----\nFAKE\n-----END CERTIFICATE-----\n",
+        }
+
+    @_route("POST", "/api/node")
+    def _add_node(self, request: _Request) -> dict:
+        self._sudo(request)
+        data = request.json()
+        for field in ("name", "address"):
+            if not isinstance(data.get(field), str) or not data[field]:
+                raise _PanelError(422, _invalid("body", field, data.get(field), "Field required"))
+        if any(node["name"] == data["name"] for node in self.nodes.values()):
+            raise _PanelError(409, f'Node "{data["name"]}" already exists')
+        self._ids["node"] += 1
+        node = {
+            "name": data["name"],
+            "address": data["address"],
+            "port": data.get("port") or 62050,
+            "api_port": data.get("api_port") or 62051,
+            "usage_coefficient": data.get("usage_coefficient") or 1.0,
+            "id": self._ids["node"],
+            "xray_version": "1.8.24",
+            "status": "connected",
+            "message": None,
+        }
+        self.nodes[node["id"]] = node
+        return node
+
+    @_route("GET", "/api/node/{node_id}")
+    def _get_node(self, request: _Request, node_id: str) -> dict:
+        self._sudo(request)
+        return self._node(node_id)
+
+    @_route("PUT", "/api/node/{node_id}")
+    def _modify_node(self, request: _Request, node_id: str) -> dict:
+        self._sudo(request)
+        node = self._node(node_id)
+        data = request.json()
+        status = data.get("status")
+        if status is not None and status not in ("connected", "connecting", "error", "disabled"):
+            raise _PanelError(422, _invalid("body", "status", status, "Invalid node status"))
+        for field in ("name", "address", "port", "api_port", "usage_coefficient"):
+            if data.get(field) is not None:
+                node[field] = data[field]
+        if status == "disabled":
+            node["status"], node["message"] = "disabled", None
+        elif status is not None or node["status"] == "disabled":
+            node["status"], node["message"] = "connected", None
+        return node
+
+    @_route("DELETE", "/api/node/{node_id}")
+    def _remove_node(self, request: _Request, node_id: str) -> dict:
+        self._sudo(request)
+        del self.nodes[self._node(node_id)["id"]]
+        return {}
+
+    @_route("GET", "/api/nodes")
+    def _get_nodes(self, request: _Request) -> List[dict]:
+        self._sudo(request)
+        return list(self.nodes.values())
+
+    @_route("POST", "/api/node/{node_id}/reconnect")
+    def _reconnect_node(self, request: _Request, node_id: str) -> dict:
+        self._sudo(request)
+        node = self._node(node_id)
+        if node["status"] != "disabled":
+            node["status"], node["message"] = "connected", None
+        return {}
+
+    @_route("GET", "/api/nodes/usage")
+    def _get_usage(self, request: _Request) -> dict:
+        self._sudo(request)
+        _check_range(request)
+        usages = [{"node_id": None, "node_name": "Master", "uplink": self.master_usage[0], "downlink": self.master_usage[1]}]
+        usages.extend(
+            {"node_id": node["id"], "node_name": node["name"], "uplink": 0, "downlink": 0}
+            for node in self.nodes.values()
+        )
+        return {"usages": usages}
+
+    # ---- Subscription ---------------------------------------------------
+
+    def _subscription(self, request: _Request, user: dict, client_type: str) -> _Raw:
+        content = self.subscriptions.get(client_type)
+        if content is None:
+            # The panel's v2ray format: its share links, one per line, base64 encoded
+            content = base64.b64encode("\n".join(user["links"]).encode()).decode()
+        user["sub_updated_at"] = _now()
+        user["sub_last_user_agent"] = request.headers.get("User-Agent")
+        headers = subscription_headers(user)
+        if self.subscription_etags:
+            etag = '"' + hashlib.md5(content.encode()).hexdigest() + '"'
+            headers["ETag"] = etag
+            if request.headers.get("If-None-Match") == etag:
+                return _Raw(b"", headers=headers, status=304)
+        content_type = "application/json" if client_type in ("sing-box", "outline", "v2ray-json") else (
+            "text/yaml; charset=utf-8" if client_type.startswith("clash") else "text/plain; charset=utf-8"
+        )
+        return _Raw(content.encode(), content_type, headers)
+
+    @_route("GET", "/sub/{token}/", public=True)
+    def _user_subscription(self, request: _Request, token: str) -> _Raw:
+        user = self._subscriber(token)
+        agent = (request.headers.get("User-Agent") or "").lower()
+        if "clash-verge" in agent or "meta" in agent or "stash" in agent:
+            client_type = "clash-meta"
+        elif "clash" in agent:
+            client_type = "clash"
+        elif "sing-box" in agent or "hiddify" in agent:
+            client_type = "sing-box"
+        else:
+            client_type = "v2ray"
+        return self._subscription(request, user, client_type)
+
+    @_route("GET", "/sub/{token}/info", public=True)
+    def _user_subscription_info(self, request: _Request, token: str) -> dict:
+        user = self._subscriber(token)
+        return {k: v for k, v in user.items() if k not in ("admin", "excluded_inbounds")}
+
+    @_route("GET", "/sub/{token}/usage", public=True)
+    def _user_get_usage(self, request: _Request, token: str) -> dict:
+        user = self._subscriber(token)
+        _check_range(request)
+        return {
+            "username": user["username"],
+            "usages": [{"node_id": None, "node_name": "Master", "used_traffic": user["used_traffic"]}],
+        }
+
+    @_route("GET", "/sub/{token}/{client_type}", public=True)
+    def _user_subscription_with_client_type(self, request: _Request, token: str, client_type: str) -> _Raw:
+        if client_type not in CLIENT_TYPES:
+            raise _PanelError(422, _invalid(
+                "path", "client_type", client_type, f"String should match pattern '{'|'.join(CLIENT_TYPES)}'"
+            ))
+        return self._subscription(request, self._subscriber(token), client_type)
+
+    # ---- System ---------------------------------------------------------
+
+    @_route("GET", "/api/system")
+    def _get_system_stats(self, request: _Request) -> dict:
+        users = self._visible_users(request.admin)
+        counts = dict.fromkeys(USER_STATUSES, 0)
+        for user in users:
+            counts[user["status"]] += 1
+        return {
+            "version": "0.8.4",
+            "mem_total": 8 * 1024 ** 3,
+            "mem_used": 2 * 1024 ** 3,
+            "cpu_cores": 4,
+            "cpu_usage": 12.5,
+            "total_user": len(users),
+            "online_users": 0,
+            "users_active": counts["active"],
+            "users_on_hold": counts["on_hold"],
+            "users_disabled": counts["disabled"],
+            "users_expired": counts["expired"],
+            "users_limited": counts["limited"],
+            "incoming_bandwidth": self.master_usage[1],
+            "outgoing_bandwidth": self.master_usage[0],
+            "incoming_bandwidth_speed": 0,
+            "outgoing_bandwidth_speed": 0,
+        }
+
+    @_route("GET", "/api/inbounds")
+    def _get_inbounds(self, request: _Request) -> dict:
+        return self.inbounds
+
+    @_route("GET", "/api/hosts")
+    def _get_hosts(self, request: _Request) -> dict:
+        self._sudo(request)
+        return self.hosts
+
+    @_route("PUT", "/api/hosts")
+    def _modify_hosts(self, request: _Request) -> dict:
+        self._sudo(request)
+        data = request.json()
+        tags = {inbound["tag"] for inbounds in self.inbounds.values() for inbound in inbounds}
+        for tag, hosts in data.items():
+            if tag not in tags:
+                raise _PanelError(400, f"Inbound {tag} doesn't exist")
+            for host in hosts:
+                for field in ("remark", "address"):
+                    if not isinstance(host.get(field), str):
+                        raise _PanelError(422, _invalid("body", field, host.get(field), "Field required"))
+        for tag, hosts in data.items():
+            self.hosts[tag] = [{**self._host(tag), **host} for host in hosts]
+        for user in self.users.values():
+            user["links"] = self._links(user)
+        return self.hosts
+
+    # ---- User template --------------------------------------------------
+
+    def _template(self, template_id: str) -> dict:
+        try:
+            template = self.templates.get(int(template_id))
+        except ValueError:
+            raise _PanelError(422, _invalid("path", "template_id", template_id, "Input should be a valid integer"))
+        if template is None:
+            raise _PanelError(404, "User Template not found")
+        return template
+
+    def _template_fields(self, template: dict, data: dict) -> dict:
+        for field in ("data_limit", "expire_duration"):
+            value = data.get(field)
+            if value is not None and (not isinstance(value, int) or value < 0):
+                raise _PanelError(422, _invalid("body", field, value, "Input should be greater than or equal to 0"))
+        for field in ("username_prefix", "username_suffix"):
+            value = data.get(field)
+            if value is not None and not 1 <= len(value) <= 20:
+                raise _PanelError(422, _invalid("body", field, value, "String should have 1 to 20 characters"))
+        name = data.get("name")
+        if name is not None and any(
+            t["name"] == name and t is not template for t in self.templates.values()
+        ):
+            raise _PanelError(409, "Template by this name already exists")
+        for protocol, tags in (data.get("inbounds") or {}).items():
+            known = {inbound["tag"] for inbound in self.inbounds.get(protocol, ())}
+            for tag in tags:
+                if tag not in known:
+                    raise _PanelError(400, f"Inbound {tag} doesn't exist")
+        for field in ("name", "data_limit", "expire_duration", "username_prefix", "username_suffix", "inbounds"):
+            if field in data:
+                template[field] = data[field]
+        return template
+
+    @_route("POST", "/api/user_template")
+    def _add_user_template(self, request: _Request) -> dict:
+        self._sudo(request)
+        template = self._template_fields({
+            "name": None, "data_limit": None, "expire_duration": None,
+            "username_prefix": None, "username_suffix": None, "inbounds": {}, "id": None,
+        }, request.json())
+        self._ids["template"] += 1
+        template["id"] = self._ids["template"]
+        self.templates[template["id"]] = template
+        return template
+
+    @_route("GET", "/api/user_template")
+    def _get_user_templates(self, request: _Request) -> List[dict]:
+        offset = request.param("offset", int, 0)
+        limit = request.param("limit", int)
+        return list(self.templates.values())[offset:offset + limit if limit is not None else None]
+
+    @_route("GET", "/api/user_template/{template_id}")
+    def _get_user_template_endpoint(self, request: _Request, template_id: str) -> dict:
+        return self._template(template_id)
+
+    @_route("PUT", "/api/user_template/{template_id}")
+    def _modify_user_template(self, request: _Request, template_id: str) -> dict:
+        self._sudo(request)
+        return self._template_fields(self._template(template_id), request.json())
+
+    @_route("DELETE", "/api/user_template/{template_id}")
+    def _remove_user_template(self, request: _Request, template_id: str) -> dict:
+        self._sudo(request)
+        del self.templates[self._template(template_id)["id"]]
+        return {}
+
+    # ---- User -----------------------------------------------------------
+
+    @_route("POST", "/api/user")
+    def _add_user(self, request: _Request) -> dict:
+        return self._create_user(request.json(), request.admin)
+
+    @_route("GET", "/api/user/{username}")
+    def _get_user(self, request: _Request, username: str) -> dict:
+        return self._user(request, username)
+
+    @_route("PUT", "/api/user/{username}")
+    def _modify_user_endpoint(self, request: _Request, username: str) -> dict:
+        return self._modify_user(self._user(request, username), request.json())
+
+    @_route("DELETE", "/api/user/{username}")
+    def _remove_user(self, request: _Request, username: str) -> dict:
+        self._delete_user(self._user(request, username))
+        return {"detail": "User successfully deleted"}
+
+    @_route("POST", "/api/user/{username}/reset")
+    def _reset_user_data_usage(self, request: _Request, username: str) -> dict:
+        user = self._user(request, username)
+        user["used_traffic"] = 0
+        if user["status"] == "limited":
+            user["status"] = "active"
+        return user
+
+    @_route("POST", "/api/user/{username}/revoke_sub")
+    def _revoke_user_subscription(self, request: _Request, username: str) -> dict:
+        user = self._user(request, username)
+        self._sub_tokens.pop(user["subscription_url"].rsplit("/", 1)[-1], None)
+        token = secrets.token_urlsafe(18)
+        self._sub_tokens[token] = username
+        user["subscription_url"] = f"/sub/{token}"
+        for protocol, proxy in user["proxies"].items():
+            if "id" in proxy:
+                proxy["id"] = str(uuid.uuid4())
+            else:
+                proxy["password"] = secrets.token_urlsafe(16)
+        user["links"] = self._links(user)
+        return user
+
+    @_route("GET", "/api/users")
+    def _get_users(self, request: _Request) -> dict:
+        users = self._visible_users(request.admin)
+        usernames = request.params.get("username")
+        if usernames:
+            wanted = set(usernames)
+            users = [user for user in users if user["username"] in wanted]
+        search = request.param("search")
+        if search:
+            search = search.lower()
+            users = [
+                user for user in users
+                if search in user["username"].lower() or search in (user["note"] or "").lower()
+            ]
+        admins = request.params.get("admin")
+        if admins:
+            wanted = set(admins)
+            users = [user for user in users if user["admin"] is not None and user["admin"]["username"] in wanted]
+        status = request.param("status")
+        if status:
+            if status not in USER_STATUSES:
+                raise _PanelError(422, _invalid("query", "status", status, "Invalid user status"))
+            users = [user for user in users if user["status"] == status]
+        sort = request.param("sort")
+        if sort:
+            users = list(users)
+            for field in reversed(sort.split(",")):
+                name = field.strip().lstrip("-")
+                if name not in ("username", "used_traffic", "data_limit", "expire", "created_at"):
+                    raise _PanelError(400, f'"{field}" is not a valid sort option')
+                users.sort(
+                    key=lambda user: (user[name] is not None, user[name] if user[name] is not None else 0),
+                    reverse=field.strip().startswith("-")
+                )
+        offset = request.param("offset", int, 0)
+        limit = request.param("limit", int)
+        return {"users": users[offset:offset + limit if limit is not None else None], "total": len(users)}
+
+    @_route("POST", "/api/users/reset")
+    def _reset_users_data_usage(self, request: _Request) -> dict:
+        self._sudo(request)
+        for user in self.users.values():
+            user["used_traffic"] = 0
+            if user["status"] == "limited":
+                user["status"] = "active"
+        return {}
+
+    @_route("GET", "/api/user/{username}/usage")
+    def _get_user_usage(self, request: _Request, username: str) -> dict:
+        user = self._user(request, username)
+        _check_range(request)
+        return {
+            "username": username,
+            "usages": [{"node_id": None, "node_name": "Master", "used_traffic": user["used_traffic"]}],
+        }
+
+    @_route("POST", "/api/user/{username}/active-next")
+    def _active_next_plan(self, request: _Request, username: str) -> dict:
+        user = self._user(request, username)
+        plan = user["next_plan"]
+        if not plan:
+            raise _PanelError(404, "User doesn't have next plan")
+        remaining = max((user["data_limit"] or 0) - user["used_traffic"], 0)
+        user["data_limit"] = (plan.get("data_limit") or 0) + (remaining if plan.get("add_remaining_traffic") else 0) or None
+        user["expire"] = int(time.time()) + plan["expire"] if plan.get("expire") else None
+        user["used_traffic"] = 0
+        user["status"] = "active"
+        user["next_plan"] = None
+        return user
+
+    @_route("GET", "/api/users/usage")
+    def _get_users_usage(self, request: _Request) -> dict:
+        users = self._visible_users(request.admin)
+        admins = request.params.get("admin")
+        if admins:
+            users = [user for user in users if user["admin"] is not None and user["admin"]["username"] in admins]
+        _check_range(request)
+        return {"usages": [{"node_id": None, "node_name": "Master", "used_traffic": sum(u["used_traffic"] for u in users)}]}
+
+    @_route("PUT", "/api/user/{username}/set-owner")
+    def _set_owner(self, request: _Request, username: str) -> dict:
+        self._sudo(request)
+        user = self._user(request, username)
+        user["admin"] = self._target_admin(request.param("admin_username"))
+        return user
+
+    @_route("GET", "/api/users/expired")
+    def _get_expired_users(self, request: _Request) -> List[str]:
+        return [user["username"] for user in self._expired(request)]
+
+    @_route("DELETE", "/api/users/expired")
+    def _delete_expired_users(self, request: _Request) -> List[str]:
+        expired = self._expired(request)
+        if not expired:
+            raise _PanelError(404, "No expired users found in the specified date range")
+        for user in expired:
+            self._delete_user(user)
+        return [user["username"] for user in expired]
+
+    @_route("GET", "/", public=True)
+    def _base(self, request: _Request) -> _Raw:
+        return _Raw(b"<!doctype html><title>Marzban</title>", "text/html; charset=utf-8")
+
+
+def _share_link(protocol: str, proxy: dict, inbound: dict, host: dict, username: str) -> str:
+    remark = host["remark"].replace("{USERNAME}", username)
+    address = host["address"]
+    port = host["port"] or inbound["port"]
+    network = inbound["network"]
+    security = inbound["tls"] if host["security"] == "inbound_default" else host["security"]
+    if protocol == "vmess":
+        config = {
+            "add": address, "aid": "0", "host": host["host"] or "", "id": proxy["id"], "net": network,
+            "path": host["path"] or "", "port": port, "ps": remark, "scy": "auto",
+            "tls": security if security != "none" else "", "type": "none", "v": "2",
+        }
+        return "vmess://" + base64.b64encode(json.dumps(config, separators=(",", ":")).encode()).decode()
+    if protocol == "shadowsocks":
+        userinfo = base64.b64encode(f"{proxy['method']}:{proxy['password']}".encode()).decode()
+        return f"ss://{userinfo}@{address}:{port}#{quote(remark)}"
+
+    query = f"security={security}&type={network}"
+    if protocol == "vless":
+        query += f"&flow={proxy.get('flow') or ''}"
+    if host["sni"]:
+        query += f"&sni={quote(host['sni'])}"
+    if host["path"]:
+        query += f"&path={quote(host['path'])}"
+    credential = proxy["id"] if protocol == "vless" else quote(proxy["password"])
+    return f"{protocol}://{credential}@{address}:{port}?{query}#{quote(remark)}"
+
+
+# Subscription bodies served for the template based client types. They are
+# fixed documents in the layout of the panel's default templates and are never
+# produced by sarban's own renderer, so comparing `sarban.sub_gen` output with
+# what FakePanel serves can actually fail. Pass ``subscriptions`` to serve
+# bodies captured from a real panel instead.
+SUBSCRIPTION_FIXTURES = {
+    "clash": """mode: rule
+mixed-port: 7890
+ipv6: true
+
+proxies:
+- name: VMess TCP (user)
+  type: vmess
+  server: fake-panel
+  port: 443
+  uuid: 00000000-0000-0000-0000-000000000000
+  alterId: 0
+  cipher: auto
+  udp: true
+  network: tcp
+
+proxy-groups:
+- name: PROXY
+  type: select
+  proxies:
+  - VMess TCP (user)
+
+rules:
+- MATCH,PROXY
+""",
+    "clash-meta": """mode: rule
+mixed-port: 7890
+ipv6: true
+
+proxies:
+- name: VLESS TCP REALITY (user)
+  type: vless
+  server: fake-panel
+  port: 443
+  uuid: 00000000-0000-0000-0000-000000000000
+  network: tcp
+  udp: true
+  flow: xtls-rprx-vision
+  tls: true
+  servername: example.com
+  client-fingerprint: chrome
+  reality-opts:
+    public-key: key
+    short-id: ab
+
+proxy-groups:
+- name: PROXY
+  type: select
+  proxies:
+  - VLESS TCP REALITY (user)
+
+rules:
+- MATCH,PROXY
+""",
+    "sing-box": """{
+    "log": {
+        "level": "warn",
+        "timestamp": false
+    },
+    "outbounds": [
+        {
+            "type": "selector",
+            "tag": "Select",
+            "outbounds": [
+                "VLESS TCP REALITY (user)"
+            ]
+        },
+        {
+            "type": "vless",
+            "tag": "VLESS TCP REALITY (user)",
+            "server": "fake-panel",
+            "server_port": 443,
+            "uuid": "00000000-0000-0000-0000-000000000000",
+            "flow": "xtls-rprx-vision",
+            "tls": {
+                "enabled": true,
+                "server_name": "example.com",
+                "utls": {
+                    "enabled": true,
+                    "fingerprint": "chrome"
+                },
+                "reality": {
+                    "enabled": true,
+                    "public_key": "key",
+                    "short_id": "ab"
+                }
+            }
+        },
+        {
+            "type": "direct",
+            "tag": "direct"
+        }
+    ]
+}""",
+    "outline": """{"server": "fake-panel", "server_port": 1080, "password": "password", "method": "chacha20-ietf-poly1305"}""",
+    "v2ray-json": """[
+    {
+        "remarks": "VLESS TCP REALITY (user)",
+        "outbounds": [
+            {
+                "protocol": "vless",
+                "settings": {
+                    "vnext": [
+                        {
+                            "address": "fake-panel",
+                            "port": 443,
+                            "users": [
+                                {
+                                    "id": "00000000-0000-0000-0000-000000000000",
+                                    "flow": "xtls-rprx-vision",
+                                    "encryption": "none"
+                                }
+                            ]
+                        }
+                    ]
+                },
+                "tag": "proxy"
+            }
+        ]
+    }
+]""",
+}
+
+
+class FakePanelAdapter(BaseAdapter):
+    """requests adapter that answers from a `FakePanel` without any network I/O."""
+
+    def __init__(self, panel: FakePanel) -> None:
+        super().__init__()
+        self.panel = panel
+
+    def send(
+        self,
+        request: requests.PreparedRequest,
+        stream: bool = False,
+        timeout: Any = None,
+        verify: Any = True,
+        cert: Any = None,
+        proxies: Any = None
+    ) -> requests.Response:
+        delay = self.panel.delay()
+        if delay:
+            time.sleep(delay)
+
+        path, _, query = request.path_url.partition("?")
+        body = request.body or b""
+        status, headers, content = self.panel.handle(
+            request.method,
+            path,
+            query,
+            body.encode() if isinstance(body, str) else body,
+            request.headers
+        )
+        if not status:
+            raise requests.exceptions.ConnectionError("Connection dropped by the fake panel", request=request)
+
+        response = requests.Response()
+        response.status_code = status
+        response.reason = _REASONS.get(status, "")
+        response.headers = CaseInsensitiveDict(headers)
+        response.encoding = "utf-8"
+        response._content = content
+        response._content_consumed = True
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self) -> None:
+        pass
+
+
+_TRANSPORT_BASES = (httpx.BaseTransport, httpx.AsyncBaseTransport) if httpx is not None else (object,)
+
+
+class FakePanelTransport(*_TRANSPORT_BASES):
+    """httpx transport (sync and async) that answers from a `FakePanel` without any network I/O."""
+
+    def __init__(self, panel: FakePanel) -> None:
+        self.panel = panel
+
+    def _respond(self, request: "httpx.Request") -> "httpx.Response":
+        path, _, query = request.url.raw_path.decode().partition("?")
+        status, headers, content = self.panel.handle(
+            request.method, path, query, request.content, request.headers
+        )
+        if not status:
+            raise httpx.ConnectError("Connection dropped by the fake panel", request=request)
+        return httpx.Response(status, headers=headers, content=content, request=request)
+
+    def handle_request(self, request: "httpx.Request") -> "httpx.Response":
+        delay = self.panel.delay()
+        if delay:
+            time.sleep(delay)
+        request.read()
+        return self._respond(request)
+
+    async def handle_async_request(self, request: "httpx.Request") -> "httpx.Response":
+        delay = self.panel.delay()
+        if delay:
+            await asyncio.sleep(delay)
+        await request.aread()
+        return self._respond(request)
+
+
+class _HTTPHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    panel: FakePanel = None
+
+    def _handle(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        delay = self.panel.delay()
+        if delay:
+            time.sleep(delay)
+
+        path, _, query = self.path.partition("?")
+        status, headers, content = self.panel.handle(self.command, path, query, body, self.headers)
+        if not status:
+            self.close_connection = True
+            return
+
+        self.send_response(status, _REASONS.get(status))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class FakePanelServer:
+    """A `FakePanel` served over HTTP on a background thread.
+
+    Use it when a test needs real sockets (e.g. another process or tool as
+    the client); the in-process transports are much faster otherwise.
+
+    Attributes:
+        url (``str``):
+            Address of the panel, e.g. "http://127.0.0.1:54321"
+    """
+
+    def __init__(self, panel: FakePanel, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.panel = panel
+        handler = type("_PanelHandler", (_HTTPHandler,), {"panel": panel})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self.url = f"http://{host}:{self._server.server_port}"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def client(self, login: bool = True, **kwargs) -> "sarban.SARBAN":
+        """Return a `SARBAN` client of this server, logged in as the initial admin by default."""
+        sb = sarban.SARBAN(self.url, **kwargs)
+        if login:
+            sb.login(self.panel.username, self.panel.password)
+        return sb
+
+    def close(self) -> None:
+        """Stop the server and close its socket."""
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self) -> "FakePanelServer":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
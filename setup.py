@@ -29,6 +29,14 @@ setup(
     install_requires=[
         "requests>=2.25.0"
     ],
+    extras_require={
+        "async": ["httpx>=0.23.0"],
+        "fast": ["orjson>=3.0.0"],
+        "arrow": ["pyarrow>=8.0.0"],
+        "analytics": ["numpy>=1.17.0"],
+        "otel": ["opentelemetry-api>=1.0.0"],
+        "logs": ["websockets>=10.0"],
+    },
     classifiers=[
         'Development Status :: 4 - Beta',
         'Intended Audience :: Developers',
@@ -36,7 +44,6 @@ setup(
         'Topic :: Internet :: WWW/HTTP :: Dynamic Content',
         'Topic :: System :: Networking',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.6',
         'Programming Language :: Python :: 3.7',
         'Programming Language :: Python :: 3.8',
         'Programming Language :: Python :: 3.9',
@@ -47,7 +54,7 @@ setup(
         'Operating System :: OS Independent',
     ],
     license="MIT",
-    python_requires='>=3.6',
+    python_requires='>=3.7',
     project_urls={
         'Documentation': 'https://github.com/liwyd/sarban',
         'Source': 'https://github.com/liwyd/sarban',